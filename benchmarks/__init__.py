@@ -0,0 +1,4 @@
+"""
+Benchmarks and stress tools for the BitByBit backend. Run from the repository
+root, e.g. ``python -m benchmarks.stress_attempts``.
+"""
@@ -0,0 +1,214 @@
+"""
+Compare the Flask dev server with the async (ASGI) serving mode.
+
+Starts each server in its own process against a fresh copy of the catalog,
+then drives it from ``--concurrency`` client threads. Every simulated student
+loads the units and a quiz, submits an attempt and asks for the next
+activity, over one keep-alive connection. Prints throughput and latency
+percentiles per server as JSON.
+
+    python -m benchmarks.async_serving --concurrency 30 --rounds 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .latency import summarize
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SOURCE_DATA_DIR = REPO_ROOT / "src" / "backend" / "data"
+CATALOG_FILES = ("units.json", "questions.json", "quizzes.json", "users.json")
+
+SERVERS = {
+    "flask": [
+        sys.executable, "-m", "flask", "--app", "src.backend.main:create_app",
+        "run", "--with-threads", "--port", "{port}",
+    ],
+    "asgi": [sys.executable, "-m", "src.backend.asgi", "--port", "{port}"],
+}
+
+
+def _prepare_data_dir() -> Path:
+    data_dir = Path(tempfile.mkdtemp(prefix="bitbybit-serving-"))
+    for name in CATALOG_FILES:
+        shutil.copy(SOURCE_DATA_DIR / name, data_dir / name)
+    (data_dir / "students.json").write_text("{}")
+    (data_dir / "attempts.json").write_text("[]")
+    return data_dir
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(port: int, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def _catalog_sample() -> Tuple[List[Dict], Dict[str, Dict]]:
+    raw_questions = json.loads((SOURCE_DATA_DIR / "questions.json").read_text())
+    questions = {question["id"]: question for question in raw_questions}
+    quizzes = [
+        quiz
+        for quiz in json.loads((SOURCE_DATA_DIR / "quizzes.json").read_text())
+        if quiz.get("question_ids")
+    ]
+    return quizzes, questions
+
+
+def _client(
+    port: int,
+    client_id: int,
+    rounds: int,
+    quizzes: List[Dict],
+    questions: Dict[str, Dict],
+    latencies: Dict[str, List[float]],
+    errors: List[str],
+    lock: threading.Lock,
+) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    student_id = f"bench-{client_id}"
+    local: Dict[str, List[float]] = {}
+
+    def call(route: str, method: str, path: str, body=None) -> None:
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        started = time.perf_counter()
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        local.setdefault(route, []).append(time.perf_counter() - started)
+        if response.status >= 400:
+            errors.append(f"{method} {path}: {response.status}")
+
+    for i in range(rounds):
+        quiz = quizzes[(client_id + i) % len(quizzes)]
+        call("GET /api/units", "GET", "/api/units")
+        call("GET /api/quizzes/<id>", "GET", f"/api/quizzes/{quiz['id']}")
+        results = []
+        for j, qid in enumerate(quiz["question_ids"]):
+            question = questions.get(qid) or {}
+            results.append(
+                {
+                    "question_id": qid,
+                    "correct": bool((i + j) % 3),
+                    "chosen_answer": question.get("correct_answer", ""),
+                    "time_sec": 12,
+                }
+            )
+        call(
+            "POST /api/attempts",
+            "POST",
+            "/api/attempts",
+            {
+                "student_id": student_id,
+                "quiz_id": quiz["id"],
+                "quiz_type": quiz.get("type", "practice"),
+                "unit_id": quiz.get("unit_id"),
+                "section_id": quiz.get("section_id"),
+                "score_pct": 100.0 * sum(r["correct"] for r in results) / len(results),
+                "results": results,
+            },
+        )
+        call(
+            "GET /api/student/<id>/next-activity",
+            "GET",
+            f"/api/student/{student_id}/next-activity",
+        )
+    conn.close()
+    with lock:
+        for route, values in local.items():
+            latencies.setdefault(route, []).extend(values)
+
+
+def run_server_benchmark(name: str, concurrency: int, rounds: int) -> Dict:
+    data_dir = _prepare_data_dir()
+    port = _free_port()
+    env = dict(os.environ, BITBYBIT_DATA_DIR=str(data_dir), BITBYBIT_STORAGE_BACKEND="json")
+    command = [part.format(port=port) for part in SERVERS[name]]
+    process = subprocess.Popen(
+        command, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_until_up(port, process)
+        quizzes, questions = _catalog_sample()
+        latencies: Dict[str, List[float]] = {}
+        errors: List[str] = []
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(
+                target=_client,
+                args=(port, client_id, rounds, quizzes, questions, latencies, errors, lock),
+            )
+            for client_id in range(concurrency)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "server": name,
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(all_latencies) / elapsed, 1) if elapsed else None,
+        **summarize(all_latencies),
+        "errors": len(errors),
+        "routes": {route: summarize(values) for route, values in sorted(latencies.items())},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Flask dev server vs. async serving mode.")
+    parser.add_argument("--concurrency", type=int, default=30, help="concurrent clients")
+    parser.add_argument("--rounds", type=int, default=20, help="quiz submissions per client")
+    parser.add_argument(
+        "--servers", nargs="+", choices=sorted(SERVERS), default=["flask", "asgi"]
+    )
+    args = parser.parse_args()
+
+    results = [run_server_benchmark(name, args.concurrency, args.rounds) for name in args.servers]
+    print(
+        json.dumps(
+            {"concurrency": args.concurrency, "rounds": args.rounds, "results": results},
+            indent=2,
+        )
+    )
+    return 1 if any(result["errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Full-history replay from the attempt log vs. the binary attempt snapshot.
+
+Builds (or reuses) a synthetic data directory, builds the snapshot, then
+times a full replay of attempt rows and a cold build of the columnar store
+from each source, plus an incremental snapshot update after new appends
+(the appended benchmark attempts stay in a reused ``--data-dir``).
+
+    python -m benchmarks.attempt_snapshot --size small
+    python -m benchmarks.attempt_snapshot --size large --data-dir /tmp/bitbybit-large
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from .synthetic_data import add_scale_arguments, generate, scale_from_args
+
+NEW_ATTEMPTS = 500
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn()
+    return result, round((time.perf_counter() - started) * 1000, 1)
+
+
+def run() -> Dict[str, Any]:
+    from src.backend import repository
+    from src.backend.attempt_columns import AttemptColumns
+    from src.backend.attempt_snapshot import AttemptSnapshot
+    from src.backend.models import Attempt, AttemptQuestionResult
+
+    def load_columns_from_snapshot() -> AttemptColumns:
+        snapshot = AttemptSnapshot.open(repository.ATTEMPT_SNAPSHOT_DIR)
+        try:
+            return AttemptColumns().load_snapshot(snapshot)
+        finally:
+            snapshot.close()
+
+    read_log = repository._storage.read_attempts_since
+    added, build_ms = _timed(repository.refresh_attempt_snapshot)
+    log_rows, log_rows_ms = _timed(lambda: sum(1 for _ in read_log(None)))
+    snapshot_rows, snapshot_rows_ms = _timed(
+        lambda: sum(1 for _ in repository.read_attempt_rows_since(None))
+    )
+    log_columns, log_columns_ms = _timed(lambda: AttemptColumns().refresh(read_log))
+    snapshot_columns, snapshot_columns_ms = _timed(load_columns_from_snapshot)
+
+    questions = list(repository.load_questions().values())
+    repository.append_attempts(
+        [
+            Attempt(
+                id=f"snapshot-bench-{i}",
+                student_id=f"student-{i % 50 + 1}",
+                quiz_id="bench",
+                quiz_type="practice",
+                unit_id=questions[i % len(questions)].unit_id,
+                section_id=questions[i % len(questions)].section_id,
+                score_pct=100.0,
+                results=[
+                    AttemptQuestionResult(
+                        question_id=questions[i % len(questions)].id,
+                        correct=True,
+                        chosen_answer="A",
+                        time_sec=20.0,
+                    )
+                ],
+            )
+            for i in range(NEW_ATTEMPTS)
+        ]
+    )
+    appended, update_ms = _timed(repository.refresh_attempt_snapshot)
+
+    return {
+        "snapshot_build": {"attempts": added, "ms": build_ms},
+        "snapshot_update": {"attempts": appended, "ms": update_ms},
+        "full_replay_rows_ms": {"log": log_rows_ms, "snapshot": snapshot_rows_ms},
+        "columns_build_ms": {"log": log_columns_ms, "snapshot": snapshot_columns_ms},
+        "matches": {
+            "rows": log_rows == snapshot_rows,
+            "columns": (
+                log_columns.question_totals() == snapshot_columns.question_totals()
+                and len(log_columns) == len(snapshot_columns)
+            ),
+        },
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Attempt log vs. binary attempt snapshot.")
+    add_scale_arguments(parser)
+    parser.add_argument("--data-dir", type=Path, default=None, help="reuse generated data")
+    args = parser.parse_args()
+
+    scale = scale_from_args(args)
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="bitbybit-snapshot-"))
+    if args.data_dir is None:
+        # Registered before the backend is imported so it runs after the
+        # backend's own exit hooks.
+        atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+        generate(data_dir, scale, args.seed)
+    os.environ["BITBYBIT_DATA_DIR"] = str(data_dir)
+    os.environ["BITBYBIT_STORAGE_BACKEND"] = "json"
+
+    report = {"size": args.size, "scale": scale.__dict__, **run()}
+    print(json.dumps(report, indent=2))
+    return 0 if all(report["matches"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
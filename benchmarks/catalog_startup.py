@@ -0,0 +1,103 @@
+"""
+Catalog startup from the JSON files vs. the precompiled catalog snapshot.
+
+Builds (or reuses) a synthetic data directory, then times a cold catalog load
+the way a fresh worker does it: parsing and hydrating units, questions and
+quizzes from JSON and building the lookup tables, against seeding the
+catalog cache from the snapshot. The validated snapshot build is timed once.
+
+    python -m benchmarks.catalog_startup --size small
+    python -m benchmarks.catalog_startup --size large --data-dir /tmp/bitbybit-large
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from .synthetic_data import add_scale_arguments, generate, scale_from_args
+
+
+def _timed(fn: Callable[[], Any], repeat: int = 1) -> Tuple[Any, float]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, round(best * 1000, 2)
+
+
+def run(repeat: int) -> Dict[str, Any]:
+    from src.backend import repository
+    from src.backend.catalog_snapshot import compile_catalog, write_snapshot
+
+    def cold_load(seed: Callable[[], None]) -> Any:
+        repository._catalog.invalidate()
+        seed()
+        repository._catalog.check()
+        repository._get_catalog_lookups()
+        return repository.get_catalog_validators()[0]
+
+    json_fingerprint, json_ms = _timed(lambda: cold_load(lambda: None), repeat)
+    json_questions = repository.load_questions()
+
+    paths = {
+        "units": repository.UNITS_PATH,
+        "questions": repository.QUESTIONS_PATH,
+        "quizzes": repository.QUIZZES_PATH,
+    }
+    header, build_ms = _timed(
+        lambda: write_snapshot(compile_catalog(paths), repository.CATALOG_SNAPSHOT_PATH)
+    )
+    snapshot_fingerprint, snapshot_ms = _timed(
+        lambda: cold_load(repository._seed_catalog_from_snapshot), repeat
+    )
+
+    return {
+        "catalog": header["counts"],
+        "snapshot_bytes": header["payload_bytes"],
+        "snapshot_build_ms": build_ms,
+        "cold_load_ms": {"json": json_ms, "snapshot": snapshot_ms},
+        "source": repository.get_catalog_stats()["source"],
+        "matches": {
+            "questions": repository.load_questions() == json_questions,
+            "fingerprint": snapshot_fingerprint == json_fingerprint,
+        },
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Catalog startup: JSON vs. snapshot.")
+    add_scale_arguments(parser)
+    parser.add_argument("--data-dir", type=Path, default=None, help="reuse generated data")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    scale = scale_from_args(args)
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="bitbybit-catalog-"))
+    if args.data_dir is None:
+        # Registered before the backend is imported so it runs after the
+        # backend's own exit hooks.
+        atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+        generate(data_dir, scale, args.seed)
+    os.environ["BITBYBIT_DATA_DIR"] = str(data_dir)
+    os.environ["BITBYBIT_STORAGE_BACKEND"] = "json"
+    # Start from JSON so the first load measures the fallback path.
+    (data_dir / "catalog.snapshot").unlink(missing_ok=True)
+
+    report = {"size": args.size, "scale": scale.__dict__, **run(args.repeat)}
+    print(json.dumps(report, indent=2))
+    return 0 if all(report["matches"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Memory and speed of the columnar attempt store against Attempt objects.
+
+Builds (or reuses) a synthetic data directory, then measures the memory
+held by the full history as a list of Attempt dataclasses and as an
+AttemptColumns store, and times the analytics over each representation.
+Results of both representations are checked for equality.
+
+    python -m benchmarks.columnar_memory --size small
+    python -m benchmarks.columnar_memory --size large --data-dir /tmp/bitbybit-large
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from .synthetic_data import add_scale_arguments, generate, scale_from_args
+
+
+def _held_memory(build: Callable[[], Any]) -> Tuple[Any, int, int]:
+    """
+    Return (value, bytes still held once built, peak bytes while building).
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        value = build()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, current, peak
+
+
+def _timed(fn: Callable[[], Any], repeat: int = 3) -> Tuple[Any, float]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, round(best * 1000, 2)
+
+
+def run(repeat: int) -> Dict[str, Any]:
+    from src.backend import attempt_columns, repository
+    from src.backend.ml import (
+        estimate_question_difficulty,
+        estimate_question_difficulty_from_columns,
+    )
+
+    mib = 1024 * 1024
+    attempts, objects_held, objects_peak = _held_memory(repository.load_attempts)
+    # The repository's store is built on first use, so this measures it.
+    columns, columns_held, columns_peak = _held_memory(repository.get_attempt_columns)
+
+    lookup = repository.load_questions()
+    difficulty_objects, difficulty_objects_ms = _timed(
+        lambda: estimate_question_difficulty(attempts, lookup), repeat
+    )
+    difficulty_columns, difficulty_columns_ms = _timed(
+        lambda: estimate_question_difficulty_from_columns(columns, lookup), repeat
+    )
+    students = repository.get_all_students()
+    student_rows, student_rollups_ms = _timed(
+        lambda: repository.compute_teacher_student_summaries(students), repeat
+    )
+    student_cols, student_columns_ms = _timed(
+        lambda: repository.compute_teacher_student_summaries_from_columns(students), repeat
+    )
+    unit_rows, unit_rollups_ms = _timed(repository.compute_teacher_unit_summaries, repeat)
+    unit_cols, unit_columns_ms = _timed(
+        repository.compute_teacher_unit_summaries_from_columns, repeat
+    )
+
+    return {
+        "attempts": len(attempts),
+        "responses": columns.result_count,
+        "numpy": attempt_columns.np is not None,
+        "memory_mib": {
+            "attempt_objects": round(objects_held / mib, 1),
+            "attempt_objects_peak": round(objects_peak / mib, 1),
+            "columns": round(columns_held / mib, 1),
+            "columns_peak": round(columns_peak / mib, 1),
+            "columns_reported": round(columns.nbytes() / mib, 1),
+            "ratio": round(objects_held / columns_held, 1) if columns_held else None,
+        },
+        "timings_ms": {
+            "estimate_question_difficulty": {
+                "objects": difficulty_objects_ms,
+                "columns": difficulty_columns_ms,
+            },
+            "teacher_student_summaries": {
+                "rollups": student_rollups_ms,
+                "columns": student_columns_ms,
+            },
+            "teacher_unit_summaries": {"rollups": unit_rollups_ms, "columns": unit_columns_ms},
+        },
+        "matches": {
+            "estimate_question_difficulty": difficulty_objects == difficulty_columns,
+            "teacher_student_summaries": student_rows == student_cols,
+            "teacher_unit_summaries": unit_rows == unit_cols,
+        },
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Columnar attempt store vs. Attempt objects.")
+    add_scale_arguments(parser)
+    parser.add_argument("--data-dir", type=Path, default=None, help="reuse generated data")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    scale = scale_from_args(args)
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="bitbybit-columns-"))
+    if args.data_dir is None:
+        # Registered before the backend is imported so it runs after the
+        # backend's own exit hooks.
+        atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+        generate(data_dir, scale, args.seed)
+    os.environ["BITBYBIT_DATA_DIR"] = str(data_dir)
+    os.environ["BITBYBIT_STORAGE_BACKEND"] = "json"
+
+    report = {"size": args.size, "scale": scale.__dict__, **run(args.repeat)}
+    print(json.dumps(report, indent=2))
+    return 0 if all(report["matches"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Micro-benchmarks for the repository and ML hot paths, with regression checks.
+
+Builds (or reuses) a synthetic data directory, points the backend at it and
+times each hot path warm, after one untimed cold call. Results are written
+as JSON and compared against a stored baseline; the run fails when any
+case's median is slower than the baseline by more than ``--threshold``.
+
+    python -m benchmarks.hot_paths --size small
+    python -m benchmarks.hot_paths --size large --output results.json
+    python -m benchmarks.hot_paths --size small --update-baseline
+
+Baselines live in benchmarks/baselines/<size>.json and are machine
+specific; refresh them on the machine that runs the comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .synthetic_data import Scale, add_scale_arguments, generate, scale_from_args
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+# Differences below this many milliseconds are treated as noise.
+NOISE_FLOOR_MS = 0.05
+SAMPLE_STUDENTS = 50
+
+
+def _cases(seed: int) -> List[Tuple[str, Callable[[], Callable[[], Any]], int, int]]:
+    """
+    Return (name, setup, repeat, number) per case. ``setup`` runs once,
+    untimed, and returns the callable that is timed.
+    """
+
+    from src.backend import repository
+    from src.backend.ml import (
+        estimate_question_difficulty,
+        get_difficulty_table,
+        recommend_next_activity,
+        update_student_skill_state,
+    )
+    from src.backend.models import Attempt, AttemptQuestionResult
+    from src.backend.recommender import pick_next_question
+
+    rng = random.Random(seed)
+    students = repository.get_all_students()
+    sample = rng.sample(students, min(SAMPLE_STUDENTS, len(students)))
+    units = repository.load_units()
+    questions = list(repository.load_questions().values())
+
+    def rotating(fn: Callable[[Any], Any], items: List[Any]) -> Callable[[], Any]:
+        position = [0]
+
+        def call():
+            item = items[position[0] % len(items)]
+            position[0] += 1
+            return fn(item)
+
+        return call
+
+    def setup_load_student_attempts():
+        return rotating(repository.load_attempts, [s.student_id for s in sample])
+
+    def setup_load_all_attempts():
+        return repository.load_attempts
+
+    def setup_estimate_difficulty():
+        history = repository.load_attempts()
+        lookup = repository.load_questions()
+        return lambda: estimate_question_difficulty(history, lookup)
+
+    def setup_difficulty_table():
+        return get_difficulty_table
+
+    def setup_update_skill_state():
+        inputs = [(s, repository.load_attempts(s.student_id)) for s in sample]
+        return rotating(
+            lambda item: update_student_skill_state(item[0].student_id, item[1], {}), inputs
+        )
+
+    def setup_recommend():
+        inputs = []
+        for student in sample:
+            attempts = repository.load_attempts(student.student_id)
+            student.skill_mastery = update_student_skill_state(student.student_id, attempts, {})
+            inputs.append((student, attempts))
+        return rotating(lambda item: recommend_next_activity(item[0], item[1], units), inputs)
+
+    def setup_pick_next_question():
+        inputs = [(s, units[i % len(units)].id) for i, s in enumerate(sample)]
+        return rotating(
+            lambda item: pick_next_question(item[0], unit_id=item[1], rng=rng), inputs
+        )
+
+    def setup_teacher_students():
+        return repository.compute_teacher_student_summaries
+
+    def setup_teacher_units():
+        return repository.compute_teacher_unit_summaries
+
+    def setup_append_attempt():
+        counter = [0]
+
+        def append():
+            counter[0] += 1
+            question = questions[counter[0] % len(questions)]
+            repository.append_attempt(
+                Attempt(
+                    id=f"bench-{counter[0]}",
+                    student_id=sample[counter[0] % len(sample)].student_id,
+                    quiz_id="bench",
+                    quiz_type="practice",
+                    unit_id=question.unit_id,
+                    section_id=question.section_id,
+                    score_pct=100.0,
+                    results=[
+                        AttemptQuestionResult(
+                            question_id=question.id,
+                            correct=True,
+                            chosen_answer=question.correct_answer,
+                            time_sec=20.0,
+                        )
+                    ],
+                )
+            )
+
+        return append
+
+    # Writers run last so every read case sees the generated data set.
+    return [
+        ("load_attempts.student", setup_load_student_attempts, 5, 50),
+        ("load_attempts.all", setup_load_all_attempts, 3, 1),
+        ("estimate_question_difficulty", setup_estimate_difficulty, 3, 1),
+        ("difficulty_table.refresh", setup_difficulty_table, 5, 100),
+        ("update_student_skill_state", setup_update_skill_state, 5, 50),
+        ("recommend_next_activity", setup_recommend, 5, 50),
+        ("pick_next_question", setup_pick_next_question, 5, 50),
+        ("compute_teacher_student_summaries", setup_teacher_students, 5, 5),
+        ("compute_teacher_unit_summaries", setup_teacher_units, 5, 5),
+        ("append_attempt", setup_append_attempt, 5, 50),
+    ]
+
+
+def run_cases(seed: int, only: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for name, setup, repeat, number in _cases(seed):
+        if only and name not in only:
+            continue
+        fn = setup()
+        started = time.perf_counter()
+        fn()
+        cold_ms = (time.perf_counter() - started) * 1000
+        per_call: List[float] = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                fn()
+            per_call.append((time.perf_counter() - started) * 1000 / number)
+        results[name] = {
+            "cold_ms": round(cold_ms, 4),
+            "min_ms": round(min(per_call), 4),
+            "median_ms": round(statistics.median(per_call), 4),
+            "calls": repeat * number,
+        }
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], threshold: float
+) -> List[Dict[str, Any]]:
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get("cases", {}).get(name)
+        if not reference:
+            continue
+        limit = reference["median_ms"] * (1.0 + threshold)
+        if current["median_ms"] > limit and (
+            current["median_ms"] - reference["median_ms"] > NOISE_FLOOR_MS
+        ):
+            regressions.append(
+                {
+                    "case": name,
+                    "baseline_ms": reference["median_ms"],
+                    "current_ms": current["median_ms"],
+                    "ratio": round(current["median_ms"] / reference["median_ms"], 2),
+                }
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time repository and ML hot paths.")
+    add_scale_arguments(parser)
+    parser.add_argument("--data-dir", type=Path, default=None, help="reuse generated data")
+    parser.add_argument("--output", type=Path, default=None, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, default=None, help="baseline JSON to compare")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)"
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--case", action="append", dest="cases", help="run only these cases")
+    args = parser.parse_args()
+
+    scale: Scale = scale_from_args(args)
+    owned_dir = args.data_dir is None
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="bitbybit-bench-"))
+    if owned_dir:
+        # Registered before the backend is imported, so it runs after the
+        # backend's own exit hooks (snapshots, buffered writes).
+        atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+        generate(data_dir, scale, args.seed)
+    # The backend reads its configuration at import time.
+    os.environ["BITBYBIT_DATA_DIR"] = str(data_dir)
+    os.environ["BITBYBIT_STORAGE_BACKEND"] = "json"
+    results = run_cases(args.seed, args.cases)
+
+    report: Dict[str, Any] = {
+        "size": args.size,
+        "scale": scale.__dict__,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": results,
+    }
+    baseline_path = args.baseline or BASELINE_DIR / f"{args.size}.json"
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get("scale") != report["scale"]:
+            report["baseline_warning"] = f"{baseline_path} was recorded at a different scale"
+        else:
+            report["threshold"] = args.threshold
+            report["regressions"] = compare(results, baseline, args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    print(text)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
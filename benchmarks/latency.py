@@ -0,0 +1,32 @@
+"""
+Latency summaries shared by the benchmark scripts.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of ``values`` (which need not be sorted).
+    """
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """
+    Request count and p50/p95/p99 in milliseconds for latencies in seconds.
+    """
+
+    if not values:
+        return {"requests": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    return {
+        "requests": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+    }
@@ -0,0 +1,323 @@
+"""
+Replay a traffic script against the API and report latency per route.
+
+A script is NDJSON, one request per line:
+
+    {"user": "s1", "route": "POST /api/attempts", "method": "POST",
+     "path": "/api/attempts", "json": {...}, "think_ms": 0}
+
+Each user's requests run in order; ``--concurrency`` users run at once.
+Without ``--script`` a synthetic school-day mix is generated: a class logs
+in, opens quizzes, submits attempts and polls next-activity while teachers
+refresh the overview. ``--write-script`` saves that mix for later replays.
+
+In-process (default, a temporary copy of the catalog):
+
+    python -m benchmarks.load_replay --students 30 --rounds 5 --concurrency 30
+
+Against a running server (its own data directory):
+
+    python -m benchmarks.load_replay --url http://127.0.0.1:5000 --script traffic.ndjson
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import http.client
+import json
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from urllib.parse import urlsplit
+
+from .latency import summarize
+
+SOURCE_DATA_DIR = Path(__file__).resolve().parents[1] / "src" / "backend" / "data"
+CATALOG_FILES = ("units.json", "questions.json", "quizzes.json", "users.json")
+STUDENT_LOGIN = {"email": "student@example.com", "password": "password123"}
+TEACHER_LOGIN = {"email": "teacher@example.com", "password": "password123"}
+
+Step = Dict[str, Any]
+# (status, seconds) for one request.
+Sender = Callable[[Step], Tuple[int, float]]
+
+
+def synthetic_script(
+    students: int, rounds: int, teachers: int, data_dir: Path = SOURCE_DATA_DIR, seed: int = 1
+) -> List[Step]:
+    """
+    Build a school-day traffic mix from the catalog in ``data_dir``.
+    """
+
+    rng = random.Random(seed)
+    quizzes = [
+        quiz
+        for quiz in json.loads((data_dir / "quizzes.json").read_text())
+        if quiz.get("question_ids")
+    ]
+    questions = {q["id"]: q for q in json.loads((data_dir / "questions.json").read_text())}
+
+    def step(user: str, method: str, path: str, route: str, body=None, think_ms: int = 0) -> Step:
+        entry: Step = {"user": user, "route": route, "method": method, "path": path}
+        if body is not None:
+            entry["json"] = body
+        if think_ms:
+            entry["think_ms"] = think_ms
+        return entry
+
+    script: List[Step] = []
+    for i in range(students):
+        user = f"load-{i + 1}"
+        script.append(step(user, "POST", "/api/auth/login", "POST /api/auth/login", STUDENT_LOGIN))
+        script.append(step(user, "GET", "/api/units", "GET /api/units"))
+        for _ in range(rounds):
+            quiz = rng.choice(quizzes)
+            script.append(
+                step(user, "GET", f"/api/quizzes/{quiz['id']}", "GET /api/quizzes/<id>")
+            )
+            results = [
+                {
+                    "question_id": qid,
+                    "correct": rng.random() < 0.65,
+                    "chosen_answer": (questions.get(qid) or {}).get("correct_answer", ""),
+                    "time_sec": rng.randint(5, 90),
+                    "used_hint": rng.random() < 0.1,
+                }
+                for qid in quiz["question_ids"]
+            ]
+            body = {
+                "student_id": user,
+                "quiz_id": quiz["id"],
+                "quiz_type": quiz["type"],
+                "unit_id": quiz["unit_id"],
+                "section_id": quiz.get("section_id"),
+                "score_pct": 100.0 * sum(r["correct"] for r in results) / len(results),
+                "results": results,
+            }
+            script.append(
+                step(user, "POST", "/api/attempts", "POST /api/attempts", body, think_ms=50)
+            )
+            for _ in range(2):
+                script.append(
+                    step(
+                        user,
+                        "GET",
+                        f"/api/student/{user}/next-activity",
+                        "GET /api/student/<id>/next-activity",
+                    )
+                )
+        script.append(step(user, "GET", f"/api/attempts/{user}", "GET /api/attempts/<id>"))
+    for t in range(teachers):
+        user = f"teacher-{t + 1}"
+        script.append(step(user, "POST", "/api/auth/login", "POST /api/auth/login", TEACHER_LOGIN))
+        for _ in range(max(1, rounds)):
+            script.append(
+                step(user, "GET", "/api/teacher/overview", "GET /api/teacher/overview", think_ms=200)
+            )
+    return script
+
+
+def load_script(path: Path) -> List[Step]:
+    with path.open() as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_script(path: Path, script: Iterable[Step]) -> None:
+    with path.open("w") as f:
+        for entry in script:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+def _in_process_sender() -> Callable[[], Sender]:
+    from src.backend.main import create_app
+
+    app = create_app()
+
+    def make() -> Sender:
+        client = app.test_client()
+
+        def send(entry: Step) -> Tuple[int, float]:
+            started = time.perf_counter()
+            response = client.open(entry["path"], method=entry["method"], json=entry.get("json"))
+            response.get_data()
+            return response.status_code, time.perf_counter() - started
+
+        return send
+
+    return make
+
+
+def _http_sender(url: str) -> Callable[[], Sender]:
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    prefix = parts.path.rstrip("/")
+
+    def make() -> Sender:
+        state = {"conn": http.client.HTTPConnection(host, port, timeout=60)}
+
+        def send(entry: Step) -> Tuple[int, float]:
+            body = entry.get("json")
+            payload = json.dumps(body).encode("utf-8") if body is not None else None
+            headers = {"Content-Type": "application/json"} if payload is not None else {}
+            started = time.perf_counter()
+            try:
+                state["conn"].request(entry["method"], prefix + entry["path"], payload, headers)
+                response = state["conn"].getresponse()
+                response.read()
+            except (ConnectionError, http.client.HTTPException):
+                # The server closed a keep-alive connection; retry once on a new one.
+                state["conn"].close()
+                state["conn"] = http.client.HTTPConnection(host, port, timeout=60)
+                state["conn"].request(entry["method"], prefix + entry["path"], payload, headers)
+                response = state["conn"].getresponse()
+                response.read()
+            return response.status, time.perf_counter() - started
+
+        return send
+
+    return make
+
+
+def replay(script: List[Step], make_sender: Callable[[], Sender], concurrency: int) -> Dict:
+    """
+    Replay ``script`` with ``concurrency`` users in flight and return the
+    throughput and per-route latency report.
+    """
+
+    by_user: Dict[str, List[Step]] = {}
+    for entry in script:
+        by_user.setdefault(str(entry.get("user", "")), []).append(entry)
+    pending: "queue.Queue[List[Step]]" = queue.Queue()
+    for steps in by_user.values():
+        pending.put(steps)
+
+    latencies: Dict[str, List[float]] = {}
+    statuses: Dict[str, Dict[str, int]] = {}
+    lock = threading.Lock()
+
+    def worker() -> None:
+        send = make_sender()
+        local_latencies: Dict[str, List[float]] = {}
+        local_statuses: Dict[str, Dict[str, int]] = {}
+        while True:
+            try:
+                steps = pending.get_nowait()
+            except queue.Empty:
+                break
+            for entry in steps:
+                route = entry.get("route") or f"{entry['method']} {entry['path']}"
+                try:
+                    status, elapsed = send(entry)
+                except Exception:
+                    status, elapsed = 0, 0.0
+                else:
+                    local_latencies.setdefault(route, []).append(elapsed)
+                counts = local_statuses.setdefault(route, {})
+                key = f"{status // 100}xx" if status else "failed"
+                counts[key] = counts.get(key, 0) + 1
+                if entry.get("think_ms"):
+                    time.sleep(entry["think_ms"] / 1000.0)
+        with lock:
+            for route, values in local_latencies.items():
+                latencies.setdefault(route, []).extend(values)
+            for route, counts in local_statuses.items():
+                merged = statuses.setdefault(route, {})
+                for key, value in counts.items():
+                    merged[key] = merged.get(key, 0) + value
+
+    threads = [threading.Thread(target=worker) for _ in range(max(1, concurrency))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "users": len(by_user),
+        "requests": total,
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(total / elapsed, 1) if elapsed else None,
+        "overall": summarize([value for values in latencies.values() for value in values]),
+        "routes": {
+            route: {
+                **summarize(values),
+                "requests_per_second": round(len(values) / elapsed, 1) if elapsed else None,
+                "statuses": statuses.get(route, {}),
+            }
+            for route, values in sorted(latencies.items())
+        },
+        "failed": sum(
+            counts.get("failed", 0) + counts.get("5xx", 0) for counts in statuses.values()
+        ),
+    }
+
+
+def _prepare_data_dir() -> Path:
+    data_dir = Path(tempfile.mkdtemp(prefix="bitbybit-replay-"))
+    for name in CATALOG_FILES:
+        shutil.copy(SOURCE_DATA_DIR / name, data_dir / name)
+    (data_dir / "students.json").write_text("{}")
+    (data_dir / "attempts.json").write_text("[]")
+    return data_dir
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay API traffic and report latency per route.")
+    parser.add_argument("--script", type=Path, default=None, help="NDJSON traffic script")
+    parser.add_argument("--write-script", type=Path, default=None, help="save the synthetic mix")
+    parser.add_argument("--url", default=None, help="replay over HTTP against this base URL")
+    parser.add_argument("--data-dir", type=Path, default=None, help="in-process data directory")
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--teachers", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=5, help="quiz submissions per student")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=None, help="write the report here")
+    args = parser.parse_args()
+
+    script = (
+        load_script(args.script)
+        if args.script
+        else synthetic_script(args.students, args.rounds, args.teachers, seed=args.seed)
+    )
+    if args.write_script:
+        write_script(args.write_script, script)
+
+    if args.url:
+        make_sender = _http_sender(args.url)
+        target = args.url
+    else:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = _prepare_data_dir()
+            # Registered before the backend is imported so it runs after the
+            # backend's own exit hooks.
+            atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+        os.environ["BITBYBIT_DATA_DIR"] = str(data_dir)
+        make_sender = _in_process_sender()
+        target = "in-process"
+
+    report = {
+        "target": target,
+        "concurrency": args.concurrency,
+        **replay(script, make_sender, args.concurrency),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    print(text)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
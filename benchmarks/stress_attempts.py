@@ -0,0 +1,160 @@
+"""
+Concurrency stress test for the repository layer.
+
+Spawns several worker processes that all submit attempts and create students
+against one shared data directory through the Flask app, then checks that no
+attempt or student was lost or duplicated. Exits non-zero on any loss.
+
+    python -m benchmarks.stress_attempts --processes 8 --attempts 100 [--backend sqlite]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+SOURCE_DATA_DIR = Path(__file__).resolve().parents[1] / "src" / "backend" / "data"
+CATALOG_FILES = ("units.json", "questions.json", "quizzes.json", "users.json")
+
+
+def _prepare_data_dir() -> Path:
+    data_dir = Path(tempfile.mkdtemp(prefix="bitbybit-stress-"))
+    for name in CATALOG_FILES:
+        shutil.copy(SOURCE_DATA_DIR / name, data_dir / name)
+    (data_dir / "students.json").write_text("{}")
+    (data_dir / "attempts.json").write_text("[]")
+    return data_dir
+
+
+def _worker(args: Tuple[int, int, int]) -> Tuple[List[str], List[str]]:
+    worker_id, attempts, students_per_worker = args
+    from src.backend import repository
+    from src.backend.main import create_app
+
+    # Small segments so rolls and background compaction race with appends.
+    repository._attempt_log.segment_max_bytes = 4096
+    client = create_app().test_client()
+    questions = list(repository.load_questions().values())
+
+    attempt_ids: List[str] = []
+    created_ids: List[str] = []
+    for i in range(attempts):
+        question = questions[(worker_id + i) % len(questions)]
+        response = client.post(
+            "/api/attempts",
+            json={
+                "student_id": f"stress-{worker_id}-{i % students_per_worker}",
+                "quiz_id": "stress",
+                "quiz_type": "practice",
+                "unit_id": question.unit_id,
+                "section_id": question.section_id,
+                "score_pct": 100.0 if i % 2 else 0.0,
+                "results": [
+                    {
+                        "question_id": question.id,
+                        "correct": bool(i % 2),
+                        "chosen_answer": question.correct_answer,
+                        "time_sec": 10,
+                    }
+                ],
+            },
+        )
+        if response.status_code != 201:
+            raise RuntimeError(f"attempt failed: {response.status_code} {response.data!r}")
+        attempt_ids.append(response.get_json()["id"])
+        if i % 10 == 0:
+            created = client.post("/api/students", json={"name": f"Stress {worker_id}-{i}"})
+            created_ids.append(created.get_json()["student_id"])
+    repository.flush_student_writes()
+    repository._attempt_log.close()
+    return attempt_ids, created_ids
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Multi-process write stress test.")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=100, help="attempts per process")
+    parser.add_argument("--students", type=int, default=3, help="students per process")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--keep", action="store_true", help="keep the data directory")
+    args = parser.parse_args()
+
+    data_dir = _prepare_data_dir()
+    os.environ["BITBYBIT_DATA_DIR"] = str(data_dir)
+    os.environ["BITBYBIT_STORAGE_BACKEND"] = args.backend
+    os.environ["BITBYBIT_SQLITE_PATH"] = str(data_dir / "stress.sqlite3")
+    os.environ["BITBYBIT_WORKERS"] = str(args.processes)
+    if args.backend == "sqlite":
+        from src.backend.import_json import import_json_to_sqlite
+
+        import_json_to_sqlite()
+
+    started = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    jobs = [(worker_id, args.attempts, args.students) for worker_id in range(args.processes)]
+    with ctx.Pool(args.processes) as pool:
+        results = pool.map(_worker, jobs)
+    elapsed = time.perf_counter() - started
+
+    from src.backend import repository
+
+    expected_attempts = [attempt_id for ids, _ in results for attempt_id in ids]
+    created_students = [student_id for _, ids in results for student_id in ids]
+    stored_ids = [attempt.id for attempt in repository.load_attempts()]
+    students = {student.student_id for student in repository.get_all_students()}
+    expected_students = {
+        f"stress-{worker_id}-{i}"
+        for worker_id in range(args.processes)
+        for i in range(min(args.students, args.attempts))
+    }
+
+    failures = []
+    if sorted(stored_ids) != sorted(expected_attempts):
+        missing = set(expected_attempts) - set(stored_ids)
+        failures.append(
+            f"attempts: expected {len(expected_attempts)}, stored {len(stored_ids)}, "
+            f"missing {len(missing)}, duplicated {len(stored_ids) - len(set(stored_ids))}"
+        )
+    for worker_id in range(args.processes):
+        for k in range(min(args.students, args.attempts)):
+            student_id = f"stress-{worker_id}-{k}"
+            expected = len(range(k, args.attempts, args.students))
+            indexed = len(repository.load_attempts(student_id))
+            if indexed != expected:
+                failures.append(f"{student_id}: expected {expected} attempts, indexed {indexed}")
+    if len(set(created_students)) != len(created_students):
+        failures.append("create_student handed out duplicate ids")
+    lost_students = (expected_students | set(created_students)) - students
+    if lost_students:
+        failures.append(f"lost {len(lost_students)} student records")
+
+    total = len(expected_attempts)
+    print(
+        json.dumps(
+            {
+                "backend": args.backend,
+                "processes": args.processes,
+                "attempts": total,
+                "seconds": round(elapsed, 2),
+                "attempts_per_second": round(total / elapsed, 1) if elapsed else None,
+                "data_dir": str(data_dir) if args.keep else None,
+                "failures": failures,
+            },
+            indent=2,
+        )
+    )
+    if not args.keep:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
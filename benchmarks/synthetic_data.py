@@ -0,0 +1,259 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+Writes a complete data directory (units, questions, quizzes, users, students
+and an attempt log) at a chosen scale. The same arguments and seed always
+produce the same files, so timings from different runs are comparable.
+
+    python -m benchmarks.synthetic_data --out /tmp/bitbybit-large --size large
+    python -m benchmarks.synthetic_data --out DIR --students 10000 \
+        --attempts 1000000 --questions 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+SECTIONS_PER_UNIT = 4
+SKILLS_PER_SECTION = 3
+QUESTIONS_PER_QUIZ = 10
+ATTEMPT_CHUNK = 10_000
+LEVEL_DIFFICULTY = {"easy": 0.25, "medium": 0.5, "hard": 0.75}
+# Fixed origin so generated timestamps do not depend on when the data is built.
+EPOCH = 1_700_000_000.0
+
+
+@dataclass(frozen=True)
+class Scale:
+    students: int
+    attempts: int
+    questions: int
+    units: int
+
+
+SIZES: Dict[str, Scale] = {
+    "small": Scale(students=200, attempts=20_000, questions=2_000, units=6),
+    "medium": Scale(students=2_000, attempts=200_000, questions=10_000, units=10),
+    "large": Scale(students=10_000, attempts=1_000_000, questions=50_000, units=20),
+}
+
+
+def _write_json(path: Path, data) -> None:
+    path.write_text(json.dumps(data, separators=(",", ":")))
+
+
+def generate(data_dir: Path, scale: Scale, seed: int = 1) -> Dict[str, int]:
+    """
+    Write a synthetic data set of the given scale into ``data_dir``.
+    """
+
+    from src.backend.attempt_log import AttemptLog
+
+    rng = random.Random(seed)
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    units: List[Dict] = []
+    questions: List[Dict] = []
+    quizzes: List[Dict] = []
+    difficulty_by_question: Dict[str, float] = {}
+    per_section = max(QUESTIONS_PER_QUIZ, scale.questions // (scale.units * SECTIONS_PER_UNIT))
+    levels = tuple(LEVEL_DIFFICULTY)
+
+    for u in range(scale.units):
+        unit_id = f"unit-{u + 1}"
+        unit_questions: List[str] = []
+        sections = []
+        for s in range(SECTIONS_PER_UNIT):
+            section_id = f"{u + 1}.{s + 1}"
+            skills = [f"skill_{u + 1}_{s + 1}_{k + 1}" for k in range(SKILLS_PER_SECTION)]
+            section_questions = []
+            for _ in range(per_section):
+                question_id = f"q{len(questions) + 1}"
+                level = rng.choice(levels)
+                difficulty_by_question[question_id] = LEVEL_DIFFICULTY[level] + rng.uniform(
+                    -0.1, 0.1
+                )
+                questions.append(
+                    {
+                        "id": question_id,
+                        "unit_id": unit_id,
+                        "section_id": section_id,
+                        "text": f"Synthetic question {question_id}",
+                        "type": "mcq",
+                        "options": ["A", "B", "C", "D"],
+                        "correct_answer": "A",
+                        "skill_ids": rng.sample(skills, rng.randint(1, 2)),
+                        "difficulty": level,
+                        "estimated_time_sec": rng.randint(30, 120),
+                    }
+                )
+                section_questions.append(question_id)
+            unit_questions.extend(section_questions)
+            practice_id = f"practice-{section_id}"
+            mini_id = f"mini-{section_id}"
+            for quiz_id, quiz_type in ((practice_id, "practice"), (mini_id, "mini_quiz")):
+                quizzes.append(
+                    {
+                        "id": quiz_id,
+                        "title": f"{quiz_type} {section_id}",
+                        "unit_id": unit_id,
+                        "section_id": section_id,
+                        "type": quiz_type,
+                        "question_ids": rng.sample(section_questions, QUESTIONS_PER_QUIZ),
+                        "passing_score_pct": 70,
+                    }
+                )
+            sections.append(
+                {
+                    "id": section_id,
+                    "title": f"Section {section_id}",
+                    "summary": "Synthetic section",
+                    "practiceQuizId": practice_id,
+                    "miniQuizId": mini_id,
+                }
+            )
+        unit_quizzes = ((f"diag-{unit_id}", "diagnostic"), (f"test-{unit_id}", "unit_test"))
+        for quiz_id, quiz_type in unit_quizzes:
+            quizzes.append(
+                {
+                    "id": quiz_id,
+                    "title": f"{quiz_type} {unit_id}",
+                    "unit_id": unit_id,
+                    "section_id": None,
+                    "type": quiz_type,
+                    "question_ids": rng.sample(unit_questions, QUESTIONS_PER_QUIZ),
+                    "passing_score_pct": 60,
+                }
+            )
+        units.append(
+            {
+                "id": unit_id,
+                "title": f"Unit {u + 1}",
+                "description": "Synthetic unit",
+                "diagnostic_quiz_id": f"diag-{unit_id}",
+                "comprehensive_quiz_id": f"test-{unit_id}",
+                "sections": sections,
+            }
+        )
+
+    students = {}
+    users = []
+    ability: Dict[str, float] = {}
+    for i in range(scale.students):
+        student_id = f"student-{i + 1}"
+        ability[student_id] = rng.uniform(0.2, 0.9)
+        students[student_id] = {
+            "student_id": student_id,
+            "name": f"Student {i + 1:05d}",
+            "email": f"{student_id}@example.edu",
+            "grade_level": "9",
+            "preferred_difficulty": rng.choice(levels),
+            "mastery_by_skill": {},
+            "skill_mastery": {},
+        }
+        users.append(
+            {
+                "id": f"user-{i + 1}",
+                "email": f"{student_id}@example.edu",
+                "password": "password123",
+                "role": "student",
+                "student_id": student_id,
+            }
+        )
+
+    _write_json(data_dir / "units.json", units)
+    _write_json(data_dir / "questions.json", questions)
+    _write_json(data_dir / "quizzes.json", quizzes)
+    _write_json(data_dir / "users.json", users)
+    _write_json(data_dir / "students.json", students)
+    _write_json(data_dir / "attempts.json", [])
+
+    student_ids = list(students)
+    log = AttemptLog(data_dir / "attempts", fsync_every=10**9, compact_after=10**9)
+    chunk: List[Dict] = []
+    for n in range(scale.attempts):
+        student_id = rng.choice(student_ids)
+        quiz = rng.choice(quizzes)
+        results = []
+        for question_id in quiz["question_ids"]:
+            skill_gap = ability[student_id] + 0.5 - difficulty_by_question[question_id]
+            p_correct = min(0.97, max(0.03, skill_gap))
+            correct = rng.random() < p_correct
+            results.append(
+                {
+                    "question_id": question_id,
+                    "correct": correct,
+                    "chosen_answer": "A" if correct else "B",
+                    "time_sec": float(rng.randint(5, 120)),
+                    "used_hint": rng.random() < 0.15,
+                }
+            )
+        chunk.append(
+            {
+                "id": f"attempt-{n + 1}",
+                "student_id": student_id,
+                "quiz_id": quiz["id"],
+                "quiz_type": quiz["type"],
+                "unit_id": quiz["unit_id"],
+                "section_id": quiz["section_id"],
+                "score_pct": 100.0 * sum(r["correct"] for r in results) / len(results),
+                "created_at": EPOCH + n * 30.0,
+                "results": results,
+            }
+        )
+        if len(chunk) >= ATTEMPT_CHUNK:
+            log.append_many(chunk)
+            chunk = []
+    log.append_many(chunk)
+    log.close()
+
+    return {
+        "units": len(units),
+        "questions": len(questions),
+        "quizzes": len(quizzes),
+        "students": len(students),
+        "attempts": scale.attempts,
+    }
+
+
+def scale_from_args(args: argparse.Namespace) -> Scale:
+    base = SIZES[args.size]
+    return Scale(
+        students=args.students or base.students,
+        attempts=args.attempts if args.attempts is not None else base.attempts,
+        questions=args.questions or base.questions,
+        units=args.units or base.units,
+    )
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--students", type=int, default=None)
+    parser.add_argument("--attempts", type=int, default=None)
+    parser.add_argument("--questions", type=int, default=None)
+    parser.add_argument("--units", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic data directory.")
+    parser.add_argument("--out", type=Path, required=True, help="data directory to create")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate(args.out, scale_from_args(args), args.seed)
+    counts["seconds"] = round(time.perf_counter() - started, 2)
+    print(json.dumps(counts, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
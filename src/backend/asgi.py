@@ -0,0 +1,54 @@
+"""
+Async serving mode for the API.
+
+``app`` is an ASGI application exposing the same routes as ``create_app()``.
+The event loop (uvicorn) only parses requests and writes responses; each Flask
+handler, with its file and SQLite I/O, runs on a bounded thread pool (a2wsgi),
+so one slow disk read no longer holds up the other connections. Serve it with
+any ASGI server:
+
+    uvicorn src.backend.asgi:app
+
+or through the wrapper below, which also sizes the pool:
+
+    python -m src.backend.asgi [--host 127.0.0.1] [--port 8000] [--threads 32]
+
+BITBYBIT_ASGI_THREADS sets the default pool size. Buffered student writes are
+flushed by the backend's exit hooks when the server shuts down.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from .main import create_app
+
+ASGI_THREADS = int(os.environ.get("BITBYBIT_ASGI_THREADS", "32"))
+
+
+def create_asgi_app(max_workers: int = ASGI_THREADS) -> WSGIMiddleware:
+    # a2wsgi runs the handler, iterates its (possibly streamed) body and closes
+    # it on one pool thread, so per-thread SQLite connections stay valid.
+    return WSGIMiddleware(create_app(), workers=max_workers)
+
+
+app = create_asgi_app()
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the API in async (ASGI) mode.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--threads", type=int, default=ASGI_THREADS, help="I/O thread pool size")
+    args = parser.parse_args()
+    asgi_app = app if args.threads == ASGI_THREADS else create_asgi_app(args.threads)
+    uvicorn.run(asgi_app, host=args.host, port=args.port, lifespan="off")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+try:  # optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None
+
+from .attempt_log import AttemptTail
+from .attempt_snapshot import NO_STRING, AttemptSnapshot
+
+
+class StringInterner:
+    """
+    Map strings to dense integer ids in order of first appearance.
+    """
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: Optional[str]) -> int:
+        value = value or ""
+        code = self.ids.get(value)
+        if code is None:
+            code = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self.ids)
+            + sys.getsizeof(self.values)
+            + sum(sys.getsizeof(value) for value in self.values)
+        )
+
+
+@dataclass
+class StudentTotals:
+    attempt_count: int = 0
+    questions_answered: int = 0
+    hint_attempts: int = 0
+    mastery_total: float = 0.0
+    mastery_count: int = 0
+    last_activity: Optional[float] = None
+
+
+@dataclass
+class UnitTotals:
+    attempt_count: int = 0
+    hint_attempts: int = 0
+    students: Set[str] = field(default_factory=set)
+    # student_id -> [mastery score total, mastery score count]
+    mastery_by_student: Dict[str, List[float]] = field(default_factory=dict)
+
+
+class AttemptColumns:
+    """
+    Columnar, append-only copy of the attempt history for analytics.
+
+    Ids are interned per kind and stored as integer arrays; per-question
+    results live in parallel arrays (question id, time) plus ``correct`` and
+    ``used_hint`` bitmaps, sliced per attempt by ``result_offsets``. A
+    million responses take a few tens of megabytes instead of a million
+    dataclasses. The aggregate methods run vectorized with NumPy when it is
+    installed and fall back to plain loops over the arrays otherwise.
+
+    ``refresh`` folds in rows appended to the log since the last call.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._cursor: Optional[Dict[str, Any]] = None
+        self.clear()
+
+    def clear(self) -> None:
+        self.students = StringInterner()
+        self.quizzes = StringInterner()
+        self.units = StringInterner()
+        self.quiz_types = StringInterner()
+        self.questions = StringInterner()
+        # Per attempt.
+        self.student = array("i")
+        self.quiz = array("i")
+        self.unit = array("i")
+        self.quiz_type = array("h")
+        self.score_pct = array("d")
+        self.created_at = array("d")
+        self.result_offsets = array("q", [0])
+        # Per question result.
+        self.question = array("i")
+        self.time_sec = array("d")
+        self.correct = bytearray()
+        self.used_hint = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.student)
+
+    @property
+    def result_count(self) -> int:
+        return len(self.question)
+
+    @property
+    def cursor(self) -> Optional[Dict[str, Any]]:
+        """
+        Log position the columns are caught up to.
+        """
+
+        return self._cursor
+
+    def refresh(
+        self, read_since: Callable[[Optional[Dict[str, Any]]], AttemptTail]
+    ) -> "AttemptColumns":
+        with self._lock:
+            tail = read_since(self._cursor)
+            if tail.reset:
+                self.clear()
+            self.extend(tail)
+            self._cursor = tail.cursor
+            return self
+
+    def load_snapshot(self, snapshot: AttemptSnapshot) -> "AttemptColumns":
+        """
+        Replace the contents with a binary attempt snapshot and continue from
+        its cursor. With NumPy the columns are converted straight from the
+        mapped records, without building a dict per attempt.
+        """
+
+        with self._lock:
+            self.clear()
+            if np is None or not len(snapshot):
+                self.extend(snapshot.rows())
+            else:
+                self._load_snapshot_numpy(snapshot)
+            self._cursor = snapshot.cursor
+            return self
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def append(self, row: Dict[str, Any]) -> None:
+        self.student.append(self.students.intern(row.get("student_id")))
+        self.quiz.append(self.quizzes.intern(row.get("quiz_id")))
+        self.unit.append(self.units.intern(row.get("unit_id")))
+        self.quiz_type.append(self.quiz_types.intern(row.get("quiz_type")))
+        self.score_pct.append(float(row.get("score_pct", 0)))
+        self.created_at.append(float(row.get("created_at", time.time())))
+        n = len(self.question)
+        for result in row.get("results") or []:
+            if n % 8 == 0:
+                self.correct.append(0)
+                self.used_hint.append(0)
+            bit = 1 << (n % 8)
+            if result.get("correct", False):
+                self.correct[-1] |= bit
+            if result.get("used_hint", False):
+                self.used_hint[-1] |= bit
+            self.question.append(self.questions.intern(result.get("question_id")))
+            self.time_sec.append(float(result.get("time_sec", 0)))
+            n += 1
+        self.result_offsets.append(n)
+
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the columns and the interned strings.
+        """
+
+        arrays = (
+            self.student, self.quiz, self.unit, self.quiz_type, self.score_pct,
+            self.created_at, self.result_offsets, self.question, self.time_sec,
+        )
+        interners = (self.students, self.quizzes, self.units, self.quiz_types, self.questions)
+        return (
+            sum(column.itemsize * len(column) for column in arrays)
+            + len(self.correct)
+            + len(self.used_hint)
+            + sum(interner.nbytes() for interner in interners)
+        )
+
+    # -- aggregates -----------------------------------------------------
+
+    def question_totals(self) -> Dict[str, List[float]]:
+        """
+        question_id -> [correct, total, time] over every result, matching the
+        sums estimate_question_difficulty builds. Results without a question
+        id are skipped.
+        """
+
+        with self._lock:
+            if np is not None:
+                totals = self._question_totals_numpy()
+            else:
+                totals = self._question_totals_python()
+            return {
+                question_id: entry
+                for question_id, entry in zip(self.questions.values, totals)
+                if question_id and entry[1]
+            }
+
+    def student_totals(self, mastery_types: Iterable[str]) -> Dict[str, StudentTotals]:
+        with self._lock:
+            mastery = self._mastery_flags(mastery_types)
+            if np is not None:
+                return self._student_totals_numpy(mastery)
+            return self._student_totals_python(mastery)
+
+    def unit_totals(self, mastery_types: Iterable[str]) -> Dict[str, UnitTotals]:
+        """
+        Per-unit totals; attempts without a unit id are skipped.
+        """
+
+        with self._lock:
+            mastery = self._mastery_flags(mastery_types)
+            hinted = self._hinted_attempts()
+            students = self.students.values
+            totals = {unit_id: UnitTotals() for unit_id in self.units.values if unit_id}
+            by_code = [totals.get(unit_id) for unit_id in self.units.values]
+            if np is not None:
+                unit = np.frombuffer(self.unit, dtype=np.int32)
+                student = np.frombuffer(self.student, dtype=np.int32)
+                n_units = len(self.units)
+                n_students = max(1, len(self.students))
+                counts = np.bincount(unit, minlength=n_units)
+                hints = np.bincount(unit, weights=hinted, minlength=n_units)
+                for code, entry in enumerate(by_code):
+                    if entry is not None:
+                        entry.attempt_count = int(counts[code])
+                        entry.hint_attempts = int(hints[code])
+                # Distinct (unit, student) pairs, encoded as one integer each.
+                pairs = np.unique(unit.astype(np.int64) * n_students + student)
+                for pair in pairs.tolist():
+                    entry = by_code[pair // n_students]
+                    if entry is not None:
+                        entry.students.add(students[pair % n_students])
+            else:
+                for i, code in enumerate(self.unit):
+                    entry = by_code[code]
+                    if entry is not None:
+                        entry.attempt_count += 1
+                        entry.hint_attempts += int(hinted[i])
+                        entry.students.add(students[self.student[i]])
+            # Mastery attempts are a small share; a plain pass keeps the
+            # per-student sums in the same order as the rollups.
+            if np is not None:
+                mastery_rows = np.flatnonzero(mastery).tolist()
+            else:
+                mastery_rows = [i for i, flag in enumerate(mastery) if flag]
+            for i in mastery_rows:
+                entry = by_code[self.unit[i]]
+                if entry is not None:
+                    pair = entry.mastery_by_student.setdefault(students[self.student[i]], [0.0, 0])
+                    pair[0] += self.score_pct[i]
+                    pair[1] += 1
+            return totals
+
+    # -- kernels --------------------------------------------------------
+
+    def _load_snapshot_numpy(self, snapshot: AttemptSnapshot) -> None:
+        strings = snapshot.strings()
+        empty = next((code for code, value in enumerate(strings) if value == ""), NO_STRING)
+
+        def interned(interner: StringInterner, codes) -> array:
+            # The string table is shared by every field, so its ids are not in
+            # this column's order of first appearance. Interning the unique
+            # values by their first row keeps the order ``append`` produces,
+            # which the aggregates' dict ordering relies on.
+            codes = np.where(codes == NO_STRING, empty, codes)
+            unique, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+            order = np.argsort(first, kind="stable")
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            for code in unique[order].tolist():
+                interner.intern(strings[code] if code != NO_STRING else "")
+            return array("i", rank[inverse].astype(np.int32).tobytes())
+
+        records = snapshot.attempt_records()
+        self.student = interned(self.students, records["student_id"])
+        self.quiz = interned(self.quizzes, records["quiz_id"])
+        self.unit = interned(self.units, records["unit_id"])
+        self.quiz_type = array(
+            "h", np.asarray(interned(self.quiz_types, records["quiz_type"]), np.int16).tobytes()
+        )
+        self.score_pct = array("d", records["score_pct"].astype(np.float64).tobytes())
+        created = records["created_at"].astype(np.float64)
+        created[np.isnan(created)] = time.time()
+        self.created_at = array("d", created.tobytes())
+        offsets = np.concatenate(([0], np.cumsum(records["result_count"], dtype=np.int64)))
+        self.result_offsets = array("q", offsets.tobytes())
+        del records
+
+        results = snapshot.result_arrays()
+        self.question = interned(self.questions, results["question"])
+        self.time_sec = array("d", results["time_sec"].astype(np.float64).tobytes())
+        self.correct = bytearray(np.packbits(results["correct"], bitorder="little").tobytes())
+        self.used_hint = bytearray(np.packbits(results["used_hint"], bitorder="little").tobytes())
+
+    def _bits(self, bitmap: bytearray):
+        return np.unpackbits(np.frombuffer(bytes(bitmap), dtype=np.uint8), bitorder="little")[
+            : self.result_count
+        ]
+
+    def _mastery_flags(self, mastery_types: Iterable[str]):
+        codes = {self.quiz_types.ids[name] for name in mastery_types if name in self.quiz_types.ids}
+        if np is not None:
+            return np.isin(np.frombuffer(self.quiz_type, dtype=np.int16), list(codes))
+        return [code in codes for code in self.quiz_type]
+
+    def _hinted_attempts(self):
+        """
+        Per attempt: 1 when any of its results used a hint.
+        """
+
+        offsets = self.result_offsets
+        if np is not None:
+            hints = self._bits(self.used_hint).astype(np.int64)
+            if not len(self):
+                return np.zeros(0)
+            cumulative = np.concatenate(([0], np.cumsum(hints)))
+            bounds = np.frombuffer(offsets, dtype=np.int64)
+            return (cumulative[bounds[1:]] - cumulative[bounds[:-1]] > 0).astype(np.float64)
+        bits = self.used_hint
+        hinted = []
+        for i in range(len(self)):
+            hinted.append(
+                int(any(bits[n >> 3] >> (n & 7) & 1 for n in range(offsets[i], offsets[i + 1])))
+            )
+        return hinted
+
+    def _question_totals_numpy(self) -> List[List[float]]:
+        size = len(self.questions)
+        question = np.frombuffer(self.question, dtype=np.int32)
+        times = np.maximum(np.frombuffer(self.time_sec, dtype=np.float64), 0.0)
+        total = np.bincount(question, minlength=size)
+        correct = np.bincount(question, weights=self._bits(self.correct), minlength=size)
+        time_total = np.bincount(question, weights=times, minlength=size)
+        return [
+            [c, float(t), s]
+            for c, t, s in zip(correct.tolist(), total.tolist(), time_total.tolist())
+        ]
+
+    def _question_totals_python(self) -> List[List[float]]:
+        totals = [[0.0, 0.0, 0.0] for _ in range(len(self.questions))]
+        bits = self.correct
+        for n, code in enumerate(self.question):
+            entry = totals[code]
+            entry[1] += 1.0
+            if bits[n >> 3] >> (n & 7) & 1:
+                entry[0] += 1.0
+            time_sec = self.time_sec[n]
+            if time_sec:
+                entry[2] += max(0.0, time_sec)
+        return totals
+
+    def _student_totals_numpy(self, mastery) -> Dict[str, StudentTotals]:
+        size = len(self.students)
+        student = np.frombuffer(self.student, dtype=np.int32)
+        offsets = np.frombuffer(self.result_offsets, dtype=np.int64)
+        scores = np.frombuffer(self.score_pct, dtype=np.float64)
+        created = np.frombuffer(self.created_at, dtype=np.float64)
+        attempts = np.bincount(student, minlength=size)
+        answered = np.bincount(student, weights=np.diff(offsets), minlength=size)
+        hints = np.bincount(student, weights=self._hinted_attempts(), minlength=size)
+        mastery_scores = np.where(mastery, scores, 0.0)
+        mastery_total = np.bincount(student, weights=mastery_scores, minlength=size)
+        mastery_count = np.bincount(student, weights=mastery, minlength=size)
+        last = np.full(size, -np.inf)
+        np.maximum.at(last, student, created)
+        return {
+            student_id: StudentTotals(
+                attempt_count=int(attempts[code]),
+                questions_answered=int(answered[code]),
+                hint_attempts=int(hints[code]),
+                mastery_total=float(mastery_total[code]),
+                mastery_count=int(mastery_count[code]),
+                last_activity=float(last[code]) if attempts[code] else None,
+            )
+            for code, student_id in enumerate(self.students.values)
+        }
+
+    def _student_totals_python(self, mastery) -> Dict[str, StudentTotals]:
+        entries = [StudentTotals() for _ in range(len(self.students))]
+        hinted = self._hinted_attempts()
+        offsets = self.result_offsets
+        for i, code in enumerate(self.student):
+            entry = entries[code]
+            entry.attempt_count += 1
+            entry.questions_answered += offsets[i + 1] - offsets[i]
+            entry.hint_attempts += hinted[i]
+            created_at = self.created_at[i]
+            if entry.last_activity is None or created_at > entry.last_activity:
+                entry.last_activity = created_at
+            if mastery[i]:
+                entry.mastery_total += self.score_pct[i]
+                entry.mastery_count += 1
+        return dict(zip(self.students.values, entries))
@@ -0,0 +1,662 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .fsutil import atomic_write_text, file_lock
+from .metrics import record_read, record_write
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+# Records every compaction: target segment -> its inode and size, plus the
+# number, inode, size, start offset in the target and dropped byte ranges of
+# every merged segment, so cursors into them are carried over, not reset.
+COMPACTIONS_NAME = "compactions.json"
+
+
+def _segment_name(number: int) -> str:
+    return f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}"
+
+
+def _segment_number(path: Path) -> Optional[int]:
+    name = path.name
+    if not (name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)):
+        return None
+    try:
+        return int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+    except ValueError:
+        return None
+
+
+class _StudentIndex:
+    """
+    student_id -> flat ``array`` of (segment, offset, length) triples, plus the
+    (inode, byte offset) each segment has been indexed up to.
+    """
+
+    def __init__(self) -> None:
+        self.locations: Dict[str, array] = {}
+        self.indexed: Dict[int, Tuple[int, int]] = {}
+
+    def add(self, student_id: str, segment: int, offset: int, length: int) -> None:
+        entries = self.locations.get(student_id)
+        if entries is None:
+            entries = self.locations[student_id] = array("q")
+        entries.extend((segment, offset, length))
+
+    def drop(self, segments: Set[int]) -> None:
+        """
+        Forget ``segments`` (e.g. replaced by compaction) and keep the rest.
+        Entries re-added for a replaced segment land out of order, so every
+        student's locations are re-sorted by (segment, offset).
+        """
+
+        for number in segments:
+            self.indexed.pop(number, None)
+        for student_id, entries in list(self.locations.items()):
+            kept = sorted(
+                triple
+                for triple in zip(entries[0::3], entries[1::3], entries[2::3])
+                if triple[0] not in segments
+            )
+            if kept:
+                self.locations[student_id] = array("q", [v for triple in kept for v in triple])
+            else:
+                del self.locations[student_id]
+
+    def sort(self) -> None:
+        for student_id, entries in self.locations.items():
+            triples = sorted(zip(entries[0::3], entries[1::3], entries[2::3]))
+            self.locations[student_id] = array("q", [v for triple in triples for v in triple])
+
+
+class AttemptTail:
+    """
+    Rows appended after a cursor. ``reset`` is True when the cursor was missing
+    or no longer valid (e.g. the log was replaced) and the rows start from the
+    beginning of the log. ``cursor`` points past the last row once iteration
+    has finished and can be passed to the next read.
+    """
+
+    def __init__(self, reset: bool, cursor: Dict[str, Any]) -> None:
+        self.reset = reset
+        self.cursor = cursor
+        self.rows: Iterator[Dict[str, Any]] = iter(())
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.rows
+
+
+class AttemptLog:
+    """
+    Append-only JSON Lines log of attempt dicts, split into numbered segments.
+
+    Appends write a single line to the newest segment, so their cost does not
+    grow with history. ``fsync`` is batched: it runs after ``fsync_every``
+    appends or ``fsync_interval`` seconds, whichever comes first (a timer
+    covers an idle log), and at exit. Once ``compact_after`` sealed segments
+    have piled up since the last compaction they are merged into one in a
+    background thread; segments that were already compacted are never
+    rewritten, so compaction cost does not grow with history and cursors and
+    index entries into them stay valid.
+
+    A per-student index of byte locations is built on the first per-student
+    read, kept current by ``append_many`` and caught up from the segment tails
+    when another writer has appended in the meantime.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        legacy_path: Optional[Path] = None,
+        segment_max_bytes: int = 8 * 1024 * 1024,
+        fsync_every: int = 32,
+        fsync_interval: float = 1.0,
+        compact_after: int = 4,
+    ) -> None:
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+
+        # The thread lock guards in-memory state; the file locks coordinate
+        # appends, rolls and compaction with other processes.
+        self._lock = threading.RLock()
+        self._append_lock_path = directory / ".append.lock"
+        self._compact_lock_path = directory / ".compact.lock"
+        self._handle = None
+        self._active_number: Optional[int] = None
+        self._pending_sync = 0
+        self._last_sync = time.monotonic()
+        self._sync_timer: Optional[threading.Timer] = None
+        self._ready = False
+        self._compactor: Optional[threading.Thread] = None
+        self._index: Optional[_StudentIndex] = None
+        atexit.register(self.close)
+
+    # -- public API -----------------------------------------------------
+
+    def append(self, row: Dict[str, Any]) -> None:
+        self.append_many([row])
+
+    def append_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        rows = list(rows)
+        lines = [json.dumps(row, separators=(",", ":")).encode("utf-8") for row in rows]
+        if not lines:
+            return
+        data = b"\n".join(lines) + b"\n"
+        with self._locked():
+            self._ensure_ready()
+            handle = self._active_handle()
+            start = os.fstat(handle.fileno()).st_size
+            handle.write(data)
+            handle.flush()
+            record_write("attempts", len(data))
+            self._index_appended(handle, start, rows, lines)
+            self._pending_sync += len(lines)
+            self._maybe_sync()
+            if handle.tell() >= self.segment_max_bytes:
+                self._roll()
+
+    def append_absent(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Append the rows whose id is not logged for their student yet and
+        return them. The check and the append happen under the append lock,
+        so concurrent retries of one batch store it once.
+        """
+
+        fresh: List[Dict[str, Any]] = []
+        with self._locked():
+            logged: Dict[str, Set[str]] = {}
+            for row in rows:
+                student_id = row.get("student_id")
+                ids = logged.get(student_id)
+                if ids is None:
+                    ids = logged[student_id] = {
+                        existing.get("id") for existing in self.rows_for_student(student_id)
+                    }
+                if row.get("id") in ids:
+                    continue
+                ids.add(row.get("id"))
+                fresh.append(row)
+            self.append_many(fresh)
+        return fresh
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every logged attempt dict in append order.
+        """
+
+        for handle in self._open_segments():
+            with handle:
+                for line in handle:
+                    row = _parse_line(line)
+                    if row is not None:
+                        yield row
+                record_read("attempts", handle.tell())
+
+    def rows_for_student(self, student_id: str) -> List[Dict[str, Any]]:
+        """
+        Return one student's logged attempts in append order, reading only the
+        byte ranges recorded in the per-student index.
+        """
+
+        with self._locked():
+            self._ensure_ready()
+            if self._handle is not None:
+                self._handle.flush()
+            index = self._refresh_index()
+            locations = index.locations.get(student_id)
+            if not locations:
+                return []
+            locations = array("q", locations)
+            handles = {}
+            for segment in set(locations[0::3]):
+                try:
+                    handles[segment] = (self.directory / _segment_name(segment)).open("rb")
+                except FileNotFoundError:
+                    continue
+
+        record_read("attempts", sum(locations[2::3]), reads=len(handles))
+        rows: List[Dict[str, Any]] = []
+        try:
+            for i in range(0, len(locations), 3):
+                handle = handles.get(locations[i])
+                if handle is None:
+                    continue
+                handle.seek(locations[i + 1])
+                row = _parse_line(handle.read(locations[i + 2]))
+                if row is not None:
+                    rows.append(row)
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return rows
+
+    def read_since(self, cursor: Optional[Dict[str, Any]]) -> AttemptTail:
+        """
+        Return the rows appended after ``cursor`` (a value previously taken from
+        ``AttemptTail.cursor``), or every row when it is None or stale.
+        """
+
+        with self._locked():
+            self._ensure_ready()
+            if self._handle is not None:
+                self._handle.flush()
+            current: List[Tuple[int, Any, int]] = []
+            for path in self._segments():
+                try:
+                    handle = path.open("rb")
+                except FileNotFoundError:
+                    continue
+                ino = os.fstat(handle.fileno()).st_ino
+                current.append((_segment_number(path) or 0, handle, ino))
+            inodes = {str(number): ino for number, _, ino in current}
+
+            seen: Optional[Dict[str, Any]] = None
+            if cursor is not None and "segments" in cursor:
+                seen = cursor["segments"] or {}
+                if any(inodes.get(key) != ino for key, (ino, _) in seen.items()):
+                    seen = _carry_over(seen, inodes, self._read_compactions())
+
+        reset = seen is None
+        if reset:
+            seen = {}
+        tail = AttemptTail(reset, {"segments": dict(seen)})
+        tail.rows = self._tail_rows(tail, current, seen)
+        return tail
+
+    def _tail_rows(
+        self,
+        tail: AttemptTail,
+        current: List[Tuple[int, Any, int]],
+        seen: Dict[str, Any],
+    ) -> Iterator[Dict[str, Any]]:
+        try:
+            for number, handle, ino in current:
+                _, offset = seen.get(str(number), (ino, 0))
+                start = offset
+                handle.seek(offset)
+                for line in handle:
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    row = _parse_line(line)
+                    if row is not None:
+                        yield row
+                record_read("attempts", offset - start)
+                tail.cursor["segments"][str(number)] = [ino, offset]
+        finally:
+            for _, handle, _ in current:
+                handle.close()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+            self._pending_sync = 0
+            self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            if self._handle is None:
+                return
+            self.flush()
+            self._handle.close()
+            self._handle = None
+
+    def compact(self) -> int:
+        """
+        Merge the sealed segments written since the last compaction into one,
+        dropping torn lines and duplicate attempt ids among them. Returns the
+        number of segments removed.
+        """
+
+        with file_lock(self._compact_lock_path):
+            return self._compact()
+
+    def _compact(self) -> int:
+        with self._locked():
+            self._ensure_ready()
+            run = self._uncompacted_sealed(self._read_compactions())
+        if len(run) < 2:
+            return 0
+
+        # Sealed segments no longer change, so they are read without the lock.
+        seen_ids = set()
+        sources = []
+        target_number, target = run[0]
+        tmp_path = target.with_suffix(".compact")
+        with tmp_path.open("wb") as out:
+            for number, path in run:
+                # [number, inode, size, start in the target, dropped (offset, length)]
+                drops: List[List[int]] = []
+                source = [number, os.stat(path).st_ino, 0, out.tell(), drops]
+                sources.append(source)
+                with path.open("rb") as handle:
+                    for line in handle:
+                        offset = source[2]
+                        source[2] += len(line)
+                        row = _parse_line(line) if line.endswith(b"\n") else None
+                        attempt_id = row.get("id") if row is not None else None
+                        if row is None or (attempt_id and attempt_id in seen_ids):
+                            drops.append([offset, len(line)])
+                            continue
+                        if attempt_id:
+                            seen_ids.add(attempt_id)
+                        # Copied verbatim so cursor offsets map onto the target.
+                        out.write(line)
+            out.flush()
+            os.fsync(out.fileno())
+            stat = os.fstat(out.fileno())
+
+        with self._locked():
+            compactions = {
+                key: entry
+                for key, entry in self._read_compactions().items()
+                if _segment_inode(self.directory / _segment_name(int(key))) == entry["ino"]
+            }
+            compactions[str(target_number)] = {
+                "ino": stat.st_ino,
+                "size": stat.st_size,
+                "sources": sources,
+            }
+            # Recorded first: until the rename the entry matches no segment.
+            atomic_write_text(self.directory / COMPACTIONS_NAME, json.dumps(compactions))
+            os.replace(tmp_path, target)
+            for _, path in run[1:]:
+                path.unlink(missing_ok=True)
+        return len(run) - 1
+
+    def compact_async(self) -> threading.Thread:
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return self._compactor
+            self._compactor = threading.Thread(
+                target=self.compact, name="attempt-log-compactor", daemon=True
+            )
+            self._compactor.start()
+            return self._compactor
+
+    # -- internals ------------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with file_lock(self._append_lock_path):
+                yield
+
+    def _ensure_ready(self) -> None:
+        if self._ready:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not self._segments() and self.legacy_path is not None:
+            migrate_legacy_attempts(self.legacy_path, self.directory / _segment_name(1))
+        self._ready = True
+
+    def _segments(self) -> List[Path]:
+        numbered = []
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+            number = _segment_number(path)
+            if number is not None:
+                numbered.append((number, path))
+        numbered.sort()
+        return [path for _, path in numbered]
+
+    def _open_segments(self) -> List[Any]:
+        # Open every segment under the lock so a concurrent compaction cannot
+        # unlink a file between listing and reading it.
+        with self._locked():
+            self._ensure_ready()
+            if self._handle is not None:
+                self._handle.flush()
+            handles = []
+            for path in self._segments():
+                try:
+                    handles.append(path.open("rb"))
+                except FileNotFoundError:
+                    continue
+            return handles
+
+    def _active_handle(self):
+        segments = self._segments()
+        number = (_segment_number(segments[-1]) or 1) if segments else 1
+        if self._handle is not None:
+            if number == self._active_number:
+                return self._handle
+            # Another process rolled to a newer segment.
+            self.close()
+        path = self.directory / _segment_name(number)
+        handle = path.open("ab")
+        if handle.tell() > 0 and not _ends_with_newline(path):
+            # A previous crash left a torn line; start on a fresh one.
+            handle.write(b"\n")
+        self._handle = handle
+        self._active_number = number
+        return handle
+
+    def _index_appended(
+        self, handle, start: int, rows: List[Dict[str, Any]], lines: List[bytes]
+    ) -> None:
+        index = self._index
+        if index is None:
+            return
+        ino = os.fstat(handle.fileno()).st_ino
+        if index.indexed.get(self._active_number or 0) != (ino, start):
+            # Something else wrote to the segment; the next read catches up.
+            return
+        offset = start
+        for row, line in zip(rows, lines):
+            student_id = row.get("student_id")
+            if student_id:
+                index.add(student_id, self._active_number or 0, offset, len(line))
+            offset += len(line) + 1
+        index.indexed[self._active_number or 0] = (ino, offset)
+
+    def _refresh_index(self) -> _StudentIndex:
+        current: Dict[int, Tuple[Path, int, int]] = {}
+        for path in self._segments():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            current[_segment_number(path) or 0] = (path, stat.st_ino, stat.st_size)
+
+        index = self._index
+        if index is None:
+            index = self._index = _StudentIndex()
+        stale = {
+            number
+            for number, (ino, offset) in index.indexed.items()
+            if number not in current or current[number][1] != ino or current[number][2] < offset
+        }
+        if stale:
+            # Compaction replaced these; entries for every other segment stay.
+            index.drop(stale)
+
+        reindexed = False
+        for number, (path, ino, size) in sorted(current.items()):
+            _, start = index.indexed.get(number, (ino, 0))
+            if size > start or number not in index.indexed:
+                reindexed = reindexed or (number in stale)
+                index.indexed[number] = (ino, _index_segment(index, number, path, start))
+        if reindexed:
+            index.sort()
+        return index
+
+    def _maybe_sync(self) -> None:
+        elapsed = time.monotonic() - self._last_sync
+        if self._pending_sync >= self.fsync_every or elapsed >= self.fsync_interval:
+            self.flush()
+        elif self._sync_timer is None:
+            # Honour fsync_interval even if no further append comes along.
+            self._sync_timer = threading.Timer(self.fsync_interval - elapsed, self._sync_idle)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+
+    def _sync_idle(self) -> None:
+        with self._lock:
+            self._sync_timer = None
+            if self._pending_sync and self._handle is not None:
+                self.flush()
+
+    def _read_compactions(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            compactions = json.loads((self.directory / COMPACTIONS_NAME).read_text())
+        except (OSError, ValueError):
+            return {}
+        return compactions if isinstance(compactions, dict) else {}
+
+    def _uncompacted_sealed(self, compactions: Dict[str, Dict[str, Any]]) -> List[Tuple[int, Path]]:
+        """
+        The newest run of sealed segments that are not compaction outputs.
+        """
+
+        run: List[Tuple[int, Path]] = []
+        for path in reversed(self._segments()[:-1]):
+            number = _segment_number(path) or 0
+            entry = compactions.get(str(number))
+            if entry is not None and _segment_inode(path) == entry.get("ino"):
+                break
+            run.append((number, path))
+        run.reverse()
+        return run
+
+    def _roll(self) -> None:
+        self.close()
+        segments = self._segments()
+        newest = (_segment_number(segments[-1]) or 0) if segments else 0
+        number = max(newest, self._active_number or 0) + 1
+        (self.directory / _segment_name(number)).touch()
+        self._active_number = number
+        if len(self._uncompacted_sealed(self._read_compactions())) >= self.compact_after:
+            self.compact_async()
+
+
+def _parse_line(line: bytes) -> Optional[Dict[str, Any]]:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return None
+    return row if isinstance(row, dict) else None
+
+
+def _index_segment(index: _StudentIndex, number: int, path: Path, start: int) -> int:
+    """
+    Index complete lines of ``path`` from byte ``start`` and return the offset
+    just past the last complete line.
+    """
+
+    offset = start
+    with path.open("rb") as handle:
+        handle.seek(start)
+        for line in handle:
+            if not line.endswith(b"\n"):
+                break
+            row = _parse_line(line)
+            student_id = row.get("student_id") if row else None
+            if student_id:
+                index.add(student_id, number, offset, len(line) - 1)
+            offset += len(line)
+    record_read("attempts.index", offset - start)
+    return offset
+
+
+def _segment_inode(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_ino
+    except FileNotFoundError:
+        return None
+
+
+def _carry_over(
+    seen: Dict[str, Any],
+    inodes: Dict[str, int],
+    compactions: Dict[str, Dict[str, Any]],
+) -> Optional[Dict[str, Any]]:
+    """
+    Translate cursor positions in segments that compaction merged away into
+    positions in the merged segment. Returns None when a segment the cursor
+    read is gone and no compaction accounts for it, so the reader has to start
+    from the beginning.
+    """
+
+    merged: Dict[Tuple[str, int], Tuple[str, List[Any]]] = {}
+    for target, entry in compactions.items():
+        if inodes.get(target) == entry.get("ino"):
+            for source in entry["sources"]:
+                merged[(str(source[0]), source[1])] = (target, source)
+
+    carried: Dict[str, Any] = {}
+    for key, (ino, offset) in seen.items():
+        if inodes.get(key) == ino:
+            carried[key] = [ino, offset]
+            continue
+        if (key, ino) not in merged:
+            return None
+        target, (_, _, _, start, drops) = merged[(key, ino)]
+        # Lines are copied verbatim, so only dropped lines before the cursor
+        # shift its position. Segments are read in order: the furthest source
+        # read decides the position in the target.
+        position = start + offset - sum(length for at, length in drops if at < offset)
+        previous = carried.get(target)
+        if previous is None or previous[1] < position:
+            carried[target] = [compactions[target]["ino"], position]
+    return carried
+
+
+def _ends_with_newline(path: Path) -> bool:
+    with path.open("rb") as handle:
+        handle.seek(-1, os.SEEK_END)
+        return handle.read(1) == b"\n"
+
+
+def migrate_legacy_attempts(legacy_path: Path, segment_path: Path) -> int:
+    """
+    One-time conversion of attempts.json (either a flat list or a dict keyed by
+    student id) into the first log segment. The legacy file is left in place.
+    """
+
+    if not legacy_path.exists():
+        return 0
+    try:
+        with legacy_path.open() as f:
+            raw = json.load(f)
+    except json.JSONDecodeError:
+        return 0
+
+    rows: List[Dict[str, Any]] = []
+    if isinstance(raw, dict):
+        for student_id, attempts in raw.items():
+            for item in attempts or []:
+                if isinstance(item, dict):
+                    rows.append({**item, "student_id": item.get("student_id") or student_id})
+    elif isinstance(raw, list):
+        rows = [item for item in raw if isinstance(item, dict)]
+
+    tmp_path = segment_path.with_suffix(".migrating")
+    with tmp_path.open("wb") as out:
+        for row in rows:
+            out.write(json.dumps(row, separators=(",", ":")).encode("utf-8"))
+            out.write(b"\n")
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_path, segment_path)
+    return len(rows)
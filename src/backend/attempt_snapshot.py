@@ -0,0 +1,432 @@
+"""
+Memory-mapped binary snapshot of the attempt history.
+
+The snapshot directory holds one generation of four append-only files plus a
+JSON manifest:
+
+- ``g<N>.attempts``: one fixed-width record per attempt (``ATTEMPT_RECORD``)
+- ``g<N>.results``: one fixed-width record per question result
+  (``RESULT_RECORD``), attempts own a contiguous run of them
+- ``g<N>.strings`` / ``g<N>.offsets``: the string table, UTF-8 bytes and the
+  end offset of every string; ids, question ids and answers are indexes into it
+- ``manifest.json``: record counts, the generation and the storage cursor the
+  snapshot is current to
+
+Readers ``mmap`` the files and only look at the records the manifest counts,
+so several worker processes share the same pages and a half-finished update
+is never visible. ``AttemptSnapshotWriter.update`` appends the rows logged
+since the manifest cursor and commits a new manifest; when the cursor is no
+longer valid (e.g. the log was rewritten) it writes a fresh generation.
+
+Build or bring the snapshot up to date from the repository root with:
+
+    python -m src.backend.attempt_snapshot
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:  # optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None
+
+from .attempt_log import AttemptTail
+from .fsutil import atomic_write_text, file_lock
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+# score_pct, created_at, then string ids: id, student, quiz, unit, section,
+# quiz_type; then the first result index and the result count.
+ATTEMPT_RECORD = struct.Struct("<ddIIIIIIQI4x")
+# time_sec, question id, chosen answer, flags (bit 0 correct, bit 1 used_hint).
+RESULT_RECORD = struct.Struct("<dIIB3x")
+NO_STRING = 0xFFFFFFFF
+CORRECT_FLAG = 1
+HINT_FLAG = 2
+_STRING_FIELDS = ("id", "student_id", "quiz_id", "unit_id", "section_id", "quiz_type")
+
+ReadSince = Callable[[Optional[Dict[str, Any]]], AttemptTail]
+
+
+def _file_names(generation: int) -> Dict[str, str]:
+    kinds = ("attempts", "results", "strings", "offsets")
+    return {kind: f"g{generation:06d}.{kind}" for kind in kinds}
+
+
+def read_manifest(directory: Path) -> Optional[Dict[str, Any]]:
+    try:
+        manifest = json.loads((directory / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("format") != SNAPSHOT_FORMAT:
+        return None
+    return manifest
+
+
+def _map(path: Path, length: int):
+    if length <= 0:
+        return b""
+    with path.open("rb") as handle:
+        return mmap.mmap(handle.fileno(), length, access=mmap.ACCESS_READ)
+
+
+class AttemptSnapshot:
+    """
+    Read-only view of one committed snapshot.
+    """
+
+    def __init__(self, directory: Path, manifest: Dict[str, Any]) -> None:
+        self.directory = directory
+        self.manifest = manifest
+        self.backend: Optional[str] = manifest.get("backend")
+        self.cursor: Optional[Dict[str, Any]] = manifest.get("cursor")
+        self.attempt_count = int(manifest["attempts"])
+        self.result_count = int(manifest["results"])
+        self.string_count = int(manifest["strings"])
+        names = _file_names(int(manifest["generation"]))
+        self._attempts = _map(
+            directory / names["attempts"], self.attempt_count * ATTEMPT_RECORD.size
+        )
+        self._results = _map(directory / names["results"], self.result_count * RESULT_RECORD.size)
+        self._strings = _map(directory / names["strings"], int(manifest["string_bytes"]))
+        self._offsets = _map(directory / names["offsets"], self.string_count * 8)
+        self._decoded: Optional[List[str]] = None
+
+    @classmethod
+    def open(cls, directory: Path) -> Optional["AttemptSnapshot"]:
+        """
+        Open the committed snapshot in ``directory``, or return None when
+        there is none or it cannot be read.
+        """
+
+        manifest = read_manifest(directory)
+        if manifest is None:
+            return None
+        try:
+            return cls(directory, manifest)
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def __len__(self) -> int:
+        return self.attempt_count
+
+    def close(self) -> None:
+        for view in (self._attempts, self._results, self._strings, self._offsets):
+            if isinstance(view, mmap.mmap):
+                view.close()
+
+    def strings(self) -> List[str]:
+        """
+        Decode the whole string table once; rows() indexes into it.
+        """
+
+        if self._decoded is None:
+            self._decoded = self.strings_from(0)
+        return self._decoded
+
+    def strings_from(self, first: int) -> List[str]:
+        """
+        Decode the strings with ids ``first`` and up, leaving the rest of the
+        table untouched.
+        """
+
+        if first >= self.string_count:
+            return []
+        ends = array("Q")
+        ends.frombytes(bytes(self._offsets[first * 8 :]))
+        start = struct.unpack_from("<Q", self._offsets, (first - 1) * 8)[0] if first else 0
+        blob = bytes(self._strings[start:])
+        decoded = []
+        for end in ends:
+            decoded.append(blob[: end - start].decode("utf-8"))
+            blob = blob[end - start :]
+            start = end
+        return decoded
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every attempt as the same dict shape the attempt log stores.
+        """
+
+        if not self.attempt_count:
+            return
+        strings = self.strings()
+        size = RESULT_RECORD.size
+        for record in ATTEMPT_RECORD.iter_unpack(self._attempts):
+            score_pct, created_at = record[0], record[1]
+            row: Dict[str, Any] = {}
+            for key, code in zip(_STRING_FIELDS, record[2:8]):
+                if code != NO_STRING:
+                    row[key] = strings[code]
+            row.setdefault("section_id", None)
+            row["score_pct"] = score_pct
+            if created_at == created_at:  # NaN marks a missing timestamp
+                row["created_at"] = created_at
+            first, count = record[8], record[9]
+            row["results"] = [
+                {
+                    "question_id": strings[question] if question != NO_STRING else "",
+                    "correct": bool(flags & CORRECT_FLAG),
+                    "chosen_answer": strings[answer] if answer != NO_STRING else "",
+                    "time_sec": time_sec,
+                    "used_hint": bool(flags & HINT_FLAG),
+                }
+                for time_sec, question, answer, flags in RESULT_RECORD.iter_unpack(
+                    self._results[first * size : (first + count) * size]
+                )
+            ]
+            yield row
+
+    def attempt_records(self):
+        """
+        Zero-copy NumPy structured view of the attempt records, with fields
+        ``score_pct``, ``created_at``, ``id``, ``student_id``, ``quiz_id``,
+        ``unit_id``, ``section_id``, ``quiz_type``, ``first_result`` and
+        ``result_count``. Needs NumPy.
+        """
+
+        if np is None:
+            raise RuntimeError("attempt_records() needs numpy")
+        dtype = np.dtype(
+            {
+                "names": [
+                    "score_pct", "created_at", *_STRING_FIELDS, "first_result", "result_count"
+                ],
+                "formats": ["<f8", "<f8"] + ["<u4"] * len(_STRING_FIELDS) + ["<u8", "<u4"],
+                "offsets": [0, 8, 16, 20, 24, 28, 32, 36, 40, 48],
+                "itemsize": ATTEMPT_RECORD.size,
+            }
+        )
+        return np.frombuffer(self._attempts, dtype=dtype, count=self.attempt_count)
+
+    def result_arrays(self) -> Dict[str, Any]:
+        """
+        NumPy arrays over the result records: ``question`` (string ids) and
+        ``time_sec`` are zero-copy views of the mapping, ``correct`` and
+        ``used_hint`` are decoded from the flags. Drop the views before
+        calling ``close``.
+        """
+
+        if np is None:
+            raise RuntimeError("result_arrays() needs numpy")
+        dtype = np.dtype(
+            {
+                "names": ["time_sec", "question", "answer", "flags"],
+                "formats": ["<f8", "<u4", "<u4", "u1"],
+                "offsets": [0, 8, 12, 16],
+                "itemsize": RESULT_RECORD.size,
+            }
+        )
+        records = np.frombuffer(self._results, dtype=dtype, count=self.result_count)
+        return {
+            "question": records["question"],
+            "time_sec": records["time_sec"],
+            "correct": (records["flags"] & CORRECT_FLAG).astype(bool),
+            "used_hint": (records["flags"] & HINT_FLAG).astype(bool),
+        }
+
+
+class AttemptSnapshotWriter:
+    """
+    Keep the snapshot in ``directory`` current with a storage backend's
+    attempt rows.
+
+    The string-to-id lookup is kept between updates and only extended with
+    the strings other writers committed since, so a long-lived writer does
+    not decode the whole string table on every refresh.
+    """
+
+    def __init__(self, directory: Path, backend: str) -> None:
+        self.directory = directory
+        self.backend = backend
+        self._lock_path = directory / ".lock"
+        self._string_ids: Dict[str, int] = {}
+        self._string_generation: Optional[int] = None
+
+    def update(self, read_since: ReadSince) -> int:
+        """
+        Append the rows logged since the last update and return how many
+        attempts were added.
+        """
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with file_lock(self._lock_path):
+            manifest = read_manifest(self.directory)
+            if manifest is not None and manifest.get("backend") != self.backend:
+                manifest = None
+            tail = read_since(manifest["cursor"] if manifest else None)
+            if manifest is None or tail.reset:
+                generation = int(manifest["generation"]) + 1 if manifest else 1
+                manifest = {
+                    "format": SNAPSHOT_FORMAT,
+                    "backend": self.backend,
+                    "generation": generation,
+                    "attempts": 0,
+                    "results": 0,
+                    "strings": 0,
+                    "string_bytes": 0,
+                    "cursor": None,
+                }
+                self._string_ids = {}
+                self._string_generation = int(manifest["generation"])
+                rows: Iterator[Dict[str, Any]] = iter(tail)
+            else:
+                rows = iter(tail)
+                first = next(rows, None)
+                if first is not None:
+                    # Only rows with new strings need the lookup.
+                    self._catch_up_strings(manifest)
+                    rows = itertools.chain([first], rows)
+            # ``_append`` extends the lookup in place; it only matches the
+            # table again once the manifest is committed.
+            generation, self._string_generation = self._string_generation, None
+            added = self._append(manifest, self._string_ids, rows)
+            manifest["cursor"] = tail.cursor
+            atomic_write_text(self.directory / MANIFEST_NAME, json.dumps(manifest))
+            self._string_generation = generation
+            self._remove_stale_generations(int(manifest["generation"]))
+            return added
+
+    def _catch_up_strings(self, manifest: Dict[str, Any]) -> None:
+        # Ids are only ever appended within a generation, so a lookup built
+        # for this generation just needs the strings committed after it. The
+        # last known string is decoded again to check the table still starts
+        # with the lookup (a rebuilt directory reuses generation numbers).
+        generation = int(manifest["generation"])
+        known = len(self._string_ids) if self._string_generation == generation else 0
+        snapshot = AttemptSnapshot(self.directory, manifest)
+        try:
+            decoded = snapshot.strings_from(max(known - 1, 0))
+            if known and (not decoded or decoded[0] != next(reversed(self._string_ids))):
+                known = 0
+                decoded = snapshot.strings()
+        finally:
+            snapshot.close()
+        if not known:
+            self._string_ids = {}
+        for value in decoded[1:] if known else decoded:
+            self._string_ids[value] = len(self._string_ids)
+        self._string_generation = generation
+
+    def _append(self, manifest: Dict[str, Any], string_ids: Dict[str, int], rows) -> int:
+        names = _file_names(int(manifest["generation"]))
+        paths = {kind: self.directory / name for kind, name in names.items()}
+        sizes = {
+            "attempts": manifest["attempts"] * ATTEMPT_RECORD.size,
+            "results": manifest["results"] * RESULT_RECORD.size,
+            "strings": manifest["string_bytes"],
+            "offsets": manifest["strings"] * 8,
+        }
+        handles = {}
+        try:
+            for kind, path in paths.items():
+                handle = handles[kind] = path.open("ab")
+                # Drop anything a crashed update wrote past the last commit.
+                handle.truncate(sizes[kind])
+                handle.seek(sizes[kind])
+
+            string_bytes = manifest["string_bytes"]
+            new_strings: List[bytes] = []
+            new_ends = array("Q")
+
+            def intern(value: Any) -> int:
+                nonlocal string_bytes
+                if value is None:
+                    return NO_STRING
+                value = value if isinstance(value, str) else str(value)
+                code = string_ids.get(value)
+                if code is None:
+                    encoded = value.encode("utf-8")
+                    code = string_ids[value] = len(string_ids)
+                    string_bytes += len(encoded)
+                    new_strings.append(encoded)
+                    new_ends.append(string_bytes)
+                return code
+
+            result_index = manifest["results"]
+            attempt_records = bytearray()
+            result_records = bytearray()
+            added = 0
+            for row in rows:
+                results = row.get("results") or []
+                for result in results:
+                    flags = (CORRECT_FLAG if result.get("correct") else 0) | (
+                        HINT_FLAG if result.get("used_hint") else 0
+                    )
+                    result_records += RESULT_RECORD.pack(
+                        float(result.get("time_sec") or 0.0),
+                        intern(result.get("question_id")),
+                        intern(result.get("chosen_answer")),
+                        flags,
+                    )
+                created_at = row.get("created_at")
+                attempt_records += ATTEMPT_RECORD.pack(
+                    float(row.get("score_pct") or 0.0),
+                    float(created_at) if created_at is not None else float("nan"),
+                    *(intern(row.get(key)) for key in _STRING_FIELDS),
+                    result_index,
+                    len(results),
+                )
+                result_index += len(results)
+                added += 1
+
+            handles["attempts"].write(attempt_records)
+            handles["results"].write(result_records)
+            handles["strings"].write(b"".join(new_strings))
+            handles["offsets"].write(new_ends.tobytes())
+            for handle in handles.values():
+                handle.flush()
+                os.fsync(handle.fileno())
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+        manifest["attempts"] += added
+        manifest["results"] = result_index
+        manifest["strings"] = len(string_ids)
+        manifest["string_bytes"] = string_bytes
+        return added
+
+    def _remove_stale_generations(self, generation: int) -> None:
+        current = set(_file_names(generation).values())
+        for path in self.directory.glob("g*.*"):
+            if path.name not in current:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def main() -> None:
+    from .repository import ATTEMPT_SNAPSHOT_DIR, refresh_attempt_snapshot
+
+    started = time.perf_counter()
+    added = refresh_attempt_snapshot()
+    manifest = read_manifest(ATTEMPT_SNAPSHOT_DIR) or {}
+    print(
+        json.dumps(
+            {
+                "directory": str(ATTEMPT_SNAPSHOT_DIR),
+                "added": added,
+                "attempts": manifest.get("attempts"),
+                "results": manifest.get("results"),
+                "strings": manifest.get("strings"),
+                "seconds": round(time.perf_counter() - started, 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
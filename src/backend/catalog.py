@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .fsutil import atomic_write_bytes, file_lock, lock_path_for
+from .metrics import record_hydrated, record_read, record_write
+
+
+@dataclass
+class _CatalogEntry:
+    path: Path
+    default: Any
+    hydrate: Callable[[Any], Any]
+    value: Any = None
+    stat_key: Optional[Tuple[int, int]] = None
+    content_hash: Optional[str] = None
+    loaded: bool = False
+
+
+class CatalogCache:
+    """
+    Keep the hydrated catalog (units, questions, quizzes) in memory.
+
+    Each file is re-read only when its mtime or size changes, and objects are
+    only rebuilt when the content hash changes as well. Every rebuild bumps
+    ``version`` so other caches can key derived data on it.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, _CatalogEntry] = {}
+        self._lock = threading.RLock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._fingerprint: Optional[str] = None
+        self._fingerprint_version = -1
+
+    def register(
+        self,
+        name: str,
+        path: Path,
+        default: Any,
+        hydrate: Callable[[Any], Any],
+    ) -> None:
+        with self._lock:
+            self._entries[name] = _CatalogEntry(path=path, default=default, hydrate=hydrate)
+
+    def seed(
+        self,
+        name: str,
+        value: Any,
+        content_hash: str,
+        stat_key: Optional[Tuple[int, int]],
+    ) -> None:
+        """
+        Install objects built elsewhere (e.g. a catalog snapshot) from a file
+        with the given content hash and stat. A file whose stat no longer
+        matches is re-hashed on the next lookup and only re-parsed if its
+        content differs; a missing file keeps serving the seeded objects.
+        """
+
+        entry = self._entries[name]
+        with self._lock:
+            entry.value = value
+            entry.content_hash = content_hash
+            entry.stat_key = stat_key if _stat_key(entry.path) is not None else None
+            entry.loaded = True
+            self.version += 1
+
+    def get(self, name: str) -> Any:
+        entry = self._entries[name]
+        stat_key = _stat_key(entry.path)
+        with self._lock:
+            if entry.loaded and stat_key == entry.stat_key:
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            self._refresh(entry, stat_key)
+            return entry.value
+
+    def check(self) -> int:
+        """
+        Revalidate every registered file and return the current version.
+        """
+
+        for name in list(self._entries):
+            self.get(name)
+        return self.version
+
+    def validators(self) -> Tuple[str, Optional[float]]:
+        """
+        Revalidate and return (fingerprint, last_modified). The fingerprint
+        hashes every file's content hash, so it is the same in every process
+        and across restarts; last_modified is the newest file mtime in seconds.
+        """
+
+        self.check()
+        with self._lock:
+            if self._fingerprint_version != self.version:
+                digest = hashlib.sha1()
+                for name in sorted(self._entries):
+                    digest.update(f"{name}={self._entries[name].content_hash}\n".encode())
+                self._fingerprint = digest.hexdigest()
+                self._fingerprint_version = self.version
+            mtimes = [
+                entry.stat_key[0] for entry in self._entries.values() if entry.stat_key
+            ]
+            return self._fingerprint, (max(mtimes) / 1e9 if mtimes else None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            for entry in self._entries.values():
+                entry.loaded = False
+                entry.stat_key = None
+                entry.content_hash = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "files": {
+                    name: entry.content_hash for name, entry in self._entries.items()
+                },
+            }
+
+    def _refresh(self, entry: _CatalogEntry, stat_key: Optional[Tuple[int, int]]) -> None:
+        if stat_key is None:
+            # As before the cache, a missing file is created with its default.
+            _create_default(entry)
+            stat_key = _stat_key(entry.path)
+        if stat_key is None:
+            content = None
+            content_hash = None
+        else:
+            content = entry.path.read_bytes()
+            record_read(entry.path.name, len(content))
+            content_hash = hashlib.sha1(content).hexdigest()
+
+        entry.stat_key = stat_key
+        if entry.loaded and content_hash == entry.content_hash:
+            # Touched but unchanged (e.g. a checkout or copy): keep the objects.
+            return
+
+        raw = entry.default
+        if content is not None:
+            try:
+                raw = json.loads(content)
+            except json.JSONDecodeError:
+                raw = entry.default
+
+        entry.value = entry.hydrate(raw)
+        record_hydrated(entry.path.stem, len(entry.value))
+        entry.content_hash = content_hash
+        entry.loaded = True
+        self.version += 1
+        self.reloads += 1
+
+
+def _create_default(entry: _CatalogEntry) -> None:
+    with file_lock(lock_path_for(entry.path)):
+        if entry.path.exists():
+            return
+        content = json.dumps(entry.default, indent=2).encode("utf-8")
+        atomic_write_bytes(entry.path, content)
+        record_write(entry.path.name, len(content))
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
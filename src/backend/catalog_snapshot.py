@@ -0,0 +1,353 @@
+"""
+Validated, precompiled snapshot of the content catalog.
+
+``compile_catalog`` parses ``units.json``, ``questions.json`` and
+``quizzes.json``, hydrates the dataclasses and checks the catalog before
+anything is served:
+
+- every record hydrates, ids are unique and enumerated fields hold known values
+- questions and quizzes point at a real unit and, when set, one of its sections
+- every quiz ``question_ids`` entry is a real question and every correct answer
+  is one of the question's options
+- unit diagnostic/comprehensive quizzes and section practice/mini quizzes exist
+
+The snapshot file is a magic line, a one-line JSON header (format, model
+schema, the content hash and stat of every source file, the payload SHA-256)
+and a pickle of the hydrated catalog plus its lookup tables. ``load_snapshot``
+returns ``None`` for a missing, foreign, corrupt or outdated file, so callers
+fall back to the JSON files.
+
+Validate and build the snapshot from the repository root with:
+
+    python -m src.backend.catalog_snapshot
+    python -m src.backend.catalog_snapshot --check   # validate only
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import hashlib
+import json
+import pickle
+import sys
+import time
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, get_args
+
+from .fsutil import atomic_write_bytes
+from .models import Difficulty, Question, QuestionType, Quiz, QuizType, Unit
+
+SNAPSHOT_FORMAT = 1
+MAGIC = b"BITBYBIT-CATALOG\n"
+CATALOG_FILES = ("units", "questions", "quizzes")
+SECTION_QUIZ_KEYS = ("practiceQuizId", "miniQuizId")
+UNIT_QUIZ_FIELDS = ("diagnostic_quiz_id", "comprehensive_quiz_id")
+
+
+class CatalogValidationError(ValueError):
+    def __init__(self, problems: List[str]) -> None:
+        self.problems = problems
+        shown = "; ".join(problems[:5])
+        more = f" (+{len(problems) - 5} more)" if len(problems) > 5 else ""
+        super().__init__(f"{len(problems)} catalog problem(s): {shown}{more}")
+
+
+@dataclass
+class CatalogLookups:
+    """
+    Tables derived from the hydrated catalog. They share the catalog's
+    objects, so building them (or unpickling them) does not copy anything.
+    """
+
+    units_by_id: Dict[str, Unit]
+    quiz_questions: Dict[str, List[Question]]
+
+
+@dataclass
+class CompiledCatalog:
+    units: List[Unit]
+    questions: Dict[str, Question]
+    quizzes: Dict[str, Quiz]
+    lookups: CatalogLookups
+    # name -> {"sha1", "size", "mtime_ns"} of the JSON file it was built from.
+    sources: Dict[str, Dict[str, Any]]
+    # Set when loaded from a snapshot file.
+    payload_sha256: Optional[str] = None
+
+
+def build_lookups(
+    units: List[Unit], questions: Dict[str, Question], quizzes: Dict[str, Quiz]
+) -> CatalogLookups:
+    # Unknown ids are skipped so the tables also work for an unvalidated catalog.
+    return CatalogLookups(
+        units_by_id={unit.id: unit for unit in units},
+        quiz_questions={
+            quiz_id: [questions[qid] for qid in quiz.question_ids if qid in questions]
+            for quiz_id, quiz in quizzes.items()
+        },
+    )
+
+
+def schema_fingerprint() -> str:
+    """
+    Hash of the catalog dataclass fields; pickled objects from a snapshot
+    built against different models are not loaded.
+    """
+
+    digest = hashlib.sha1()
+    for model in (Unit, Question, Quiz):
+        names = ",".join(f.name for f in fields(model))
+        digest.update(f"{model.__name__}({names})\n".encode())
+    return digest.hexdigest()
+
+
+def _hydrate(name: str, raw: Any, model: type, problems: List[str]) -> List[Any]:
+    if not isinstance(raw, list):
+        problems.append(f"{name}: expected a JSON list")
+        return []
+    objects = []
+    seen: Set[str] = set()
+    for position, record in enumerate(raw):
+        where = f"{name}[{position}]"
+        if not isinstance(record, dict):
+            problems.append(f"{where}: expected an object")
+            continue
+        try:
+            obj = model(**record)
+        except TypeError as exc:
+            problems.append(f"{where}: {exc}")
+            continue
+        if obj.id in seen:
+            problems.append(f"{where}: duplicate id {obj.id!r}")
+            continue
+        seen.add(obj.id)
+        objects.append(obj)
+    return objects
+
+
+def _check_references(
+    units: List[Unit],
+    questions: Dict[str, Question],
+    quizzes: Dict[str, Quiz],
+    problems: List[str],
+) -> None:
+    sections: Dict[str, Set[str]] = {}
+    for unit in units:
+        section_ids = sections.setdefault(unit.id, set())
+        for attr in UNIT_QUIZ_FIELDS:
+            quiz_id = getattr(unit, attr)
+            if quiz_id and quiz_id not in quizzes:
+                problems.append(f"unit {unit.id}: {attr} {quiz_id!r} is not a quiz")
+        for section in unit.sections:
+            section_id = section.get("id")
+            if not section_id or section_id in section_ids:
+                problems.append(f"unit {unit.id}: missing or duplicate section id {section_id!r}")
+            section_ids.add(section_id)
+            for key in SECTION_QUIZ_KEYS:
+                quiz_id = section.get(key)
+                if quiz_id and quiz_id not in quizzes:
+                    problems.append(
+                        f"unit {unit.id} section {section_id}: {key} {quiz_id!r} is not a quiz"
+                    )
+
+    def check_placement(kind: str, obj: Any) -> None:
+        if obj.unit_id not in sections:
+            problems.append(f"{kind} {obj.id}: unit {obj.unit_id!r} does not exist")
+        elif obj.section_id is not None and obj.section_id not in sections[obj.unit_id]:
+            problems.append(
+                f"{kind} {obj.id}: section {obj.section_id!r} is not in unit {obj.unit_id}"
+            )
+
+    for question in questions.values():
+        check_placement("question", question)
+        if question.type not in get_args(QuestionType):
+            problems.append(f"question {question.id}: unknown type {question.type!r}")
+        if question.difficulty not in get_args(Difficulty):
+            problems.append(f"question {question.id}: unknown difficulty {question.difficulty!r}")
+        if question.correct_answer not in question.options:
+            problems.append(f"question {question.id}: correct_answer is not one of its options")
+
+    for quiz in quizzes.values():
+        check_placement("quiz", quiz)
+        if quiz.type not in get_args(QuizType):
+            problems.append(f"quiz {quiz.id}: unknown type {quiz.type!r}")
+        missing = [qid for qid in quiz.question_ids if qid not in questions]
+        if missing:
+            problems.append(f"quiz {quiz.id}: unknown question_ids {missing}")
+
+
+def compile_catalog(paths: Dict[str, Path]) -> CompiledCatalog:
+    """
+    Parse, hydrate and validate the catalog files named in ``paths`` (keys
+    ``CATALOG_FILES``). Raises CatalogValidationError listing every problem.
+    """
+
+    problems: List[str] = []
+    raw: Dict[str, Any] = {}
+    sources: Dict[str, Dict[str, Any]] = {}
+    for name in CATALOG_FILES:
+        path = paths[name]
+        try:
+            # Stat first: an edit racing the read then shows up as a stat change.
+            stat = path.stat()
+            content = path.read_bytes()
+        except OSError as exc:
+            problems.append(f"{name}: cannot read {path} ({exc.strerror})")
+            continue
+        sources[name] = {
+            "sha1": hashlib.sha1(content).hexdigest(),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        try:
+            raw[name] = json.loads(content)
+        except json.JSONDecodeError as exc:
+            problems.append(f"{name}: invalid JSON ({exc})")
+    if problems:
+        raise CatalogValidationError(problems)
+
+    units = _hydrate("units", raw["units"], Unit, problems)
+    questions = {q.id: q for q in _hydrate("questions", raw["questions"], Question, problems)}
+    quizzes = {q.id: q for q in _hydrate("quizzes", raw["quizzes"], Quiz, problems)}
+    _check_references(units, questions, quizzes, problems)
+    if problems:
+        raise CatalogValidationError(problems)
+
+    return CompiledCatalog(
+        units=units,
+        questions=questions,
+        quizzes=quizzes,
+        lookups=build_lookups(units, questions, quizzes),
+        sources=sources,
+    )
+
+
+def write_snapshot(catalog: CompiledCatalog, path: Path) -> Dict[str, Any]:
+    # Only model objects and builtin containers are pickled, so the payload
+    # does not depend on this module's name (it runs as __main__ from the CLI).
+    lookups = catalog.lookups
+    payload = pickle.dumps(
+        (
+            catalog.units,
+            catalog.questions,
+            catalog.quizzes,
+            lookups.units_by_id,
+            lookups.quiz_questions,
+        ),
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "schema": schema_fingerprint(),
+        "pickle_protocol": pickle.HIGHEST_PROTOCOL,
+        "built_at": time.time(),
+        "sources": catalog.sources,
+        "counts": {
+            "units": len(catalog.units),
+            "questions": len(catalog.questions),
+            "quizzes": len(catalog.quizzes),
+        },
+        "payload_bytes": len(payload),
+        "payload_sha256": hashlib.sha256(payload).hexdigest(),
+    }
+    header_line = json.dumps(header, sort_keys=True).encode() + b"\n"
+    atomic_write_bytes(path, MAGIC + header_line + payload)
+    return header
+
+
+def read_header(data: bytes) -> Optional[Tuple[Dict[str, Any], int]]:
+    """
+    Return (header, payload offset), or None when ``data`` is not a snapshot
+    this code can load.
+    """
+
+    if not data.startswith(MAGIC):
+        return None
+    end = data.find(b"\n", len(MAGIC))
+    if end < 0:
+        return None
+    try:
+        header = json.loads(data[len(MAGIC) : end])
+    except ValueError:
+        return None
+    if (
+        not isinstance(header, dict)
+        or header.get("format") != SNAPSHOT_FORMAT
+        or header.get("schema") != schema_fingerprint()
+    ):
+        return None
+    return header, end + 1
+
+
+def load_snapshot(path: Path) -> Optional[CompiledCatalog]:
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    parsed = read_header(data)
+    if parsed is None:
+        return None
+    header, offset = parsed
+    payload = memoryview(data)[offset:]
+    if hashlib.sha256(payload).hexdigest() != header.get("payload_sha256"):
+        return None
+    # Unpickling creates only acyclic objects; collector passes over the
+    # growing heap would roughly double the load time.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        units, questions, quizzes, units_by_id, quiz_questions = pickle.loads(payload)
+    except Exception:  # truncated or written by an incompatible build
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return CompiledCatalog(
+        units=units,
+        questions=questions,
+        quizzes=quizzes,
+        lookups=CatalogLookups(units_by_id=units_by_id, quiz_questions=quiz_questions),
+        sources=header.get("sources") or {},
+        payload_sha256=header["payload_sha256"],
+    )
+
+
+def main() -> int:
+    from .repository import CATALOG_SNAPSHOT_PATH, QUESTIONS_PATH, QUIZZES_PATH, UNITS_PATH
+
+    parser = argparse.ArgumentParser(description="Validate the catalog and build its snapshot.")
+    parser.add_argument("--check", action="store_true", help="validate without writing")
+    parser.add_argument("--output", type=Path, default=CATALOG_SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paths = {"units": UNITS_PATH, "questions": QUESTIONS_PATH, "quizzes": QUIZZES_PATH}
+    try:
+        catalog = compile_catalog(paths)
+    except CatalogValidationError as exc:
+        for problem in exc.problems:
+            print(problem, file=sys.stderr)
+        print(f"catalog is invalid: {len(exc.problems)} problem(s)", file=sys.stderr)
+        return 1
+
+    report: Dict[str, Any] = {
+        "units": len(catalog.units),
+        "questions": len(catalog.questions),
+        "quizzes": len(catalog.quizzes),
+    }
+    if not args.check:
+        header = write_snapshot(catalog, args.output)
+        report.update(
+            path=str(args.output),
+            bytes=header["payload_bytes"],
+            sha256=header["payload_sha256"],
+        )
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
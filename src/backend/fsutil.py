@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+_thread_locks: Dict[str, threading.RLock] = {}
+_thread_locks_guard = threading.Lock()
+# Re-entry depth per lock path; only touched while holding that path's RLock.
+_depths: Dict[str, int] = {}
+
+
+def _thread_lock(key: str) -> threading.RLock:
+    with _thread_locks_guard:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = _thread_locks[key] = threading.RLock()
+        return lock
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock on ``path`` (created if missing) across threads and
+    processes. Re-entrant within a thread.
+    """
+
+    key = str(path)
+    lock = _thread_lock(key)
+    with lock:
+        depth = _depths.get(key, 0)
+        if depth:
+            _depths[key] = depth + 1
+            try:
+                yield
+            finally:
+                _depths[key] = depth
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(key, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:  # pragma: no cover - Windows
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            _depths[key] = 1
+            try:
+                yield
+            finally:
+                _depths[key] = 0
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:  # pragma: no cover - Windows
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+
+def lock_path_for(path: Path) -> Path:
+    return path.with_name(path.name + ".lock")
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    Write ``data`` to a temporary file next to ``path``, fsync it and rename it
+    over ``path`` so readers never see a partially written file.
+    """
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp_path.open("wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    atomic_write_bytes(path, text.encode("utf-8"))
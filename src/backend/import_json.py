@@ -0,0 +1,62 @@
+"""
+Copy the JSON data files (students, users and attempts) into the SQLite backend.
+
+Usage, from the repository root:
+
+    python -m src.backend.import_json [--db PATH]
+
+Re-running the import is safe: students and users are upserted and attempts
+whose id is already stored for their student are skipped. The catalog
+(units, questions, quizzes) stays in JSON and is served from the in-process
+catalog cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Dict, Optional
+
+from . import repository
+from .attempt_log import AttemptLog
+from .storage import JsonStorage, SqliteStorage
+
+
+def import_json_to_sqlite(db_path: Optional[Path] = None) -> Dict[str, int]:
+    source = JsonStorage(
+        repository.STUDENTS_PATH,
+        repository.USERS_PATH,
+        AttemptLog(repository.ATTEMPTS_LOG_DIR, legacy_path=repository.ATTEMPTS_PATH),
+    )
+    target = SqliteStorage(db_path or repository.SQLITE_PATH)
+
+    students = source.load_student_rows()
+    target.save_student_rows(students)
+
+    users = source.load_user_rows()
+    target.save_user_rows(users)
+
+    # Same (student_id, id) key as batch ingestion: client ids are only
+    # unique per student.
+    new_attempts = target.append_new_attempt_rows(source.iter_attempt_rows())
+
+    return {
+        "students": len(students),
+        "users": len(users),
+        "attempts": len(new_attempts),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", type=Path, default=None, help="SQLite file to write")
+    args = parser.parse_args()
+    counts = import_json_to_sqlite(args.db)
+    print(
+        f"Imported {counts['students']} students, {counts['users']} users and "
+        f"{counts['attempts']} attempts into {args.db or repository.SQLITE_PATH}"
+    )
+
+
+if __name__ == "__main__":
+    main()
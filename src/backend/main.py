@@ -1,21 +1,32 @@
 from __future__ import annotations
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, make_response, request
 from flask_cors import CORS
+import base64
+import hashlib
+import json
+import random
+import time
 import uuid
-from typing import Dict
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 
+from . import metrics
 from .models import Attempt, AttemptQuestionResult, SkillMastery, StudentState
 from .repository import (
+    DATA_DIR,
     load_units,
     load_unit,
     load_quiz,
+    load_quiz_questions,
     load_questions,
     load_student,
     save_student,
     load_attempts,
-    append_attempt,
-    get_attempts_for_all_students,
+    load_attempt_page,
+    iter_attempts,
     get_next_activity_for_student,
     compute_teacher_student_summaries,
     compute_teacher_unit_summaries,
@@ -23,18 +34,269 @@ from .repository import (
     get_all_students,
     create_student,
     get_user_by_email,
+    get_catalog_stats,
+    get_catalog_validators,
+    get_catalog_version,
+    get_student_write_stats,
+)
+from .profiling import (
+    PROFILE_ALLOW_HEADER,
+    PROFILE_DIR,
+    PROFILE_HEADER,
+    PROFILE_KEEP,
+    PROFILE_SAMPLE_RATE,
+    RequestProfiler,
 )
 from .recommender import pick_next_question
+from .response_cache import RenderedBody, RenderedResponseCache
+from .unit_of_work import UnitOfWork
 from .ml import (
     update_student_skill_state,
     generate_personalized_feedback,
     recommend_next_activity,
-    estimate_question_difficulty,
+    recommend_next_activity_batch,
+    get_difficulty_table,
 )
 
+QUIZ_CACHE_SIZE = 256
+MAX_BATCH_ATTEMPTS = 5000
+MAX_BATCH_STUDENTS = 1000
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def conditional_on_catalog(exists: Optional[Callable[..., bool]] = None):
+    """
+    Give a catalog view a strong ETag (the catalog fingerprint scoped to the
+    request path) and a Last-Modified header, and answer If-None-Match /
+    If-Modified-Since with 304 before the view runs, so nothing is loaded or
+    serialized. ``exists`` takes the view's arguments; when it says the
+    resource is gone the view runs anyway and gets to answer 404.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            fingerprint, last_modified = get_catalog_validators()
+            etag = hashlib.sha256(f"{fingerprint}:{request.path}".encode()).hexdigest()[:32]
+            modified_at = (
+                datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+                if last_modified is not None
+                else None
+            )
+            gzip_etag = f"{etag}-gzip"
+            matched = etag
+            if request.if_none_match:
+                # Gzip bodies carry their own strong ETag; accept either variant.
+                if request.if_none_match.contains_weak(gzip_etag):
+                    matched = gzip_etag
+                fresh = request.if_none_match.contains_weak(matched)
+            else:
+                since = request.if_modified_since
+                fresh = bool(since and modified_at and modified_at <= since)
+            if fresh and (exists is None or exists(*args, **kwargs)):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                matched = gzip_etag if response.content_encoding == "gzip" else etag
+            if response.status_code in (200, 304):
+                response.set_etag(matched)
+                if modified_at is not None:
+                    response.last_modified = modified_at
+                # Browsers may keep the copy but must revalidate it on every use.
+                response.headers["Cache-Control"] = "no-cache"
+                response.vary.add("Accept-Encoding")
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _parse_attempt(payload: Dict, client_fields: bool = False) -> Attempt:
+    """
+    Build an Attempt from a request payload. Raises KeyError for a missing
+    required field. With ``client_fields`` (batch sync) the payload may carry
+    its own id and created_at.
+    """
+
+    attempt = Attempt(
+        id=str(uuid.uuid4()),
+        student_id=payload["student_id"],
+        quiz_id=payload["quiz_id"],
+        quiz_type=payload["quiz_type"],
+        unit_id=payload["unit_id"],
+        section_id=payload.get("section_id"),
+        score_pct=float(payload["score_pct"]),
+        results=[
+            AttemptQuestionResult(
+                question_id=r["question_id"],
+                correct=bool(r["correct"]),
+                chosen_answer=r["chosen_answer"],
+                time_sec=float(r.get("time_sec", 0)),
+                used_hint=bool(r.get("used_hint", False)),
+            )
+            for r in payload.get("results", [])
+        ],
+    )
+    if client_fields:
+        if payload.get("id"):
+            attempt.id = str(payload["id"])
+        if payload.get("created_at") is not None:
+            attempt.created_at = float(payload["created_at"])
+    return attempt
+
+
+def _apply_attempts_to_student(
+    student_id: str, attempts: List[Attempt], uow: UnitOfWork
+) -> StudentState:
+    """
+    Fold newly stored attempts (in time order) into the student's skill state
+    and save it, creating the student on first contact.
+    """
+
+    student = uow.student(student_id)
+    if not student:
+        student = StudentState(
+            student_id=student_id,
+            name=f"Student {student_id}",
+        )
+    updated_skill_state = update_student_skill_state(
+        student_id,
+        attempts,
+        student.skill_mastery,
+        uow,
+    )
+    student.skill_mastery = updated_skill_state
+    mastery_by_skill = {}
+    for skill_id, data in updated_skill_state.items():
+        total = int(data.get("n_observations", 0))
+        correct_estimate = int(round(data.get("p_mastery", 0.0) * total))
+        mastery_by_skill[skill_id] = SkillMastery(
+            skill_id=skill_id,
+            correct=correct_estimate,
+            total=total,
+        )
+    student.mastery_by_skill = mastery_by_skill
+    latest = attempts[-1]
+    if latest.unit_id:
+        student.last_unit_id = latest.unit_id
+    if latest.section_id:
+        student.last_section_id = latest.section_id
+    student.last_activity = latest.quiz_type
+    uow.save_student(student)
+    return student
+
+
+def _encode_cursor(key: Optional[Tuple[float, str]]) -> Optional[str]:
+    if key is None:
+        return None
+    raw = json.dumps([key[0], key[1]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(token: str) -> Tuple[float, str]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, attempt_id = json.loads(raw)
+        return float(created_at), str(attempt_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("invalid_cursor") from e
+
+
+def _history_params() -> Tuple[bool, int, Optional[Tuple[float, str]], bool]:
+    """
+    Read the attempt-history query parameters: (paged, limit, before, summary).
+    Raises ValueError with an error code for malformed values.
+    """
+
+    cursor = request.args.get("cursor")
+    raw_limit = request.args.get("limit")
+    summary = request.args.get("summary", "").lower() in ("1", "true", "yes")
+    paged = cursor is not None or raw_limit is not None
+    limit = DEFAULT_PAGE_SIZE
+    if raw_limit is not None:
+        try:
+            limit = int(raw_limit)
+        except ValueError as e:
+            raise ValueError("invalid_limit") from e
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError("invalid_limit")
+    before = _decode_cursor(cursor) if cursor else None
+    return paged, limit, before, summary
+
+
+def _attempt_payload(attempt: Attempt, summary: bool = False) -> Dict:
+    data = attempt.to_dict()
+    if summary:
+        results = data.pop("results")
+        data["n_questions"] = len(results)
+        data["n_correct"] = sum(1 for r in results if r.get("correct"))
+    return data
+
+
+def _rendered_json(body: RenderedBody) -> Response:
+    if "gzip" in request.accept_encodings:
+        response = Response(body.gzipped, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(body.raw, mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _profiled(profiler: RequestProfiler, view):
+    """
+    Run ``view`` under ``profiler`` for sampled or explicitly requested calls
+    and remember the report name so it can be returned in a header.
+    """
+
+    @wraps(view)
+    def profiled_view(*args, **kwargs):
+        if not profiler.should_profile(request.headers.get(PROFILE_HEADER)):
+            return profiler.run_unprofiled(lambda: view(*args, **kwargs))
+        label = f"{request.method} {request.path}"
+        result, path = profiler.run(label, lambda: make_response(view(*args, **kwargs)))
+        if path is not None:
+            g.profile_report = path.name
+        return result
+
+    return profiled_view
+
 
 def create_app() -> Flask:
     app = Flask(__name__)
+    quiz_bodies = RenderedResponseCache(QUIZ_CACHE_SIZE)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_io = metrics.begin_request()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get("metrics_started")
+        if started is not None:
+            # Templated routes keep label cardinality bounded.
+            route = request.url_rule.rule if request.url_rule else "<unmatched>"
+            metrics.observe_request(
+                request.method,
+                route,
+                response.status_code,
+                time.perf_counter() - started,
+                g.get("metrics_io"),
+            )
+        return response
+
+    @app.teardown_request
+    def stop_request_metrics(_exc):
+        metrics.end_request()
+
+    @app.before_request
+    def open_unit_of_work():
+        # Handlers and the ML helpers they call share one memo of repository
+        # reads for the duration of the request.
+        g.uow = UnitOfWork()
 
     # Allow the Vite dev server to talk to this API
     CORS(
@@ -44,7 +306,20 @@ def create_app() -> Flask:
 
     @app.get("/api/health")
     def health():
-        return jsonify({"status": "ok"})
+        return jsonify(
+            {
+                "status": "ok",
+                "catalog": get_catalog_stats(),
+                "student_writes": get_student_write_stats(),
+                "quiz_bodies": quiz_bodies.stats(),
+            }
+        )
+
+    @app.get("/api/metrics")
+    def api_metrics():
+        return Response(
+            metrics.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
 
     @app.post("/api/auth/login")
     def api_auth_login():
@@ -68,11 +343,13 @@ def create_app() -> Flask:
         return jsonify({"message": message})
 
     @app.get("/api/units")
+    @conditional_on_catalog()
     def api_units():
         units = [u.to_dict() for u in load_units()]
         return jsonify(units)
 
     @app.get("/api/units/<unit_id>")
+    @conditional_on_catalog(exists=lambda unit_id: load_unit(unit_id) is not None)
     def api_unit(unit_id: str):
         unit = load_unit(unit_id)
         if not unit:
@@ -80,23 +357,27 @@ def create_app() -> Flask:
         return jsonify(unit.to_dict())
 
     @app.get("/api/quizzes/<quiz_id>")
+    @conditional_on_catalog(exists=lambda quiz_id: load_quiz(quiz_id) is not None)
     def api_quiz(quiz_id: str):
         """
         Return quiz with a "questions" array so the frontend
         does not have to fetch questions separately.
         """
-        quiz = load_quiz(quiz_id)
-        if not quiz:
-            return jsonify({"error": "quiz_not_found"}), 404
 
-        all_questions = load_questions()
-        question_objects = [
-            all_questions[qid] for qid in quiz.question_ids if qid in all_questions
-        ]
+        def render():
+            quiz = load_quiz(quiz_id)
+            if not quiz:
+                return None
 
-        payload = quiz.to_dict()
-        payload["questions"] = [q.to_dict() for q in question_objects]
-        return jsonify(payload)
+            payload = quiz.to_dict()
+            payload["questions"] = [q.to_dict() for q in load_quiz_questions(quiz_id)]
+            return jsonify(payload).get_data()
+
+        # Rendered once per catalog version; repeat requests copy cached bytes.
+        body = quiz_bodies.get_or_render((get_catalog_version(), quiz_id), render)
+        if body is None:
+            return jsonify({"error": "quiz_not_found"}), 404
+        return _rendered_json(body)
 
     @app.get("/api/student/<student_id>/state")
     def api_get_student_state(student_id: str):
@@ -108,20 +389,70 @@ def create_app() -> Flask:
 
     @app.get("/api/student/<student_id>/next-activity")
     def api_next_activity(student_id: str):
-        student = load_student(student_id)
+        uow = g.uow
+        student = uow.student(student_id)
         if not student:
             student = StudentState(student_id=student_id, name=f"Student {student_id}")
-            save_student(student)
-        attempts = load_attempts(student_id)
-        units = load_units()
-        ml_activity = recommend_next_activity(student, attempts, units)
+            uow.save_student(student)
+        ml_activity = recommend_next_activity(student, uow=uow)
         if ml_activity:
             return jsonify(ml_activity)
-        activity = get_next_activity_for_student(student_id)
+        activity = get_next_activity_for_student(
+            student_id, uow.attempts(student_id), uow.units()
+        )
         payload = activity.to_dict()
         payload["reason"] = payload.get("reason") or "using fallback sequencing"
         return jsonify(payload)
 
+    @app.post("/api/next-activity/batch")
+    def api_next_activity_batch():
+        """
+        Next activities for a roster (all students when ``student_ids`` is
+        omitted), built in one pass over shared catalog, difficulty and
+        attempt data instead of one request per student.
+        """
+
+        payload = request.get_json(force=True, silent=True) or {}
+        student_ids = payload.get("student_ids")
+        if student_ids is None:
+            students = get_all_students()
+        elif isinstance(student_ids, list) and len(student_ids) <= MAX_BATCH_STUDENTS:
+            students = []
+            for student_id in dict.fromkeys(str(sid) for sid in student_ids):
+                student = load_student(student_id)
+                if not student:
+                    student = StudentState(student_id=student_id, name=f"Student {student_id}")
+                    save_student(student)
+                students.append(student)
+        else:
+            return jsonify({"error": "invalid_student_ids", "limit": MAX_BATCH_STUDENTS}), 400
+
+        attempts_by_student: Dict[str, List[Attempt]] = {}
+        if student_ids is None:
+            # The whole roster: one pass over the log beats a lookup per student.
+            attempts_by_student = {student.student_id: [] for student in students}
+            for attempt in iter_attempts():
+                if attempt.student_id in attempts_by_student:
+                    attempts_by_student[attempt.student_id].append(attempt)
+        else:
+            # A few students: read only their attempts through the per-student index.
+            for student in students:
+                attempts_by_student[student.student_id] = load_attempts(student.student_id)
+        units = load_units()
+        ml_activities = recommend_next_activity_batch(students, attempts_by_student, units)
+
+        recommendations = []
+        for student in students:
+            activity = ml_activities.get(student.student_id)
+            if not activity:
+                fallback = get_next_activity_for_student(
+                    student.student_id, attempts_by_student[student.student_id], units
+                )
+                activity = fallback.to_dict()
+                activity["reason"] = activity.get("reason") or "using fallback sequencing"
+            recommendations.append({"student_id": student.student_id, **activity})
+        return jsonify({"recommendations": recommendations})
+
     @app.post("/api/student/<student_id>/state")
     def api_update_student_state(student_id: str):
         payload = request.get_json(force=True) or {}
@@ -150,8 +481,46 @@ def create_app() -> Flask:
 
     @app.get("/api/attempts/<student_id>")
     def api_attempts(student_id: str):
-        attempts = [a.to_dict() for a in load_attempts(student_id)]
-        return jsonify(attempts)
+        """
+        A student's attempt history. Without paging parameters this is the
+        full list, as before. ``limit``/``cursor`` page newest-first on
+        created_at, ``summary=1`` drops per-question results, and
+        ``format=ndjson`` (or Accept: application/x-ndjson) streams one
+        attempt per line, with the next cursor in X-Next-Cursor.
+        """
+
+        try:
+            paged, limit, before, summary = _history_params()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        stream = (
+            request.args.get("format") == "ndjson"
+            or request.accept_mimetypes.best == "application/x-ndjson"
+        )
+
+        next_cursor = None
+        if paged:
+            page, next_key = load_attempt_page(student_id, limit, before)
+            next_cursor = _encode_cursor(next_key)
+            attempts = iter(page)
+        else:
+            attempts = iter_attempts(student_id) if stream else load_attempts(student_id)
+
+        if stream:
+            response = Response(
+                (
+                    json.dumps(_attempt_payload(a, summary), separators=(",", ":")) + "\n"
+                    for a in attempts
+                ),
+                mimetype="application/x-ndjson",
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return response
+        payload = [_attempt_payload(a, summary) for a in attempts]
+        if paged:
+            return jsonify({"attempts": payload, "next_cursor": next_cursor})
+        return jsonify(payload)
 
     @app.get("/api/students")
     def api_students():
@@ -185,7 +554,8 @@ def create_app() -> Flask:
     def api_teacher_overview():
         """Return aggregated stats for the teacher dashboard."""
 
-        raw_student_summaries = compute_teacher_student_summaries()
+        students = get_all_students()
+        raw_student_summaries = compute_teacher_student_summaries(students)
         student_summaries = [summary.to_dict() for summary in raw_student_summaries]
         unit_summaries = [
             summary.to_dict() for summary in compute_teacher_unit_summaries()
@@ -215,9 +585,7 @@ def create_app() -> Flask:
 
         # Surface hardest questions so teachers can see where students struggle.
         questions_lookup = load_questions()
-        question_difficulty = estimate_question_difficulty(
-            get_attempts_for_all_students(), questions_lookup
-        )
+        question_difficulty = get_difficulty_table().lookup()
         hardest_questions = [
             {
                 "question_id": qid,
@@ -239,7 +607,7 @@ def create_app() -> Flask:
 
         # Summarize skill mastery across the class.
         skill_totals: Dict[str, Dict[str, float]] = {}
-        for student in get_all_students():
+        for student in students:
             for skill_id, data in (student.skill_mastery or {}).items():
                 entry = skill_totals.setdefault(
                     skill_id, {"total": 0.0, "count": 0}
@@ -276,11 +644,22 @@ def create_app() -> Flask:
     def api_teacher_student_detail(student_id: str):
         """Return detail for a single student so teachers can drill down."""
 
+        try:
+            paged, limit, before, summary = _history_params()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         student = load_student(student_id)
         if not student:
             student = StudentState(student_id=student_id, name=f"Student {student_id}")
             save_student(student)
-        attempts = [attempt.to_dict() for attempt in load_attempts(student_id)]
+        next_cursor = None
+        if paged:
+            page, next_key = load_attempt_page(student_id, limit, before)
+            next_cursor = _encode_cursor(next_key)
+        else:
+            page = load_attempts(student_id)
+        attempts = [_attempt_payload(attempt, summary) for attempt in page]
         mastery_lookup = compute_unit_mastery_for_student(student_id)
         units = {unit.id: unit.title for unit in load_units()}
         unit_mastery = [
@@ -291,24 +670,26 @@ def create_app() -> Flask:
             }
             for unit_id, mastery in mastery_lookup.items()
         ]
-        return jsonify(
-            {
-                "student": student.to_dict(),
-                "attempts": attempts,
-                "unit_mastery": unit_mastery,
-            }
-        )
+        payload = {
+            "student": student.to_dict(),
+            "attempts": attempts,
+            "unit_mastery": unit_mastery,
+        }
+        if paged:
+            payload["next_cursor"] = next_cursor
+        return jsonify(payload)
 
     @app.get("/api/student/<student_id>/diagnostic-results/<unit_id>")
     def api_student_diagnostic_results(student_id: str, unit_id: str):
-        unit = load_unit(unit_id)
+        uow = g.uow
+        unit = uow.unit(unit_id)
         if not unit:
             return jsonify({"error": "unit_not_found"}), 404
 
         diagnostic_quiz_id = unit.diagnostic_quiz_id
         attempts = [
             attempt
-            for attempt in load_attempts(student_id)
+            for attempt in uow.attempts(student_id)
             if attempt.quiz_type == "diagnostic" and attempt.unit_id == unit_id
         ]
         if not attempts:
@@ -320,15 +701,13 @@ def create_app() -> Flask:
             )
 
         attempt = max(attempts, key=lambda a: a.created_at or 0)
-        student = load_student(student_id) or StudentState(
+        student = uow.student(student_id) or StudentState(
             student_id=student_id, name=f"Student {student_id}"
         )
-        quiz = load_quiz(diagnostic_quiz_id) if diagnostic_quiz_id else None
-        questions_lookup = load_questions()
-        difficulty_lookup = estimate_question_difficulty(
-            get_attempts_for_all_students(), questions_lookup
-        )
-        feedback_text = generate_personalized_feedback(student, attempt)
+        quiz = uow.quiz(diagnostic_quiz_id) if diagnostic_quiz_id else None
+        questions_lookup = uow.questions()
+        difficulty_table = get_difficulty_table(uow)
+        feedback_text = generate_personalized_feedback(student, attempt, uow)
 
         questions_payload = []
         correct_count = 0
@@ -337,7 +716,7 @@ def create_app() -> Flask:
             is_correct = bool(result.correct)
             if is_correct:
                 correct_count += 1
-            difficulty_entry = difficulty_lookup.get(result.question_id, {})
+            difficulty_entry = difficulty_table.get(result.question_id) or {}
             questions_payload.append(
                 {
                     "question_id": result.question_id,
@@ -387,64 +766,100 @@ def create_app() -> Flask:
     def api_create_attempt():
         payload = request.get_json(force=True) or {}
         try:
-            attempt = Attempt(
-                id=str(uuid.uuid4()),
-                student_id=payload["student_id"],
-                quiz_id=payload["quiz_id"],
-                quiz_type=payload["quiz_type"],
-                unit_id=payload["unit_id"],
-                section_id=payload.get("section_id"),
-                score_pct=float(payload["score_pct"]),
-                results=[
-                    AttemptQuestionResult(
-                        question_id=r["question_id"],
-                        correct=bool(r["correct"]),
-                        chosen_answer=r["chosen_answer"],
-                        time_sec=float(r.get("time_sec", 0)),
-                        used_hint=bool(r.get("used_hint", False)),
-                    )
-                    for r in payload.get("results", [])
-                ],
-            )
+            attempt = _parse_attempt(payload)
         except KeyError as e:
             return jsonify({"error": f"missing_field_{e}"}), 400
 
-        append_attempt(attempt)
-        student = load_student(attempt.student_id)
-        if not student:
-            student = StudentState(
-                student_id=attempt.student_id,
-                name=f"Student {attempt.student_id}",
-            )
-        updated_skill_state = update_student_skill_state(
-            attempt.student_id,
-            [attempt],
-            student.skill_mastery,
-        )
-        student.skill_mastery = updated_skill_state
-        mastery_by_skill = {}
-        for skill_id, data in updated_skill_state.items():
-            total = int(data.get("n_observations", 0))
-            correct_estimate = int(round(data.get("p_mastery", 0.0) * total))
-            mastery_by_skill[skill_id] = SkillMastery(
-                skill_id=skill_id,
-                correct=correct_estimate,
-                total=total,
-            )
-        student.mastery_by_skill = mastery_by_skill
-        if attempt.unit_id:
-            student.last_unit_id = attempt.unit_id
-        if attempt.section_id:
-            student.last_section_id = attempt.section_id
-        student.last_activity = attempt.quiz_type
-        save_student(student)
+        uow = g.uow
+        uow.append_attempts([attempt])
+        student = _apply_attempts_to_student(attempt.student_id, [attempt], uow)
 
-        feedback_text = generate_personalized_feedback(student, attempt)
+        feedback_text = generate_personalized_feedback(student, attempt, uow)
         response_payload = attempt.to_dict()
         response_payload["personalized_feedback"] = feedback_text
         response_payload["skill_mastery"] = student.skill_mastery
         return jsonify(response_payload), 201
 
+    @app.post("/api/attempts/batch")
+    def api_create_attempts_batch():
+        """
+        Ingest many attempts from many students (e.g. a tablet syncing after
+        an offline session). Attempts are stored with one write, each
+        student's skill state is updated once over their attempts in time
+        order, and every attempt gets its own result entry. Client-supplied
+        ids make retries safe: ids already stored are reported as duplicates.
+        """
+
+        payload = request.get_json(force=True) or {}
+        items = payload.get("attempts")
+        if not isinstance(items, list):
+            return jsonify({"error": "attempts_list_required"}), 400
+        if len(items) > MAX_BATCH_ATTEMPTS:
+            return jsonify({"error": "too_many_attempts", "limit": MAX_BATCH_ATTEMPTS}), 413
+
+        results: List[Dict] = []
+        by_student: Dict[str, List[Tuple[int, Attempt]]] = {}
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("attempt_must_be_object")
+                attempt = _parse_attempt(item, client_fields=True)
+            except KeyError as e:
+                results.append({"index": index, "status": "error", "error": f"missing_field_{e}"})
+                continue
+            except (TypeError, ValueError) as e:
+                results.append({"index": index, "status": "error", "error": str(e)})
+                continue
+            results.append({"index": index, "id": attempt.id, "student_id": attempt.student_id})
+            by_student.setdefault(attempt.student_id, []).append((index, attempt))
+
+        candidates: List[Tuple[int, Attempt]] = []
+        for student_id, entries in by_student.items():
+            seen = set()
+            for index, attempt in entries:
+                if attempt.id in seen:
+                    results[index]["status"] = "duplicate"
+                    continue
+                seen.add(attempt.id)
+                candidates.append((index, attempt))
+
+        # Ids already stored are skipped by the storage layer in the same
+        # atomic step as the write, so concurrent retries store a batch once.
+        candidates.sort(key=lambda entry: (entry[1].created_at, entry[0]))
+        written = {
+            (attempt.student_id, attempt.id)
+            for attempt in g.uow.append_new_attempts([attempt for _, attempt in candidates])
+        }
+        new_attempts: List[Tuple[int, Attempt]] = []
+        for index, attempt in candidates:
+            if (attempt.student_id, attempt.id) in written:
+                results[index]["status"] = "created"
+                new_attempts.append((index, attempt))
+            else:
+                results[index]["status"] = "duplicate"
+
+        per_student: Dict[str, List[Tuple[int, Attempt]]] = {}
+        for index, attempt in new_attempts:
+            per_student.setdefault(attempt.student_id, []).append((index, attempt))
+        students: Dict[str, Dict] = {}
+        for student_id, entries in per_student.items():
+            student = _apply_attempts_to_student(
+                student_id, [attempt for _, attempt in entries], g.uow
+            )
+            latest_index, latest = entries[-1]
+            results[latest_index]["personalized_feedback"] = generate_personalized_feedback(
+                student, latest, g.uow
+            )
+            students[student_id] = {"skill_mastery": student.skill_mastery}
+
+        status_counts: Dict[str, int] = {}
+        for entry in results:
+            status_counts[entry["status"]] = status_counts.get(entry["status"], 0) + 1
+        return (
+            jsonify({"results": results, "students": students, "counts": status_counts}),
+            201 if new_attempts else 200,
+        )
+
     @app.post("/api/next-question")
     def api_next_question():
         payload = request.get_json(force=True) or {}
@@ -454,17 +869,52 @@ def create_app() -> Flask:
 
         unit_id = payload.get("unit_id")
         section_id = payload.get("section_id")
+        skill_id = payload.get("skill_id")
+        # The filters key the question index, so only strings are usable.
+        if any(
+            value is not None and not isinstance(value, str)
+            for value in (unit_id, section_id, skill_id)
+        ):
+            return jsonify({"error": "invalid_filter"}), 400
+        seed = payload.get("seed")
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, (int, str))):
+            return jsonify({"error": "invalid_seed"}), 400
 
         student = load_student(student_id)
         if not student:
             student = StudentState(student_id=student_id, name=f"Student {student_id}")
             save_student(student)
 
-        q = pick_next_question(student, unit_id=unit_id, section_id=section_id)
+        q = pick_next_question(
+            student,
+            unit_id=unit_id,
+            section_id=section_id,
+            skill_id=skill_id,
+            rng=random.Random(seed) if seed is not None else None,
+        )
         if not q:
             return jsonify({"error": "no_question_available"}), 404
         return jsonify(q.to_dict())
 
+    profiler = RequestProfiler(
+        Path(PROFILE_DIR) if PROFILE_DIR else DATA_DIR / "profiles",
+        sample_rate=PROFILE_SAMPLE_RATE,
+        allow_header=PROFILE_ALLOW_HEADER,
+        keep=PROFILE_KEEP,
+    )
+    if profiler.enabled:
+        # Wrapped after every route is registered; with profiling off the
+        # views are left untouched.
+        for endpoint, view in list(app.view_functions.items()):
+            app.view_functions[endpoint] = _profiled(profiler, view)
+
+        @app.after_request
+        def add_profile_report_header(response):
+            report = g.get("profile_report")
+            if report:
+                response.headers[f"{PROFILE_HEADER}-Report"] = report
+            return response
+
     return app
 
 
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+IO_FIELDS = ("file_reads", "bytes_parsed", "objects_hydrated", "file_writes", "bytes_written")
+
+
+@dataclass
+class RequestIO:
+    """
+    Repository I/O done on behalf of one request.
+    """
+
+    file_reads: int = 0
+    bytes_parsed: int = 0
+    objects_hydrated: int = 0
+    file_writes: int = 0
+    bytes_written: int = 0
+
+
+@dataclass
+class _RouteStats:
+    bucket_counts: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+    latency_sum: float = 0.0
+    requests: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+    io: RequestIO = field(default_factory=RequestIO)
+
+
+_lock = threading.Lock()
+_current = threading.local()
+_routes: Dict[Tuple[str, str], _RouteStats] = {}
+# Process-wide totals per source file (or hydrated object kind), including
+# work done outside requests such as index builds and background flushes.
+_reads: Dict[str, List[int]] = {}
+_writes: Dict[str, List[int]] = {}
+_hydrated: Dict[str, int] = {}
+
+
+def begin_request() -> RequestIO:
+    """
+    Start attributing I/O on this thread to a new request.
+    """
+
+    io = RequestIO()
+    _current.io = io
+    return io
+
+
+def current_request_io() -> Optional[RequestIO]:
+    return getattr(_current, "io", None)
+
+
+def end_request() -> None:
+    _current.io = None
+
+
+def record_read(source: str, nbytes: int, reads: int = 1) -> None:
+    """
+    Count ``reads`` file reads of ``source`` that parsed ``nbytes`` bytes.
+    """
+
+    with _lock:
+        totals = _reads.setdefault(source, [0, 0])
+        totals[0] += reads
+        totals[1] += nbytes
+    io = getattr(_current, "io", None)
+    if io is not None:
+        io.file_reads += reads
+        io.bytes_parsed += nbytes
+
+
+def record_write(source: str, nbytes: int) -> None:
+    with _lock:
+        totals = _writes.setdefault(source, [0, 0])
+        totals[0] += 1
+        totals[1] += nbytes
+    io = getattr(_current, "io", None)
+    if io is not None:
+        io.file_writes += 1
+        io.bytes_written += nbytes
+
+
+def record_hydrated(kind: str, count: int = 1) -> None:
+    """
+    Count ``count`` model objects of ``kind`` built from stored rows.
+    """
+
+    with _lock:
+        _hydrated[kind] = _hydrated.get(kind, 0) + count
+    io = getattr(_current, "io", None)
+    if io is not None:
+        io.objects_hydrated += count
+
+
+def observe_request(
+    method: str, route: str, status: int, seconds: float, io: Optional[RequestIO]
+) -> None:
+    with _lock:
+        stats = _routes.get((method, route))
+        if stats is None:
+            stats = _routes[(method, route)] = _RouteStats()
+        position = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        if position < len(LATENCY_BUCKETS):
+            stats.bucket_counts[position] += 1
+        stats.latency_sum += seconds
+        stats.requests += 1
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        if io is not None:
+            for name in IO_FIELDS:
+                setattr(stats.io, name, getattr(stats.io, name) + getattr(io, name))
+
+
+def reset() -> None:
+    with _lock:
+        _routes.clear()
+        _reads.clear()
+        _writes.clear()
+        _hydrated.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def render_prometheus() -> str:
+    """
+    Render every metric in the Prometheus text exposition format (0.0.4).
+    """
+
+    lines: List[str] = []
+
+    def header(name: str, kind: str, text: str) -> None:
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    with _lock:
+        routes = sorted(_routes.items())
+        header(
+            "bitbybit_request_duration_seconds", "histogram", "Request latency by route."
+        )
+        for (method, route), stats in routes:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                cumulative += count
+                labels = _labels(method=method, route=route, le=_format_bound(bound))
+                lines.append(f"bitbybit_request_duration_seconds_bucket{labels} {cumulative}")
+            labels = _labels(method=method, route=route, le="+Inf")
+            lines.append(f"bitbybit_request_duration_seconds_bucket{labels} {stats.requests}")
+            labels = _labels(method=method, route=route)
+            lines.append(f"bitbybit_request_duration_seconds_sum{labels} {stats.latency_sum!r}")
+            lines.append(f"bitbybit_request_duration_seconds_count{labels} {stats.requests}")
+
+        header("bitbybit_requests_total", "counter", "Requests by route and status code.")
+        for (method, route), stats in routes:
+            for status, count in sorted(stats.statuses.items()):
+                labels = _labels(method=method, route=route, status=str(status))
+                lines.append(f"bitbybit_requests_total{labels} {count}")
+
+        for name, text in (
+            ("file_reads", "Repository file reads made while serving the route."),
+            ("bytes_parsed", "Bytes of stored JSON parsed while serving the route."),
+            ("objects_hydrated", "Model objects built from stored rows for the route."),
+            ("file_writes", "Repository file writes made while serving the route."),
+            ("bytes_written", "Bytes written to repository files for the route."),
+        ):
+            metric = f"bitbybit_request_{name}_total"
+            header(metric, "counter", text)
+            for (method, route), stats in routes:
+                labels = _labels(method=method, route=route)
+                lines.append(f"{metric}{labels} {getattr(stats.io, name)}")
+
+        header("bitbybit_file_reads_total", "counter", "File reads by source.")
+        for source, (reads, _) in sorted(_reads.items()):
+            lines.append(f"bitbybit_file_reads_total{_labels(source=source)} {reads}")
+        header("bitbybit_bytes_parsed_total", "counter", "Bytes parsed by source.")
+        for source, (_, nbytes) in sorted(_reads.items()):
+            lines.append(f"bitbybit_bytes_parsed_total{_labels(source=source)} {nbytes}")
+        header("bitbybit_file_writes_total", "counter", "File writes by source.")
+        for source, (writes, _) in sorted(_writes.items()):
+            lines.append(f"bitbybit_file_writes_total{_labels(source=source)} {writes}")
+        header("bitbybit_bytes_written_total", "counter", "Bytes written by source.")
+        for source, (_, nbytes) in sorted(_writes.items()):
+            lines.append(f"bitbybit_bytes_written_total{_labels(source=source)} {nbytes}")
+        header("bitbybit_objects_hydrated_total", "counter", "Model objects built by kind.")
+        for kind, count in sorted(_hydrated.items()):
+            lines.append(f"bitbybit_objects_hydrated_total{_labels(kind=kind)} {count}")
+
+    return "\n".join(lines) + "\n"
@@ -5,14 +5,21 @@ The goal of this package is to keep the core logic in plain Python functions
 so they are easy to understand, test, and iterate on.
 """
 
-from .difficulty import estimate_question_difficulty
+from .difficulty import (
+    estimate_question_difficulty,
+    estimate_question_difficulty_from_columns,
+    get_difficulty_table,
+)
 from .knowledge_tracing import update_student_skill_state
-from .recommendation import recommend_next_activity
+from .recommendation import recommend_next_activity, recommend_next_activity_batch
 from .feedback import generate_personalized_feedback
 
 __all__ = [
     "estimate_question_difficulty",
+    "estimate_question_difficulty_from_columns",
+    "get_difficulty_table",
     "update_student_skill_state",
     "recommend_next_activity",
+    "recommend_next_activity_batch",
     "generate_personalized_feedback",
 ]
@@ -0,0 +1,377 @@
+"""
+Offline EM fitting of per-skill knowledge-tracing parameters.
+
+Each skill is modelled as a two-state hidden Markov model (unknown / known)
+with five parameters: ``prior`` (P(known) before the first observation),
+``learn`` (unknown -> known), ``forget`` (known -> unknown), ``slip`` (wrong
+while known) and ``guess`` (right while unknown). Parameters are estimated
+with Baum-Welch over every student's ordered responses for that skill.
+
+Usage, from the repository root:
+
+    python -m src.backend.ml.bkt_fit [--processes N] [--output PATH]
+
+The forward-backward pass is vectorized across sequences with NumPy when it
+is installed and falls back to plain Python otherwise. Skills are fitted in
+parallel in a process pool. The result is written to ``kt_params.json``,
+which ``update_student_skill_state`` picks up on its next call.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:  # optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None
+
+from ..fsutil import atomic_write_text
+from ..repository import load_questions, read_attempt_rows_since
+from .knowledge_tracing import (
+    DEFAULT_PRIOR,
+    FORGET_RATE,
+    KT_PARAMS_PATH,
+    LEARN_RATE,
+    _get_skill_ids,
+)
+
+PARAM_BOUNDS = {
+    "prior": (0.01, 0.99),
+    "learn": (0.001, 0.5),
+    "forget": (0.0, 0.3),
+    "slip": (0.001, 0.4),
+    "guess": (0.001, 0.4),
+}
+INITIAL_PARAMS = {
+    "prior": DEFAULT_PRIOR,
+    "learn": LEARN_RATE,
+    "forget": FORGET_RATE,
+    "slip": 0.1,
+    "guess": 0.2,
+}
+BATCH_SIZE = 4096
+MIN_OBSERVATIONS = 10
+
+Sequence = List[int]
+
+# Expected counts accumulated by the E-step, in the order used by the numpy path.
+_ACC_KEYS = (
+    "first_known",
+    "from_unknown",
+    "learned",
+    "from_known",
+    "forgot",
+    "unknown",
+    "unknown_correct",
+    "known",
+    "known_wrong",
+)
+
+
+def collect_skill_sequences(rows: Iterable[Dict[str, Any]]) -> Dict[str, List[Sequence]]:
+    """
+    Turn raw attempt rows into 0/1 response sequences per skill, one sequence
+    per student, ordered by attempt time.
+    """
+
+    questions = load_questions()
+    by_student: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_student.setdefault(row.get("student_id", ""), []).append(row)
+
+    sequences: Dict[str, List[Sequence]] = {}
+    for attempts in by_student.values():
+        attempts.sort(key=lambda row: float(row.get("created_at") or 0.0))
+        per_skill: Dict[str, Sequence] = {}
+        for row in attempts:
+            unit_id = row.get("unit_id") or ""
+            section_id = row.get("section_id")
+            for result in row.get("results") or []:
+                question = questions.get(result.get("question_id", ""))
+                observed = 1 if result.get("correct") else 0
+                for skill_id in _get_skill_ids(question, unit_id, section_id):
+                    per_skill.setdefault(skill_id, []).append(observed)
+        for skill_id, sequence in per_skill.items():
+            sequences.setdefault(skill_id, []).append(sequence)
+    return sequences
+
+
+def _clip(params: Dict[str, float]) -> Dict[str, float]:
+    return {
+        name: min(high, max(low, float(params[name])))
+        for name, (low, high) in PARAM_BOUNDS.items()
+    }
+
+
+def _em_step_python(
+    sequences: List[Sequence], params: Dict[str, float]
+) -> Tuple[Dict[str, float], float]:
+    prior, learn, forget = params["prior"], params["learn"], params["forget"]
+    slip, guess = params["slip"], params["guess"]
+    transition = ((1.0 - learn, learn), (forget, 1.0 - forget))
+
+    acc = dict.fromkeys(_ACC_KEYS, 0.0)
+    log_likelihood = 0.0
+
+    for seq in sequences:
+        length = len(seq)
+        emissions = [
+            ((guess, 1.0 - slip) if obs else (1.0 - guess, slip)) for obs in seq
+        ]
+
+        alphas: List[Tuple[float, float]] = []
+        scales: List[float] = []
+        a0 = (1.0 - prior) * emissions[0][0]
+        a1 = prior * emissions[0][1]
+        for t in range(length):
+            if t > 0:
+                p0, p1 = alphas[-1]
+                a0 = (p0 * transition[0][0] + p1 * transition[1][0]) * emissions[t][0]
+                a1 = (p0 * transition[0][1] + p1 * transition[1][1]) * emissions[t][1]
+            scale = a0 + a1 or 1e-300
+            alphas.append((a0 / scale, a1 / scale))
+            scales.append(scale)
+            log_likelihood += _log(scale)
+
+        b0, b1 = 1.0, 1.0
+        betas: List[Tuple[float, float]] = [(1.0, 1.0)] * length
+        for t in range(length - 2, -1, -1):
+            e0, e1 = emissions[t + 1]
+            n0 = transition[0][0] * e0 * b0 + transition[0][1] * e1 * b1
+            n1 = transition[1][0] * e0 * b0 + transition[1][1] * e1 * b1
+            scale = scales[t + 1]
+            b0, b1 = n0 / scale, n1 / scale
+            betas[t] = (b0, b1)
+
+        for t in range(length):
+            g0 = alphas[t][0] * betas[t][0]
+            g1 = alphas[t][1] * betas[t][1]
+            norm = g0 + g1 or 1e-300
+            g0, g1 = g0 / norm, g1 / norm
+            if t == 0:
+                acc["first_known"] += g1
+            acc["unknown"] += g0
+            acc["known"] += g1
+            if seq[t]:
+                acc["unknown_correct"] += g0
+            else:
+                acc["known_wrong"] += g1
+            if t < length - 1:
+                e0, e1 = emissions[t + 1]
+                nb0, nb1 = betas[t + 1]
+                scale = scales[t + 1]
+                acc["from_unknown"] += g0
+                acc["from_known"] += g1
+                acc["learned"] += alphas[t][0] * transition[0][1] * e1 * nb1 / scale
+                acc["forgot"] += alphas[t][1] * transition[1][0] * e0 * nb0 / scale
+
+    return _m_step(acc, len(sequences), params), log_likelihood
+
+
+def _em_step_numpy(
+    batches: List[Tuple[Any, Any]], params: Dict[str, float]
+) -> Tuple[Dict[str, float], float]:
+    prior, learn, forget = params["prior"], params["learn"], params["forget"]
+    slip, guess = params["slip"], params["guess"]
+    trans = np.array([[1.0 - learn, learn], [forget, 1.0 - forget]])
+
+    totals = np.zeros(9)
+    n_sequences = 0
+    log_likelihood = 0.0
+    for obs, mask in batches:
+        n, length = obs.shape
+        n_sequences += n
+        # Padded steps emit with probability 1 so they do not affect the real ones.
+        emit = np.empty((n, length, 2))
+        emit[..., 0] = np.where(obs == 1, guess, 1.0 - guess)
+        emit[..., 1] = np.where(obs == 1, 1.0 - slip, slip)
+        emit[~mask] = 1.0
+
+        alpha = np.empty((n, length, 2))
+        scale = np.empty((n, length))
+        a = np.stack([np.full(n, 1.0 - prior), np.full(n, prior)], axis=1) * emit[:, 0]
+        for t in range(length):
+            if t > 0:
+                a = (alpha[:, t - 1] @ trans) * emit[:, t]
+            s = a.sum(axis=1)
+            s[s == 0] = 1e-300
+            alpha[:, t] = a / s[:, None]
+            scale[:, t] = s
+        log_likelihood += float(np.log(scale[mask]).sum())
+
+        beta = np.ones((n, length, 2))
+        for t in range(length - 2, -1, -1):
+            b = (emit[:, t + 1] * beta[:, t + 1]) @ trans.T
+            beta[:, t] = b / scale[:, t + 1, None]
+
+        gamma = alpha * beta
+        gamma /= gamma.sum(axis=2, keepdims=True)
+        gamma[~mask] = 0.0
+
+        step_mask = mask[:, 1:]
+        nxt = emit[:, 1:] * beta[:, 1:] / scale[:, 1:, None]
+        learned = alpha[:, :-1, 0] * trans[0, 1] * nxt[..., 1]
+        forgot = alpha[:, :-1, 1] * trans[1, 0] * nxt[..., 0]
+        correct = (obs == 1) & mask
+        wrong = (obs == 0) & mask
+
+        totals += np.array(
+            [
+                gamma[:, 0, 1].sum(),
+                gamma[:, :-1, 0][step_mask].sum(),
+                learned[step_mask].sum(),
+                gamma[:, :-1, 1][step_mask].sum(),
+                forgot[step_mask].sum(),
+                gamma[..., 0].sum(),
+                gamma[..., 0][correct].sum(),
+                gamma[..., 1].sum(),
+                gamma[..., 1][wrong].sum(),
+            ]
+        )
+
+    acc = dict(zip(_ACC_KEYS, (float(v) for v in totals)))
+    return _m_step(acc, n_sequences, params), log_likelihood
+
+
+def _m_step(acc: Dict[str, float], n_sequences: int, params: Dict[str, float]) -> Dict[str, float]:
+    def ratio(num: str, den: str, fallback: float) -> float:
+        return acc[num] / acc[den] if acc[den] > 0 else fallback
+
+    return _clip(
+        {
+            "prior": acc["first_known"] / n_sequences if n_sequences else params["prior"],
+            "learn": ratio("learned", "from_unknown", params["learn"]),
+            "forget": ratio("forgot", "from_known", params["forget"]),
+            "guess": ratio("unknown_correct", "unknown", params["guess"]),
+            "slip": ratio("known_wrong", "known", params["slip"]),
+        }
+    )
+
+
+def _log(value: float) -> float:
+    return math.log(value) if value > 0 else -690.0
+
+
+def _numpy_batches(sequences: List[Sequence]) -> List[Tuple[Any, Any]]:
+    # Sorting by length before batching keeps padding small.
+    ordered = sorted(sequences, key=len)
+    batches = []
+    for start in range(0, len(ordered), BATCH_SIZE):
+        chunk = ordered[start : start + BATCH_SIZE]
+        length = len(chunk[-1])
+        obs = np.zeros((len(chunk), length), dtype=np.int8)
+        mask = np.zeros((len(chunk), length), dtype=bool)
+        for i, seq in enumerate(chunk):
+            obs[i, : len(seq)] = seq
+            mask[i, : len(seq)] = True
+        batches.append((obs, mask))
+    return batches
+
+
+def fit_skill(
+    sequences: List[Sequence],
+    max_iter: int = 100,
+    tol: float = 1e-4,
+    use_numpy: Optional[bool] = None,
+) -> Dict[str, float]:
+    """
+    Run EM on one skill's sequences and return the fitted parameters, plus the
+    number of observations and iterations used.
+    """
+
+    sequences = [seq for seq in sequences if seq]
+    n_obs = sum(len(seq) for seq in sequences)
+    params = dict(INITIAL_PARAMS)
+    if use_numpy is None:
+        use_numpy = np is not None
+    batches = _numpy_batches(sequences) if use_numpy and sequences else None
+
+    previous = None
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        if batches is not None:
+            params, log_likelihood = _em_step_numpy(batches, params)
+        else:
+            params, log_likelihood = _em_step_python(sequences, params)
+        if previous is not None and abs(log_likelihood - previous) <= tol * max(1.0, abs(previous)):
+            break
+        previous = log_likelihood
+
+    fitted = {name: round(value, 4) for name, value in params.items()}
+    fitted["n_observations"] = n_obs
+    fitted["iterations"] = iterations
+    return fitted
+
+
+def _fit_job(job: Tuple[str, List[Sequence], int, float]) -> Tuple[str, Dict[str, float]]:
+    skill_id, sequences, max_iter, tol = job
+    return skill_id, fit_skill(sequences, max_iter=max_iter, tol=tol)
+
+
+def fit_all_skills(
+    sequences_by_skill: Dict[str, List[Sequence]],
+    processes: Optional[int] = None,
+    max_iter: int = 100,
+    tol: float = 1e-4,
+    min_observations: int = MIN_OBSERVATIONS,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Fit every skill with at least ``min_observations`` responses. Largest
+    skills are submitted first so the pool stays busy until the end.
+    """
+
+    jobs = [
+        (skill_id, sequences, max_iter, tol)
+        for skill_id, sequences in sequences_by_skill.items()
+        if sum(len(seq) for seq in sequences) >= min_observations
+    ]
+    jobs.sort(key=lambda job: sum(len(seq) for seq in job[1]), reverse=True)
+
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or len(jobs) <= 1:
+        return dict(_fit_job(job) for job in jobs)
+    with ProcessPoolExecutor(max_workers=min(processes, len(jobs))) as pool:
+        return dict(pool.map(_fit_job, jobs))
+
+
+def write_skill_params(params: Dict[str, Dict[str, float]], path: Path = KT_PARAMS_PATH) -> None:
+    payload = {
+        "format": 1,
+        "fitted_at": time.time(),
+        "skills": params,
+    }
+    atomic_write_text(path, json.dumps(payload, indent=2, sort_keys=True))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fit per-skill knowledge-tracing parameters.")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--max-iter", type=int, default=100)
+    parser.add_argument("--min-observations", type=int, default=MIN_OBSERVATIONS)
+    parser.add_argument("--output", type=Path, default=KT_PARAMS_PATH)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    sequences = collect_skill_sequences(read_attempt_rows_since(None))
+    params = fit_all_skills(
+        sequences,
+        processes=args.processes,
+        max_iter=args.max_iter,
+        min_observations=args.min_observations,
+    )
+    write_skill_params(params, args.output)
+    elapsed = time.perf_counter() - started
+    backend = "numpy" if np is not None else "python"
+    print(f"Fitted {len(params)} skills in {elapsed:.1f}s ({backend}) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
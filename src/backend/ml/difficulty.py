@@ -1,8 +1,23 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, Mapping, Optional
+import atexit
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
 
+from ..fsutil import atomic_write_text
+from ..attempt_columns import AttemptColumns
 from ..models import Attempt, Question
+from ..unit_of_work import UnitOfWork
+from ..repository import (
+    DATA_DIR,
+    get_catalog_version,
+    load_attempt_columns,
+    load_questions,
+    read_attempt_rows_since,
+    register_attempt_listener,
+)
 
 SMOOTHING = 1.0
 BASE_DIFFICULTY = {
@@ -20,6 +35,60 @@ def _difficulty_label(score: float) -> str:
     return "hard"
 
 
+def _accumulate(
+    stats: Dict[str, List[float]], qid: str, correct: bool, time_sec: float
+) -> None:
+    entry = stats.get(qid)
+    if entry is None:
+        entry = stats[qid] = [0.0, 0.0, 0.0]  # correct, total, time
+    entry[1] += 1.0
+    if correct:
+        entry[0] += 1.0
+    if time_sec:
+        entry[2] += max(0.0, float(time_sec))
+
+
+def _score_question(
+    qid: str,
+    entry: List[float],
+    question_lookup: Optional[Mapping[str, Question]],
+) -> Dict[str, float]:
+    correct, total, time_total = entry
+    avg_time = time_total / total if total else None
+
+    base = 0.5
+    if question_lookup and qid in question_lookup:
+        q = question_lookup[qid]
+        base = BASE_DIFFICULTY.get(q.difficulty, 0.5)
+
+    if total == 0:
+        difficulty_score = base
+        p_correct = max(0.0, min(1.0, 1.0 - base))
+    else:
+        p_correct = (correct + SMOOTHING) / (total + 2 * SMOOTHING)
+        difficulty_score = 1.0 - p_correct
+
+    if avg_time is not None and question_lookup and qid in question_lookup:
+        expected = max(15.0, float(question_lookup[qid].estimated_time_sec or 60))
+        ratio = min(avg_time / expected, 3.0)
+        difficulty_score = max(
+            0.0,
+            min(1.0, difficulty_score * 0.8 + (ratio - 1.0) * 0.25 + base * 0.2),
+        )
+    else:
+        difficulty_score = max(0.0, min(1.0, difficulty_score * 0.7 + base * 0.3))
+
+    payload: Dict[str, float] = {
+        "difficulty": round(difficulty_score, 3),
+        "p_correct": round(p_correct, 3),
+        "n_attempts": int(total),
+        "level": _difficulty_label(difficulty_score),
+    }
+    if avg_time is not None and total > 0:
+        payload["avg_time_sec"] = round(avg_time, 1)
+    return payload
+
+
 def estimate_question_difficulty(
     attempt_history: Iterable[Attempt],
     question_lookup: Optional[Mapping[str, Question]] = None,
@@ -30,59 +99,183 @@ def estimate_question_difficulty(
     response time.
     """
 
-    stats: Dict[str, Dict[str, float]] = {}
+    stats: Dict[str, List[float]] = {}
     for attempt in attempt_history or []:
         for result in attempt.results or []:
             qid = result.question_id
             if not qid:
                 continue
-            entry = stats.setdefault(qid, {"correct": 0.0, "total": 0.0, "time": 0.0})
-            entry["total"] += 1.0
-            if result.correct:
-                entry["correct"] += 1.0
-            if result.time_sec:
-                entry["time"] += max(0.0, float(result.time_sec))
+            _accumulate(stats, qid, result.correct, result.time_sec)
 
     if question_lookup:
         for qid in question_lookup.keys():
-            stats.setdefault(qid, {"correct": 0.0, "total": 0.0, "time": 0.0})
-
-    results: Dict[str, Dict[str, float]] = {}
-    for qid, entry in stats.items():
-        total = entry["total"]
-        correct = entry["correct"]
-        avg_time = entry["time"] / total if total else None
-
-        base = 0.5
-        if question_lookup and qid in question_lookup:
-            q = question_lookup[qid]
-            base = BASE_DIFFICULTY.get(q.difficulty, 0.5)
-
-        if total == 0:
-            difficulty_score = base
-            p_correct = max(0.0, min(1.0, 1.0 - base))
-        else:
-            p_correct = (correct + SMOOTHING) / (total + 2 * SMOOTHING)
-            difficulty_score = 1.0 - p_correct
-
-        if avg_time is not None and question_lookup and qid in question_lookup:
-            expected = max(15.0, float(question_lookup[qid].estimated_time_sec or 60))
-            ratio = min(avg_time / expected, 3.0)
-            difficulty_score = max(
-                0.0,
-                min(1.0, difficulty_score * 0.8 + (ratio - 1.0) * 0.25 + base * 0.2),
-            )
-        else:
-            difficulty_score = max(0.0, min(1.0, difficulty_score * 0.7 + base * 0.3))
-
-        payload: Dict[str, float] = {
-            "difficulty": round(difficulty_score, 3),
-            "p_correct": round(p_correct, 3),
-            "n_attempts": int(total),
-            "level": _difficulty_label(difficulty_score),
+            stats.setdefault(qid, [0.0, 0.0, 0.0])
+
+    return {
+        qid: _score_question(qid, entry, question_lookup) for qid, entry in stats.items()
+    }
+
+
+def estimate_question_difficulty_from_columns(
+    columns: AttemptColumns,
+    question_lookup: Optional[Mapping[str, Question]] = None,
+) -> Dict[str, Dict[str, float]]:
+    """
+    estimate_question_difficulty over a columnar attempt store: the
+    per-question sums come from vectorized counts instead of walking
+    Attempt objects.
+    """
+
+    stats = columns.question_totals()
+    if question_lookup:
+        for qid in question_lookup.keys():
+            stats.setdefault(qid, [0.0, 0.0, 0.0])
+
+    return {
+        qid: _score_question(qid, entry, question_lookup) for qid, entry in stats.items()
+    }
+
+
+class DifficultyTable:
+    """
+    Running per-question sums (correct, total, time) over the whole attempt log.
+
+    ``refresh`` only reads attempts appended since the last call and rescores
+    the questions they touched; a catalog change rescores everything without
+    replaying history. The sums and log cursor are snapshotted to disk so a
+    restart only replays the tail of the log; without a snapshot the sums are
+    seeded from the columnar attempt store.
+    """
+
+    SNAPSHOT_FORMAT = 1
+
+    def __init__(self, snapshot_path: Optional[Path] = None, snapshot_every: int = 200) -> None:
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self.version = 0
+        self._lock = threading.RLock()
+        self._sums: Dict[str, List[float]] = {}
+        self._scores: Dict[str, Dict[str, float]] = {}
+        self._cursor: Optional[Dict[str, Any]] = None
+        self._catalog_version: Optional[int] = None
+        self._questions: Mapping[str, Question] = {}
+        self._unsaved = 0
+        self._loaded = False
+
+    def refresh(self) -> "DifficultyTable":
+        with self._lock:
+            if not self._loaded:
+                self._load_snapshot()
+                self._loaded = True
+            if self._cursor is None:
+                # No saved sums: seed from the columnar store, then replay
+                # only what was logged after it.
+                columns = load_attempt_columns()
+                self._sums = columns.question_totals()
+                self._cursor = columns.cursor
+                self._unsaved += len(columns)
+                self._catalog_version = None
+
+            tail = read_attempt_rows_since(self._cursor)
+            if tail.reset:
+                self._sums = {}
+            touched: Dict[str, None] = {}
+            observed = 0
+            for row in tail:
+                observed += 1
+                for result in row.get("results") or []:
+                    qid = result.get("question_id")
+                    if not qid:
+                        continue
+                    _accumulate(
+                        self._sums,
+                        qid,
+                        bool(result.get("correct")),
+                        float(result.get("time_sec") or 0.0),
+                    )
+                    touched[qid] = None
+            self._cursor = tail.cursor
+
+            catalog_version = get_catalog_version()
+            if tail.reset or catalog_version != self._catalog_version:
+                self._catalog_version = catalog_version
+                self._questions = load_questions()
+                self._scores = {}
+                self._rescore(dict.fromkeys([*self._sums, *self._questions]))
+            elif touched:
+                self._rescore(touched)
+
+            self._unsaved += observed
+            if tail.reset or self._unsaved >= self.snapshot_every:
+                self.save_snapshot()
+            return self
+
+    def get(self, question_id: str) -> Optional[Dict[str, float]]:
+        return self._scores.get(question_id)
+
+    def lookup(self) -> Dict[str, Dict[str, float]]:
+        """
+        Same shape and order as ``estimate_question_difficulty(all_attempts,
+        questions)``: questions in first-attempted order, then the remaining
+        catalog questions. Callers stable-sort on scores with many ties, so
+        the order must not depend on hashing or on when a question was rescored.
+        """
+
+        with self._lock:
+            scores = self._scores
+            ordered = {qid: scores[qid] for qid in self._sums if qid in scores}
+            for qid in self._questions:
+                if qid not in ordered and qid in scores:
+                    ordered[qid] = scores[qid]
+            return ordered
+
+    def save_snapshot(self) -> None:
+        with self._lock:
+            if self.snapshot_path is None or self._cursor is None:
+                return
+            payload = {
+                "format": self.SNAPSHOT_FORMAT,
+                "cursor": self._cursor,
+                "sums": self._sums,
+            }
+            atomic_write_text(self.snapshot_path, json.dumps(payload, separators=(",", ":")))
+            self._unsaved = 0
+
+    def _load_snapshot(self) -> None:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return
+        try:
+            payload = json.loads(self.snapshot_path.read_text())
+        except (OSError, ValueError):
+            return
+        if payload.get("format") != self.SNAPSHOT_FORMAT:
+            return
+        self._sums = {
+            qid: [float(v) for v in entry] for qid, entry in (payload.get("sums") or {}).items()
         }
-        if avg_time is not None and total > 0:
-            payload["avg_time_sec"] = round(avg_time, 1)
-        results[qid] = payload
+        self._cursor = payload.get("cursor")
+
+    def _rescore(self, question_ids: Iterable[str]) -> None:
+        empty = [0.0, 0.0, 0.0]
+        for qid in question_ids:
+            self._scores[qid] = _score_question(
+                qid, self._sums.get(qid, empty), self._questions
+            )
+        self.version += 1
+
+
+DIFFICULTY_SNAPSHOT_PATH = DATA_DIR / "difficulty_table.json"
+_table = DifficultyTable(DIFFICULTY_SNAPSHOT_PATH)
+register_attempt_listener(_table.refresh)
+atexit.register(_table.save_snapshot)
+
+
+def get_difficulty_table(uow: Optional[UnitOfWork] = None) -> DifficultyTable:
+    """
+    Return the shared difficulty table, caught up with the attempt log. With a
+    unit of work the catch-up happens once per unit of work.
+    """
 
-    return results
+    if uow is not None:
+        return uow.memo("difficulty_table", _table.refresh)
+    return _table.refresh()
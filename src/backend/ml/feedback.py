@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from collections import Counter, defaultdict
-from typing import Dict
+from typing import Dict, Optional
 
 from ..models import Attempt, StudentState
-from ..repository import load_questions, get_attempts_for_all_students
-from .difficulty import estimate_question_difficulty
+from ..repository import load_questions
+from ..unit_of_work import UnitOfWork
+from .difficulty import get_difficulty_table
 
 
 def _pretty_skill_name(skill_id: str) -> str:
@@ -15,6 +16,7 @@ def _pretty_skill_name(skill_id: str) -> str:
 def generate_personalized_feedback(
     student_state: StudentState,
     last_attempt: Attempt,
+    uow: Optional[UnitOfWork] = None,
 ) -> str:
     """
     Craft a short feedback blurb by combining the student's skill mastery,
@@ -24,9 +26,8 @@ def generate_personalized_feedback(
     if not last_attempt or not last_attempt.results:
         return "Thanks for submitting your work. Keep going — every attempt helps us personalize your path."
 
-    questions = load_questions()
-    all_attempts = get_attempts_for_all_students()
-    difficulty_lookup = estimate_question_difficulty(all_attempts, questions)
+    questions = uow.questions() if uow else load_questions()
+    difficulty_table = get_difficulty_table(uow)
 
     skill_scores: Dict[str, Counter] = defaultdict(Counter)
     for result in last_attempt.results:
@@ -56,7 +57,7 @@ def generate_personalized_feedback(
     avg_difficulty = 0.0
     diff_count = 0
     for result in last_attempt.results:
-        diff_entry = difficulty_lookup.get(result.question_id)
+        diff_entry = difficulty_table.get(result.question_id)
         if diff_entry:
             avg_difficulty += diff_entry["difficulty"]
             diff_count += 1
@@ -1,36 +1,88 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, Optional
+import json
+import threading
+from typing import Dict, Iterable, Optional, Tuple
 
 from ..models import Attempt
-from ..repository import load_questions
+from ..repository import DATA_DIR, load_questions
+from ..unit_of_work import UnitOfWork
 
 DEFAULT_PRIOR = 0.3
 LEARN_RATE = 0.25
 FORGET_RATE = 0.1
 
+# Written by ``python -m src.backend.ml.bkt_fit``; skills without an entry keep
+# the global constants above.
+KT_PARAMS_PATH = DATA_DIR / "kt_params.json"
 
-def _get_skill_ids(question, attempt: Attempt) -> Iterable[str]:
+_params_lock = threading.Lock()
+_params_cache: Dict[str, object] = {"stat": None, "skills": {}}
+
+
+def load_skill_params() -> Dict[str, Dict[str, float]]:
+    """
+    Return fitted per-skill parameters, re-reading the file only when it changes.
+    """
+
+    try:
+        stat = KT_PARAMS_PATH.stat()
+        stat_key: Optional[Tuple[int, int]] = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        stat_key = None
+
+    with _params_lock:
+        if stat_key != _params_cache["stat"]:
+            skills: Dict[str, Dict[str, float]] = {}
+            if stat_key is not None:
+                try:
+                    payload = json.loads(KT_PARAMS_PATH.read_text())
+                    skills = payload.get("skills") or {}
+                except (OSError, ValueError):
+                    skills = {}
+            _params_cache["stat"] = stat_key
+            _params_cache["skills"] = skills
+        return _params_cache["skills"]  # type: ignore[return-value]
+
+
+def _get_skill_ids(question, unit_id: str, section_id: Optional[str]) -> Iterable[str]:
     if question and question.skill_ids:
         return question.skill_ids
-    if attempt.section_id:
-        return [f"{attempt.unit_id}:{attempt.section_id}"]
+    if section_id:
+        return [f"{unit_id}:{section_id}"]
     if question:
         return [question.unit_id]
-    return [attempt.unit_id or "general"]
+    return [unit_id or "general"]
+
+
+def _bkt_update(p_mastery: float, correct: bool, params: Dict[str, float]) -> float:
+    slip = float(params.get("slip", 0.1))
+    guess = float(params.get("guess", 0.2))
+    if correct:
+        evidence = p_mastery * (1.0 - slip)
+        posterior = evidence / (evidence + (1.0 - p_mastery) * guess)
+    else:
+        evidence = p_mastery * slip
+        posterior = evidence / (evidence + (1.0 - p_mastery) * (1.0 - guess))
+    learn = float(params.get("learn", LEARN_RATE))
+    forget = float(params.get("forget", 0.0))
+    return posterior * (1.0 - forget) + (1.0 - posterior) * learn
 
 
 def update_student_skill_state(
     student_id: str,
     attempts: Iterable[Attempt],
     current_state: Optional[Dict[str, Dict[str, float]]],
+    uow: Optional[UnitOfWork] = None,
 ) -> Dict[str, Dict[str, float]]:
     """
     Apply a low-parameter Bayesian-inspired update rule to the student's skill
-    estimates based on the provided attempts.
+    estimates based on the provided attempts. Skills with fitted parameters
+    use the full knowledge-tracing posterior update instead.
     """
 
-    questions = load_questions()
+    questions = uow.questions() if uow else load_questions()
+    skill_params = uow.memo("skill_params", load_skill_params) if uow else load_skill_params()
     skill_state: Dict[str, Dict[str, float]] = {
         skill_id: {
             "p_mastery": float(data.get("p_mastery", DEFAULT_PRIOR)),
@@ -46,29 +98,35 @@ def update_student_skill_state(
     for attempt in sorted_attempts:
         for result in attempt.results or []:
             question = questions.get(result.question_id)
-            for skill_id in _get_skill_ids(question, attempt):
+            for skill_id in _get_skill_ids(question, attempt.unit_id, attempt.section_id):
+                params = skill_params.get(skill_id)
                 state = skill_state.setdefault(
                     skill_id,
                     {
-                        "p_mastery": DEFAULT_PRIOR,
+                        "p_mastery": float(params["prior"]) if params else DEFAULT_PRIOR,
                         "n_observations": 0,
                         "recent_correct": 0,
                     },
                 )
                 p_mastery = float(state["p_mastery"])
-                if result.correct:
+                if params:
+                    p_mastery = min(0.995, max(0.01, _bkt_update(p_mastery, result.correct, params)))
+                elif result.correct:
                     p_mastery = min(
                         0.995,
                         p_mastery + LEARN_RATE * (1.0 - p_mastery),
                     )
-                    state["recent_correct"] = min(
-                        5, state.get("recent_correct", 0) + 1
-                    )
                 else:
                     p_mastery = max(
                         0.01,
                         p_mastery * (1.0 - FORGET_RATE),
                     )
+
+                if result.correct:
+                    state["recent_correct"] = min(
+                        5, state.get("recent_correct", 0) + 1
+                    )
+                else:
                     state["recent_correct"] = 0
 
                 state["p_mastery"] = round(p_mastery, 4)
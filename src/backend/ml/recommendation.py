@@ -1,15 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from ..models import Attempt, StudentState, Unit
-from ..repository import (
-    load_questions,
-    load_quizzes,
-    get_attempts_for_all_students,
-)
-from .difficulty import estimate_question_difficulty
+from ..repository import get_catalog_version, load_questions, load_quizzes
+from ..unit_of_work import UnitOfWork
+from .difficulty import get_difficulty_table
+
+UNIT_TEST_PENALTY = 0.25
 
 
 @dataclass
@@ -22,14 +23,85 @@ class CandidateQuiz:
     avg_difficulty: float
 
 
-def _build_skill_index(units: Iterable[Unit]) -> Dict[str, List[CandidateQuiz]]:
+@dataclass
+class _SortedCandidates:
+    # (avg_difficulty, registration order, candidate), sorted
+    entries: List[Tuple[float, int, CandidateQuiz]] = field(default_factory=list)
+    keys: List[float] = field(default_factory=list)
+
+    def nearest(self, target: float) -> Optional[Tuple[float, int, CandidateQuiz]]:
+        """
+        Return (gap, order, candidate) for the candidate closest to ``target``,
+        preferring the earliest registered one on ties.
+        """
+
+        if not self.entries:
+            return None
+        i = bisect_left(self.keys, target)
+        best: Optional[Tuple[float, int, CandidateQuiz]] = None
+        for j in (i - 1, i):
+            if j < 0 or j >= len(self.keys):
+                continue
+            key = self.keys[j]
+            # Walk the run of equal keys so ties resolve by registration order.
+            lo = bisect_left(self.keys, key)
+            _, order, candidate = self.entries[lo]
+            option = (abs(key - target), order, candidate)
+            if best is None or option[:2] < best[:2]:
+                best = option
+        return best
+
+
+@dataclass
+class SkillCandidates:
+    """
+    Candidate quizzes for one skill, pre-sorted by average difficulty. Unit
+    tests are kept apart because they carry a penalty at low mastery.
+    """
+
+    candidates: List[CandidateQuiz] = field(default_factory=list)
+    regular: _SortedCandidates = field(default_factory=_SortedCandidates)
+    unit_tests: _SortedCandidates = field(default_factory=_SortedCandidates)
+
+    def add(self, candidate: CandidateQuiz) -> None:
+        self.candidates.append(candidate)
+
+    def finalize(self) -> "SkillCandidates":
+        for order, candidate in enumerate(self.candidates):
+            bucket = self.unit_tests if candidate.activity == "unit_test" else self.regular
+            bucket.entries.append((candidate.avg_difficulty, order, candidate))
+        for bucket in (self.regular, self.unit_tests):
+            bucket.entries.sort(key=lambda entry: (entry[0], entry[1]))
+            bucket.keys = [entry[0] for entry in bucket.entries]
+        return self
+
+    def best_for(self, target: float, focus_mastery: float) -> Optional[CandidateQuiz]:
+        """
+        Equivalent to taking the minimum of ``|avg_difficulty - target|`` plus
+        the unit-test penalty over every candidate, in O(log n).
+        """
+
+        options = []
+        regular = self.regular.nearest(target)
+        if regular:
+            options.append(regular)
+        unit_test = self.unit_tests.nearest(target)
+        if unit_test:
+            gap, order, candidate = unit_test
+            if focus_mastery < 0.65:
+                gap += UNIT_TEST_PENALTY
+            options.append((gap, order, candidate))
+        if not options:
+            return None
+        return min(options, key=lambda option: option[:2])[2]
+
+
+def _build_skill_index(units: Iterable[Unit]) -> Dict[str, SkillCandidates]:
     questions = load_questions()
     quizzes = load_quizzes()
-    difficulty_lookup = estimate_question_difficulty(
-        get_attempts_for_all_students(), questions
-    )
+    difficulty_table = get_difficulty_table()
 
-    skill_to_candidates: Dict[str, List[CandidateQuiz]] = {}
+    skill_to_candidates: Dict[str, SkillCandidates] = {}
 
     def register_candidate(
         unit: Unit,
@@ -50,7 +122,7 @@ def _build_skill_index(units: Iterable[Unit]) -> Dict[str, List[CandidateQuiz]]:
             question = questions.get(qid)
             if question:
                 skills_for_quiz.update(question.skill_ids or [question.unit_id])
-            diff_entry = difficulty_lookup.get(qid)
+            diff_entry = difficulty_table.get(qid)
             if diff_entry:
                 total_difficulty += diff_entry["difficulty"]
                 diff_count += 1
@@ -58,7 +130,7 @@ def _build_skill_index(units: Iterable[Unit]) -> Dict[str, List[CandidateQuiz]]:
             total_difficulty / diff_count if diff_count else 0.5
         )
         for skill_id in skills_for_quiz:
-            skill_to_candidates.setdefault(skill_id, []).append(
+            skill_to_candidates.setdefault(skill_id, SkillCandidates()).add(
                 CandidateQuiz(
                     unit_id=unit.id,
                     section_id=section_id,
@@ -84,9 +156,36 @@ def _build_skill_index(units: Iterable[Unit]) -> Dict[str, List[CandidateQuiz]]:
             if section.get("miniQuizId"):
                 register_candidate(unit, section["miniQuizId"], section_id, "mini_quiz")
 
+    for candidates in skill_to_candidates.values():
+        candidates.finalize()
     return skill_to_candidates
 
 
+_skill_index_lock = threading.Lock()
+_skill_index_cache: Dict[str, Any] = {"key": None, "index": {}}
+
+
+def get_skill_index(
+    units: Iterable[Unit], uow: Optional[UnitOfWork] = None
+) -> Dict[str, SkillCandidates]:
+    """
+    Return the skill -> candidates index, rebuilt only when the catalog or the
+    difficulty table has changed since the last build.
+    """
+
+    units = list(units)
+    key = (
+        uow.catalog_version() if uow else get_catalog_version(),
+        get_difficulty_table(uow).version,
+        tuple(unit.id for unit in units),
+    )
+    with _skill_index_lock:
+        if _skill_index_cache["key"] != key:
+            _skill_index_cache["index"] = _build_skill_index(units)
+            _skill_index_cache["key"] = key
+        return _skill_index_cache["index"]
+
+
 def _target_difficulty(p_mastery: float) -> float:
     if p_mastery < 0.35:
         return 0.4
@@ -97,17 +196,61 @@ def _target_difficulty(p_mastery: float) -> float:
 
 def recommend_next_activity(
     student_state: StudentState,
-    attempts: Iterable[Attempt],
-    units: Iterable[Unit],
+    attempts: Optional[Iterable[Attempt]] = None,
+    units: Optional[Iterable[Unit]] = None,
+    uow: Optional[UnitOfWork] = None,
 ) -> Optional[Dict[str, object]]:
     """
     Recommend the next activity by combining the student's skill mastery
-    estimates with the current question difficulty landscape.
+    estimates with the current question difficulty landscape. With a unit of
+    work, omitted attempts and units are read through it.
     """
 
-    units = list(units)
+    if uow is not None:
+        if attempts is None:
+            attempts = uow.attempts(student_state.student_id)
+        if units is None:
+            units = uow.units()
+    units = list(units or [])
     if not units:
         return None
+    return _recommend(student_state, attempts, units, None, uow)
+
+
+def recommend_next_activity_batch(
+    students: Iterable[StudentState],
+    attempts_by_student: Dict[str, List[Attempt]],
+    units: Iterable[Unit],
+) -> Dict[str, Optional[Dict[str, object]]]:
+    """
+    Recommend next activities for a whole roster in one pass. The units, the
+    difficulty table and the skill index are resolved once and shared;
+    ``attempts_by_student`` should already be grouped by student id.
+    """
+
+    units = list(units)
+    students = list(students)
+    if not units:
+        return {student.student_id: None for student in students}
+    candidates_by_skill = get_skill_index(units)
+    return {
+        student.student_id: _recommend(
+            student,
+            attempts_by_student.get(student.student_id, []),
+            units,
+            candidates_by_skill,
+        )
+        for student in students
+    }
+
+
+def _recommend(
+    student_state: StudentState,
+    attempts: Iterable[Attempt],
+    units: List[Unit],
+    candidates_by_skill: Optional[Dict[str, SkillCandidates]],
+    uow: Optional[UnitOfWork] = None,
+) -> Optional[Dict[str, object]]:
 
     attempts = list(attempts or [])
     diagnostic_units = {
@@ -154,22 +297,17 @@ def recommend_next_activity(
     skill_candidates.sort(key=lambda entry: entry[0])
     focus_mastery, focus_skill_id, focus_meta = skill_candidates[0]
 
-    candidates_by_skill = _build_skill_index(units)
+    if candidates_by_skill is None:
+        candidates_by_skill = get_skill_index(units, uow)
     candidate_quizzes = candidates_by_skill.get(focus_skill_id)
     if not candidate_quizzes:
         return None
 
     target_diff = _target_difficulty(focus_mastery)
-
-    def candidate_score(candidate: CandidateQuiz) -> float:
-        difficulty_gap = abs(candidate.avg_difficulty - target_diff)
-        # Encourage practice/mini quizzes before unit tests unless mastery is high
-        activity_penalty = 0.0
-        if focus_mastery < 0.65 and candidate.activity == "unit_test":
-            activity_penalty = 0.25
-        return difficulty_gap + activity_penalty
-
-    best_candidate = min(candidate_quizzes, key=candidate_score)
+    # Practice/mini quizzes are preferred over unit tests unless mastery is high.
+    best_candidate = candidate_quizzes.best_for(target_diff, focus_mastery)
+    if not best_candidate:
+        return None
 
     reason = (
         f"targeting weakest skill: {focus_skill_id.replace('_', ' ')} "
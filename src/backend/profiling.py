@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+# Fraction of requests profiled without being asked (0 disables sampling).
+PROFILE_SAMPLE_RATE = float(os.environ.get("BITBYBIT_PROFILE_SAMPLE_RATE", "0"))
+# When "1", a request carrying PROFILE_HEADER is profiled as well.
+PROFILE_ALLOW_HEADER = os.environ.get("BITBYBIT_PROFILE_ALLOW_HEADER", "0") == "1"
+PROFILE_DIR = os.environ.get("BITBYBIT_PROFILE_DIR")
+PROFILE_KEEP = int(os.environ.get("BITBYBIT_PROFILE_KEEP", "50"))
+PROFILE_HEADER = "X-BitByBit-Profile"
+PROFILE_TOP_N = 25
+# Frames kept per allocation so sites inside helpers are attributed to callers.
+TRACEMALLOC_FRAMES = 5
+# How often live memory is checked for a new peak while a request runs.
+PEAK_POLL_INTERVAL = 0.005
+# A snapshot walks every traced block, so the watcher only takes one when the
+# high has grown by this many bytes since the last one, and at most this often.
+PEAK_SNAPSHOT_GROWTH = 1 << 20
+PEAK_SNAPSHOT_MIN_INTERVAL = 0.25
+
+
+class RequestProfiler:
+    """
+    Opt-in per-request profiling.
+
+    A request is profiled when it is sampled (``sample_rate``) or, if
+    ``allow_header`` is set, when it asks for it with ``PROFILE_HEADER``. The
+    handler then runs under ``cProfile`` and ``tracemalloc`` and a text
+    report with the top functions and allocation sites is written to
+    ``directory``, keeping only the newest ``keep`` reports.
+
+    Allocation sites are taken from a snapshot near the request's memory
+    peak, so objects built and dropped within the handler (hydrated attempts,
+    intermediate lists) still show up. Both tools are process-wide, so only
+    one request is profiled at a time; requests arriving meanwhile run
+    normally. cProfile only follows the profiled thread, but tracemalloc also
+    sees those other requests' allocations, so the report says how many
+    overlapped. A streamed body is produced after the view returns and is
+    not covered; the report flags it.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        sample_rate: float = 0.0,
+        allow_header: bool = False,
+        keep: int = 50,
+        top_n: int = PROFILE_TOP_N,
+    ) -> None:
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.allow_header = allow_header
+        self.keep = keep
+        self.top_n = top_n
+        self.profiled = 0
+        self._busy = threading.Lock()
+        self._state = threading.Lock()
+        self._in_flight = 0
+        self._overlapping: Optional[int] = None
+        self._rng = random.Random()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.allow_header
+
+    def should_profile(self, header_value: Optional[str]) -> bool:
+        if self.allow_header and header_value and header_value.strip() not in ("0", "false"):
+            return True
+        return self.sample_rate > 0 and self._rng.random() < self.sample_rate
+
+    def run(self, label: str, fn: Callable[[], Any]) -> Tuple[Any, Optional[Path]]:
+        """
+        Call ``fn`` under the profilers and return (result, report path). The
+        path is None when another request is already being profiled.
+        """
+
+        if not self._busy.acquire(blocking=False):
+            return self.run_unprofiled(fn), None
+        try:
+            with self._state:
+                self._overlapping = self._in_flight
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            baseline, _ = tracemalloc.get_traced_memory()
+            watcher = _PeakWatcher(baseline)
+            watcher.start()
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            try:
+                result = profiler.runcall(fn)
+            finally:
+                elapsed = time.perf_counter() - started
+                watcher.stop()
+                _, peak = tracemalloc.get_traced_memory()
+                if watcher.snapshot is None:
+                    watcher.snapshot = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+                with self._state:
+                    overlapping, self._overlapping = self._overlapping or 0, None
+            notes = []
+            if overlapping:
+                notes.append(
+                    f"{overlapping} other request(s) ran meanwhile; their allocations "
+                    "are included in the allocation sites"
+                )
+            if getattr(result, "is_streamed", False):
+                notes.append("the body is streamed after the view returns and is not profiled")
+            path = self._write_report(
+                label, elapsed, peak - baseline, profiler, before, watcher.snapshot, notes
+            )
+            self.profiled += 1
+            return result, path
+        finally:
+            self._busy.release()
+
+    def run_unprofiled(self, fn: Callable[[], Any]) -> Any:
+        """
+        Call ``fn`` without profiling it, counting it against a profile that
+        is running meanwhile.
+        """
+
+        with self._state:
+            self._in_flight += 1
+            if self._overlapping is not None:
+                self._overlapping += 1
+        try:
+            return fn()
+        finally:
+            with self._state:
+                self._in_flight -= 1
+
+    def _write_report(
+        self,
+        label: str,
+        elapsed: float,
+        peak: int,
+        profiler: cProfile.Profile,
+        before: tracemalloc.Snapshot,
+        at_peak: tracemalloc.Snapshot,
+        notes: List[str],
+    ) -> Path:
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        allocations = at_peak.filter_traces(filters).compare_to(
+            before.filter_traces(filters), "lineno"
+        )
+        allocations = [stat for stat in allocations if stat.size_diff > 0]
+        allocations.sort(key=lambda stat: stat.size_diff, reverse=True)
+
+        functions = io.StringIO()
+        stats = pstats.Stats(profiler, stream=functions)
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+
+        lines: List[str] = [
+            f"request: {label}",
+            f"time: {datetime.now(timezone.utc).isoformat()}",
+            f"elapsed_ms: {elapsed * 1000:.2f}",
+            f"peak_allocated_kib: {peak / 1024:.1f}",
+            *(f"note: {note}" for note in notes),
+            "",
+            f"== top {self.top_n} allocation sites (live near the memory peak) ==",
+        ]
+        for stat in allocations[: self.top_n]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{stat.size_diff / 1024:10.1f} KiB {stat.count_diff:8d} blocks  "
+                f"{frame.filename}:{frame.lineno}"
+            )
+        lines += ["", f"== top {self.top_n} functions by cumulative time ==", functions.getvalue()]
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-")[:80]
+        path = self.directory / f"{stamp}-{slug}.txt"
+        path.write_text("\n".join(lines))
+        self._rotate()
+        return path
+
+    def _rotate(self) -> None:
+        reports = sorted(self.directory.glob("*.txt"))
+        for stale in reports[: max(0, len(reports) - self.keep)]:
+            try:
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class _PeakWatcher(threading.Thread):
+    """
+    Poll traced memory while a request runs and snapshot it near the peak.
+
+    A new snapshot is only taken once memory has grown ``PEAK_SNAPSHOT_GROWTH``
+    past the last one and ``PEAK_SNAPSHOT_MIN_INTERVAL`` has passed, so a
+    steadily growing request is not slowed down by back-to-back snapshots.
+    Requests that never grow that much get their snapshot at the end.
+    """
+
+    def __init__(self, baseline: int) -> None:
+        super().__init__(name="profile-peak-watcher", daemon=True)
+        self.high = baseline
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        snapshot_high = self.high
+        next_snapshot = 0.0
+        while not self._done.wait(PEAK_POLL_INTERVAL):
+            current, _ = tracemalloc.get_traced_memory()
+            if current <= self.high:
+                continue
+            self.high = current
+            now = time.monotonic()
+            if current - snapshot_high >= PEAK_SNAPSHOT_GROWTH and now >= next_snapshot:
+                self.snapshot = tracemalloc.take_snapshot()
+                snapshot_high = current
+                next_snapshot = now + PEAK_SNAPSHOT_MIN_INTERVAL
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
@@ -1,49 +1,181 @@
 from __future__ import annotations
 
+import heapq
 import random
-from typing import Optional
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from .models import Question, StudentState
-from .repository import load_questions
+from .repository import get_catalog_version, load_questions
+
+TOP_K = 10
+PREFERRED_DIFFICULTY_BONUS = 10.0
+
+
+@dataclass
+class _QuestionGroup:
+    """
+    Questions sharing a skill set and difficulty. They always get the same
+    score, so a bucket is scored per group rather than per question.
+    """
+
+    skill_ids: Tuple[str, ...]
+    difficulty: str
+    questions: List[Tuple[int, Question]] = field(default_factory=list)
+
+
+@dataclass
+class _QuestionBucket:
+    groups: List[_QuestionGroup] = field(default_factory=list)
+    _by_signature: Dict[Tuple[Tuple[str, ...], str], _QuestionGroup] = field(default_factory=dict)
+
+    def add(self, position: int, question: Question) -> None:
+        signature = (tuple(question.skill_ids or ()), question.difficulty)
+        group = self._by_signature.get(signature)
+        if group is None:
+            group = self._by_signature[signature] = _QuestionGroup(*signature)
+            self.groups.append(group)
+        group.questions.append((position, question))
+
+
+@dataclass
+class QuestionIndex:
+    """
+    Question buckets keyed by every filter pick_next_question accepts:
+    (unit_id, section_id), unit only, section only, and per skill.
+    """
+
+    all: _QuestionBucket = field(default_factory=_QuestionBucket)
+    by_unit_section: Dict[Tuple[str, str], _QuestionBucket] = field(default_factory=dict)
+    by_unit: Dict[str, _QuestionBucket] = field(default_factory=dict)
+    by_section: Dict[str, _QuestionBucket] = field(default_factory=dict)
+    by_skill: Dict[str, _QuestionBucket] = field(default_factory=dict)
+
+    def bucket(
+        self,
+        unit_id: Optional[str] = None,
+        section_id: Optional[str] = None,
+        skill_id: Optional[str] = None,
+    ) -> Optional[_QuestionBucket]:
+        if skill_id:
+            bucket = self.by_skill.get(skill_id)
+            if bucket is None or not (unit_id or section_id):
+                return bucket
+            # Rare combination: narrow the skill bucket by unit/section.
+            narrowed = _QuestionBucket()
+            for group in bucket.groups:
+                for position, question in group.questions:
+                    if (not unit_id or question.unit_id == unit_id) and (
+                        not section_id or question.section_id == section_id
+                    ):
+                        narrowed.add(position, question)
+            return narrowed
+        if unit_id and section_id:
+            return self.by_unit_section.get((unit_id, section_id))
+        if unit_id:
+            return self.by_unit.get(unit_id)
+        if section_id:
+            return self.by_section.get(section_id)
+        return self.all
+
+
+def _build_question_index(questions: Iterable[Question]) -> QuestionIndex:
+    index = QuestionIndex()
+    for position, question in enumerate(questions):
+        index.all.add(position, question)
+        index.by_unit_section.setdefault(
+            (question.unit_id, question.section_id), _QuestionBucket()
+        ).add(position, question)
+        index.by_unit.setdefault(question.unit_id, _QuestionBucket()).add(position, question)
+        index.by_section.setdefault(question.section_id, _QuestionBucket()).add(position, question)
+        for skill_id in dict.fromkeys(question.skill_ids or ()):
+            index.by_skill.setdefault(skill_id, _QuestionBucket()).add(position, question)
+    return index
+
+
+_question_index_lock = threading.Lock()
+_question_index_cache: Dict[str, object] = {"key": None, "index": None}
+
+
+def get_question_index() -> QuestionIndex:
+    """
+    Return the question index, rebuilt only when the catalog has changed.
+    """
+
+    key = get_catalog_version()
+    with _question_index_lock:
+        if _question_index_cache["key"] != key or _question_index_cache["index"] is None:
+            _question_index_cache["index"] = _build_question_index(load_questions().values())
+            _question_index_cache["key"] = key
+        return _question_index_cache["index"]
+
+
+def _group_score(group: _QuestionGroup, student: StudentState) -> float:
+    if not group.skill_ids:
+        score = 50.0
+    else:
+        vals = []
+        for s_id in group.skill_ids:
+            mastery = student.mastery_by_skill.get(s_id)
+            vals.append(mastery.pct if mastery else 0.0)
+        score = sum(vals) / len(vals)
+    if group.difficulty == student.preferred_difficulty:
+        score -= PREFERRED_DIFFICULTY_BONUS
+    return score
+
+
+def top_questions(
+    student: StudentState,
+    unit_id: Optional[str] = None,
+    section_id: Optional[str] = None,
+    skill_id: Optional[str] = None,
+    k: int = TOP_K,
+) -> List[Question]:
+    """
+    Return the ``k`` best-scoring questions (lowest mastery first, preferred
+    difficulty favoured), ties broken by catalog order.
+    """
+
+    bucket = get_question_index().bucket(unit_id, section_id, skill_id)
+    if bucket is None or not bucket.groups:
+        return []
+
+    scored_groups = sorted(
+        ((_group_score(group, student), group.questions[0][0], group) for group in bucket.groups),
+        key=lambda entry: (entry[0], entry[1]),
+    )
+    # Only groups scoring at most the k-th question's score can contribute.
+    candidates: List[Tuple[float, int, Question]] = []
+    threshold: Optional[float] = None
+    for score, _, group in scored_groups:
+        if threshold is not None and score > threshold:
+            break
+        # Questions in a group are in catalog order, so its first k suffice.
+        candidates.extend(
+            (score, position, question) for position, question in group.questions[:k]
+        )
+        if threshold is None and len(candidates) >= k:
+            threshold = score
+    return [question for _, _, question in heapq.nsmallest(k, candidates, key=lambda c: c[:2])]
 
 
 def pick_next_question(
     student: StudentState,
     unit_id: Optional[str] = None,
     section_id: Optional[str] = None,
+    skill_id: Optional[str] = None,
+    rng: Optional[random.Random] = None,
 ) -> Optional[Question]:
     """
     Simple next question strategy:
-    - filter by unit and section if provided
+    - filter by unit, section and/or skill if provided
     - prefer questions whose skills have lower mastery
     - within that, respect preferred difficulty if possible
+    - choose at random among the top 10 (pass ``rng`` for a seeded choice)
     """
-    all_questions = list(load_questions().values())
-    if unit_id:
-        all_questions = [q for q in all_questions if q.unit_id == unit_id]
-    if section_id:
-        all_questions = [q for q in all_questions if q.section_id == section_id]
 
-    if not all_questions:
+    top_n = top_questions(student, unit_id, section_id, skill_id)
+    if not top_n:
         return None
-
-    def mastery_score(q: Question) -> float:
-        if not q.skill_ids:
-            return 50.0
-        vals = []
-        for s_id in q.skill_ids:
-            mastery = student.mastery_by_skill.get(s_id)
-            vals.append(mastery.pct if mastery else 0.0)
-        return sum(vals) / len(vals)
-
-    preferred = student.preferred_difficulty
-    scored = []
-    for q in all_questions:
-        base = mastery_score(q)
-        if q.difficulty == preferred:
-            base -= 10.0
-        scored.append((base, q))
-
-    scored.sort(key=lambda t: t[0])
-    top_n = [q for _, q in scored[: min(10, len(scored))]]
-    return random.choice(top_n)
+    return (rng or random).choice(top_n)
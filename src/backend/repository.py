@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-import json
+import atexit
+import os
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 import time
 from datetime import datetime
 
+from .attempt_columns import AttemptColumns
+from .attempt_log import AttemptLog, AttemptTail
+from .attempt_snapshot import AttemptSnapshot, AttemptSnapshotWriter, read_manifest
+from .catalog import CatalogCache
+from .catalog_snapshot import CatalogLookups, build_lookups, load_snapshot
+from .metrics import record_hydrated
+from .storage import create_storage
+from .write_buffer import StudentWriteBuffer
 from .models import (
     Question,
     Quiz,
@@ -22,23 +33,8 @@ from .models import (
 
 
 BASE_DIR = Path(__file__).resolve().parent
-DATA_DIR = BASE_DIR / "data"
-DATA_DIR.mkdir(exist_ok=True)
-
-
-def _load_json(path: Path, default):
-    if not path.exists():
-        path.write_text(json.dumps(default, indent=2))
-        return default
-    try:
-        with path.open() as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return default
-
-
-def _save_json(path: Path, data) -> None:
-    path.write_text(json.dumps(data, indent=2))
+DATA_DIR = Path(os.environ.get("BITBYBIT_DATA_DIR") or BASE_DIR / "data")
+DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
 UNITS_PATH = DATA_DIR / "units.json"
@@ -47,8 +43,80 @@ QUIZZES_PATH = DATA_DIR / "quizzes.json"
 STUDENTS_PATH = DATA_DIR / "students.json"
 USERS_PATH = DATA_DIR / "users.json"
 ATTEMPTS_PATH = DATA_DIR / "attempts.json"
+ATTEMPTS_LOG_DIR = DATA_DIR / "attempts"
+SQLITE_PATH = Path(os.environ.get("BITBYBIT_SQLITE_PATH") or DATA_DIR / "bitbybit.sqlite3")
+STORAGE_BACKEND = os.environ.get("BITBYBIT_STORAGE_BACKEND", "json")
+# Student saves are group-committed; an interval of 0 writes every save through.
+STUDENT_FLUSH_BATCH = int(os.environ.get("BITBYBIT_STUDENT_FLUSH_BATCH", "64"))
+STUDENT_FLUSH_INTERVAL = float(os.environ.get("BITBYBIT_STUDENT_FLUSH_INTERVAL", "0.5"))
+# Server processes sharing the data directory. The student write buffer holds
+# whole rows and is single-writer, so with more than one it is turned off.
+SERVER_WORKERS = int(
+    os.environ.get("BITBYBIT_WORKERS") or os.environ.get("WEB_CONCURRENCY") or "1"
+)
+# Binary, memory-mapped copy of the attempt history used for full replays.
+ATTEMPT_SNAPSHOT_DIR = Path(
+    os.environ.get("BITBYBIT_ATTEMPT_SNAPSHOT_DIR") or DATA_DIR / "attempts.snapshot"
+)
+ATTEMPT_SNAPSHOT_ENABLED = os.environ.get("BITBYBIT_ATTEMPT_SNAPSHOT", "1") == "1"
+# Validated, pickled catalog built by `python -m src.backend.catalog_snapshot`.
+CATALOG_SNAPSHOT_PATH = Path(
+    os.environ.get("BITBYBIT_CATALOG_SNAPSHOT_PATH") or DATA_DIR / "catalog.snapshot"
+)
 MASTERY_QUIZ_TYPES = {"mini_quiz", "unit_test"}
 
+# attempts.json is only read once, to seed the log on first use.
+_attempt_log = AttemptLog(ATTEMPTS_LOG_DIR, legacy_path=ATTEMPTS_PATH)
+_storage = create_storage(
+    STORAGE_BACKEND,
+    students_path=STUDENTS_PATH,
+    users_path=USERS_PATH,
+    attempt_log=_attempt_log,
+    sqlite_path=SQLITE_PATH,
+)
+_student_writes = StudentWriteBuffer(
+    _storage,
+    max_pending=STUDENT_FLUSH_BATCH,
+    max_delay=STUDENT_FLUSH_INTERVAL if SERVER_WORKERS <= 1 else 0.0,
+)
+
+_catalog = CatalogCache()
+_catalog.register("units", UNITS_PATH, [], lambda raw: [Unit(**u) for u in raw])
+_catalog.register(
+    "questions", QUESTIONS_PATH, [], lambda raw: {q["id"]: Question(**q) for q in raw}
+)
+_catalog.register(
+    "quizzes", QUIZZES_PATH, [], lambda raw: {q["id"]: Quiz(**q) for q in raw}
+)
+_catalog_lookups_lock = threading.Lock()
+_catalog_lookups: Dict[str, Any] = {"version": None, "lookups": None}
+_catalog_source: Dict[str, Any] = {"source": "json", "snapshot_sha256": None}
+
+
+def _seed_catalog_from_snapshot() -> None:
+    """
+    Serve the catalog from the precompiled snapshot when one exists. Files
+    edited after the build are noticed by the catalog cache (stat, then
+    content hash) and re-read from JSON as usual.
+    """
+
+    snapshot = load_snapshot(CATALOG_SNAPSHOT_PATH)
+    if snapshot is None:
+        return
+    values = (
+        ("units", snapshot.units),
+        ("questions", snapshot.questions),
+        ("quizzes", snapshot.quizzes),
+    )
+    for name, value in values:
+        source = snapshot.sources[name]
+        _catalog.seed(name, value, source["sha1"], (source["mtime_ns"], source["size"]))
+    _catalog_lookups.update(version=_catalog.version, lookups=snapshot.lookups)
+    _catalog_source.update(source="snapshot", snapshot_sha256=snapshot.payload_sha256)
+
+
+_seed_catalog_from_snapshot()
+
 
 def _coerce_skill_mastery(skill_id: str, raw_value: Any) -> SkillMastery:
     """
@@ -71,27 +139,71 @@ def _coerce_skill_mastery(skill_id: str, raw_value: Any) -> SkillMastery:
     )
 
 
+def get_catalog_version() -> int:
+    """
+    Return a counter that changes whenever units, questions or quizzes are reloaded.
+    """
+
+    return _catalog.check()
+
+
+def get_catalog_validators() -> Tuple[str, Optional[float]]:
+    """
+    Return (fingerprint, last_modified) for the catalog files, for HTTP
+    conditional requests. Only stats the files; nothing is re-read unless a
+    file changed.
+    """
+
+    return _catalog.validators()
+
+
+def get_catalog_stats() -> Dict[str, Any]:
+    return {**_catalog.stats(), **_catalog_source}
+
+
+def _get_catalog_lookups() -> CatalogLookups:
+    """
+    Return the lookup tables for the current catalog version: the snapshot's
+    prebuilt tables until a file changes, then tables rebuilt from JSON.
+    """
+
+    version = _catalog.check()
+    with _catalog_lookups_lock:
+        if _catalog_lookups["version"] != version:
+            _catalog_lookups["lookups"] = build_lookups(
+                _catalog.get("units"), _catalog.get("questions"), _catalog.get("quizzes")
+            )
+            _catalog_lookups["version"] = version
+        return _catalog_lookups["lookups"]
+
+
 def load_units() -> List[Unit]:
-    raw = _load_json(UNITS_PATH, [])
-    return [Unit(**u) for u in raw]
+    # Objects are shared with the catalog cache; only the container is a copy.
+    return list(_catalog.get("units"))
 
 
 def load_unit(unit_id: str) -> Optional[Unit]:
-    return next((u for u in load_units() if u.id == unit_id), None)
+    return _get_catalog_lookups().units_by_id.get(unit_id)
 
 
 def load_questions() -> Dict[str, Question]:
-    raw = _load_json(QUESTIONS_PATH, [])
-    return {q["id"]: Question(**q) for q in raw}
+    return dict(_catalog.get("questions"))
 
 
 def load_quizzes() -> Dict[str, Quiz]:
-    raw = _load_json(QUIZZES_PATH, [])
-    return {q["id"]: Quiz(**q) for q in raw}
+    return dict(_catalog.get("quizzes"))
 
 
 def load_quiz(quiz_id: str) -> Optional[Quiz]:
-    return load_quizzes().get(quiz_id)
+    return _catalog.get("quizzes").get(quiz_id)
+
+
+def load_quiz_questions(quiz_id: str) -> List[Question]:
+    """
+    Return the quiz's questions in quiz order; unknown question ids are skipped.
+    """
+
+    return list(_get_catalog_lookups().quiz_questions.get(quiz_id, ()))
 
 
 def _deserialize_student_state(data: Dict[str, Any]) -> StudentState:
@@ -125,10 +237,10 @@ def _deserialize_student_state(data: Dict[str, Any]) -> StudentState:
 
 
 def load_student(student_id: str) -> Optional[StudentState]:
-    raw = _load_json(STUDENTS_PATH, {})
-    data = raw.get(student_id)
+    data = _student_writes.get(student_id) or _storage.load_student_row(student_id)
     if not data:
         return None
+    record_hydrated("students")
     return _deserialize_student_state(data)
 
 
@@ -137,15 +249,17 @@ def get_all_students() -> List[StudentState]:
     Return every student stored in students.json.
     """
 
-    raw = _load_json(STUDENTS_PATH, {})
+    raw = _storage.load_student_rows()
+    raw.update(_student_writes.pending())
     students = [_deserialize_student_state(data) for data in raw.values()]
+    record_hydrated("students", len(students))
     students.sort(key=lambda s: s.name.lower())
     return students
 
 
-def _next_student_id(raw: Dict[str, Any]) -> str:
+def _next_student_id(student_ids: List[str]) -> str:
     max_index = 1
-    for key in raw.keys():
+    for key in student_ids:
         if key.startswith("student-"):
             try:
                 idx = int(key.split("-", 1)[1])
@@ -160,85 +274,251 @@ def create_student(name: str, email: Optional[str] = None) -> StudentState:
     Create a new demo student entry with default data.
     """
 
-    raw = _load_json(STUDENTS_PATH, {})
-    student_id = _next_student_id(raw) if raw else "student-2"
-    normalized_name = name.strip() or f"Student {student_id}"
-    fallback_email = email or f"{student_id}@example.edu"
-    state = StudentState(
-        student_id=student_id,
-        name=normalized_name,
-        email=fallback_email,
-        grade_level="9",
-        preferred_difficulty="medium",
-        mastery_by_skill={},
-        skill_mastery={},
-        avatar_url=None,
-        avatar_name=None,
-    )
-    raw[student_id] = state.to_dict()
-    _save_json(STUDENTS_PATH, raw)
-    return state
+    created: List[StudentState] = []
+    # Buffered students must be on disk before the next id is allocated.
+    _student_writes.flush()
+
+    def build(student_ids: List[str]):
+        student_id = _next_student_id(student_ids) if student_ids else "student-2"
+        normalized_name = name.strip() or f"Student {student_id}"
+        fallback_email = email or f"{student_id}@example.edu"
+        state = StudentState(
+            student_id=student_id,
+            name=normalized_name,
+            email=fallback_email,
+            grade_level="9",
+            preferred_difficulty="medium",
+            mastery_by_skill={},
+            skill_mastery={},
+            avatar_url=None,
+            avatar_name=None,
+        )
+        created.append(state)
+        return student_id, state.to_dict()
+
+    _storage.create_student_row(build)
+    return created[0]
 
 
 def save_student(state: StudentState) -> None:
-    raw = _load_json(STUDENTS_PATH, {})
-    raw[state.student_id] = state.to_dict()
-    _save_json(STUDENTS_PATH, raw)
+    _student_writes.put(state.student_id, state.to_dict())
 
 
-def load_attempts(student_id: Optional[str] = None) -> List[Attempt]:
-    raw = _load_json(ATTEMPTS_PATH, [])
+def flush_student_writes() -> int:
+    """
+    Write buffered student saves to storage now; returns how many were written.
+    """
 
-    # normalize to a list of attempt dicts
-    if isinstance(raw, dict):
-        if student_id:
-            items = raw.get(student_id, [])
-        else:
-            items = [a for attempts in raw.values() for a in attempts]
-    else:
-        items = raw
+    return _student_writes.flush()
 
-    attempts: List[Attempt] = []
-    for item in items:
-        if student_id and item.get("student_id") != student_id:
-            continue
 
-        results: List[AttemptQuestionResult] = []
-        for r in item.get("results", []):
-            if isinstance(r, AttemptQuestionResult):
-                results.append(r)
-            else:
-                results.append(
-                    AttemptQuestionResult(
-                        question_id=r.get("question_id", ""),
-                        correct=bool(r.get("correct", False)),
-                        chosen_answer=r.get("chosen_answer", ""),
-                        time_sec=float(r.get("time_sec", 0)),
-                        used_hint=bool(r.get("used_hint", False)),
-                    )
-                )
+def get_student_write_stats() -> Dict[str, Any]:
+    return _student_writes.stats()
 
-        attempts.append(
-            Attempt(
-                id=item.get("id", ""),
-                student_id=item.get("student_id") or (student_id or ""),
-                quiz_id=item.get("quiz_id", ""),
-                quiz_type=item.get("quiz_type", ""),
-                unit_id=item.get("unit_id", ""),
-                section_id=item.get("section_id"),
-                score_pct=float(item.get("score_pct", 0)),
-                created_at=float(item.get("created_at", time.time())),
-                results=results,
+
+def _deserialize_attempt(item: Dict[str, Any]) -> Attempt:
+    results: List[AttemptQuestionResult] = []
+    for r in item.get("results", []):
+        if isinstance(r, AttemptQuestionResult):
+            results.append(r)
+        else:
+            results.append(
+                AttemptQuestionResult(
+                    question_id=r.get("question_id", ""),
+                    correct=bool(r.get("correct", False)),
+                    chosen_answer=r.get("chosen_answer", ""),
+                    time_sec=float(r.get("time_sec", 0)),
+                    used_hint=bool(r.get("used_hint", False)),
+                )
             )
-        )
 
+    return Attempt(
+        id=item.get("id", ""),
+        student_id=item.get("student_id", ""),
+        quiz_id=item.get("quiz_id", ""),
+        quiz_type=item.get("quiz_type", ""),
+        unit_id=item.get("unit_id", ""),
+        section_id=item.get("section_id"),
+        score_pct=float(item.get("score_pct", 0)),
+        created_at=float(item.get("created_at", time.time())),
+        results=results,
+    )
+
+
+def load_attempts(student_id: Optional[str] = None) -> List[Attempt]:
+    attempts = [_deserialize_attempt(item) for item in _storage.iter_attempt_rows(student_id)]
+    record_hydrated("attempts", len(attempts))
     return attempts
 
 
+def iter_attempts(student_id: Optional[str] = None) -> Iterator[Attempt]:
+    """
+    Yield attempts one at a time in storage order, for streaming responses.
+    """
+
+    for item in _storage.iter_attempt_rows(student_id):
+        record_hydrated("attempts")
+        yield _deserialize_attempt(item)
+
+
+def load_attempt_page(
+    student_id: str, limit: int, before: Optional[Tuple[float, str]] = None
+) -> Tuple[List[Attempt], Optional[Tuple[float, str]]]:
+    """
+    Return up to ``limit`` of the student's attempts older than ``before``
+    (a (created_at, id) key), newest first, plus the key for the next page,
+    or None when this is the last page.
+    """
+
+    rows = _storage.page_attempt_rows(student_id, before, limit + 1)
+    attempts = [_deserialize_attempt(item) for item in rows[:limit]]
+    record_hydrated("attempts", len(attempts))
+    if len(rows) <= limit:
+        return attempts, None
+    return attempts, (attempts[-1].created_at, attempts[-1].id)
+
+
+_attempt_listeners: List[Callable[[], None]] = []
+
+
+def register_attempt_listener(listener: Callable[[], None]) -> None:
+    """
+    Call ``listener`` after every append so incrementally maintained views
+    (difficulty table, rollups) can pull the new rows right away.
+    """
+
+    if listener not in _attempt_listeners:
+        _attempt_listeners.append(listener)
+
+
+def read_attempt_rows_since(cursor: Optional[Dict[str, Any]]) -> AttemptTail:
+    """
+    Return raw attempt dicts appended after ``cursor``; see AttemptTail.
+
+    A full replay (``cursor`` None) reads the binary attempt snapshot when
+    there is a current one and only parses the log rows written after it.
+    """
+
+    if cursor is None and ATTEMPT_SNAPSHOT_ENABLED:
+        snapshot = AttemptSnapshot.open(ATTEMPT_SNAPSHOT_DIR)
+        if snapshot is not None:
+            if snapshot.backend == _storage.name and snapshot.cursor is not None:
+                tail = _storage.read_attempts_since(snapshot.cursor)
+                if not tail.reset:
+                    combined = AttemptTail(True, tail.cursor)
+                    combined.rows = _snapshot_rows(snapshot, tail, combined)
+                    return combined
+                snapshot.close()
+                # The log was rewritten; the tail is everything.
+                return tail
+            snapshot.close()
+    return _storage.read_attempts_since(cursor)
+
+
+def _snapshot_rows(
+    snapshot: AttemptSnapshot, tail: AttemptTail, combined: AttemptTail
+) -> Iterator[Dict[str, Any]]:
+    try:
+        yield from snapshot.rows()
+        yield from tail
+    finally:
+        snapshot.close()
+    # Some backends only settle the tail cursor once its rows are consumed.
+    combined.cursor = tail.cursor
+
+
+# Writers keep their string lookup between refreshes, so one per target.
+_snapshot_writers: Dict[Tuple[Path, str], AttemptSnapshotWriter] = {}
+
+
+def refresh_attempt_snapshot() -> int:
+    """
+    Append attempts logged since the last refresh to the binary snapshot and
+    return how many were added.
+    """
+
+    key = (ATTEMPT_SNAPSHOT_DIR, _storage.name)
+    writer = _snapshot_writers.get(key)
+    if writer is None:
+        writer = _snapshot_writers[key] = AttemptSnapshotWriter(*key)
+    return writer.update(_storage.read_attempts_since)
+
+
+def _refresh_attempt_snapshot_at_exit() -> None:
+    # Only keep an existing snapshot current; the first (full) build is left
+    # to ``python -m src.backend.attempt_snapshot`` so short-lived processes
+    # never pay for it.
+    if ATTEMPT_SNAPSHOT_ENABLED and read_manifest(ATTEMPT_SNAPSHOT_DIR) is not None:
+        refresh_attempt_snapshot()
+
+
+atexit.register(_refresh_attempt_snapshot_at_exit)
+
+
 def append_attempt(attempt: Attempt) -> None:
-    raw = _load_json(ATTEMPTS_PATH, [])
-    raw.append(attempt.to_dict())
-    _save_json(ATTEMPTS_PATH, raw)
+    append_attempts([attempt])
+
+
+def append_attempts(attempts: List[Attempt]) -> None:
+    """
+    Persist several attempts with a single storage write.
+    """
+
+    if not attempts:
+        return
+    _storage.append_attempt_rows([attempt.to_dict() for attempt in attempts])
+    for listener in _attempt_listeners:
+        listener()
+
+
+def append_new_attempts(attempts: List[Attempt]) -> List[Attempt]:
+    """
+    Persist the attempts whose id is not stored for their student yet, with
+    the check and the write done atomically, and return the ones written.
+    """
+
+    if not attempts:
+        return []
+    by_key = {(attempt.student_id, attempt.id): attempt for attempt in attempts}
+    written = _storage.append_new_attempt_rows([attempt.to_dict() for attempt in attempts])
+    if written:
+        for listener in _attempt_listeners:
+            listener()
+    return [by_key[(row["student_id"], row["id"])] for row in written]
+
+
+_attempt_columns = AttemptColumns()
+
+
+def get_attempt_columns() -> AttemptColumns:
+    """
+    Return the columnar copy of the attempt history, built on first use (from
+    the binary snapshot when there is one) and caught up from the log tail on
+    every call.
+    """
+
+    return load_attempt_columns(_attempt_columns)
+
+
+def load_attempt_columns(columns: Optional[AttemptColumns] = None) -> AttemptColumns:
+    """
+    Fill ``columns`` (a new store by default) with the whole attempt history:
+    an empty store is loaded from the binary snapshot when there is one, then
+    caught up from the log tail. Full replays of the aggregates below seed
+    from this instead of walking every row in Python.
+    """
+
+    if columns is None:
+        columns = AttemptColumns()
+    if not len(columns) and ATTEMPT_SNAPSHOT_ENABLED:
+        snapshot = AttemptSnapshot.open(ATTEMPT_SNAPSHOT_DIR)
+        if snapshot is not None:
+            try:
+                if snapshot.backend == _storage.name and snapshot.cursor is not None:
+                    columns.load_snapshot(snapshot)
+            finally:
+                snapshot.close()
+    return columns.refresh(read_attempt_rows_since)
 
 
 def get_attempts_for_all_students() -> List[Attempt]:
@@ -291,45 +571,195 @@ def compute_unit_mastery_for_student(student_id: str) -> Dict[str, float]:
     return {unit_id: _average(scores) for unit_id, scores in mastery_by_unit.items()}
 
 
-def compute_teacher_student_summaries() -> List[TeacherStudentSummary]:
+def _average_of(total: float, count: int) -> float:
+    return round(total / count) if count else 0.0
+
+
+def _isoformat_timestamp(timestamp: float) -> str:
+    return datetime.utcfromtimestamp(timestamp).isoformat() + "Z"
+
+
+@dataclass
+class _StudentRollup:
+    mastery_total: float = 0.0
+    mastery_count: int = 0
+    questions_answered: int = 0
+    attempt_count: int = 0
+    hint_attempts: int = 0
+    last_activity: Optional[float] = None
+
+
+@dataclass
+class _UnitRollup:
+    attempt_count: int = 0
+    hint_attempts: int = 0
+    students: Set[str] = field(default_factory=set)
+    # student_id -> [mastery score total, mastery score count]
+    mastery_by_student: Dict[str, List[float]] = field(default_factory=dict)
+
+
+class TeacherRollups:
+    """
+    Per-student and per-unit aggregates behind the teacher dashboard, folded
+    in from the attempt log as attempts are recorded so building the overview
+    does not depend on how many attempts exist.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._cursor: Optional[Dict[str, Any]] = None
+        self.students: Dict[str, _StudentRollup] = {}
+        self.units: Dict[str, _UnitRollup] = {}
+
+    def refresh(self) -> "TeacherRollups":
+        with self._lock:
+            if self._cursor is None:
+                self._seed_from_columns()
+            tail = read_attempt_rows_since(self._cursor)
+            if tail.reset:
+                self.students = {}
+                self.units = {}
+            for row in tail:
+                self._observe(row)
+            self._cursor = tail.cursor
+            return self
+
+    def _seed_from_columns(self) -> None:
+        columns = load_attempt_columns()
+        self.students = {
+            student_id: _StudentRollup(
+                mastery_total=entry.mastery_total,
+                mastery_count=entry.mastery_count,
+                questions_answered=entry.questions_answered,
+                attempt_count=entry.attempt_count,
+                hint_attempts=entry.hint_attempts,
+                last_activity=entry.last_activity,
+            )
+            for student_id, entry in columns.student_totals(MASTERY_QUIZ_TYPES).items()
+        }
+        self.units = {
+            unit_id: _UnitRollup(
+                attempt_count=entry.attempt_count,
+                hint_attempts=entry.hint_attempts,
+                students=entry.students,
+                mastery_by_student=entry.mastery_by_student,
+            )
+            for unit_id, entry in columns.unit_totals(MASTERY_QUIZ_TYPES).items()
+        }
+        self._cursor = columns.cursor
+
+    def _observe(self, row: Dict[str, Any]) -> None:
+        student_id = row.get("student_id", "")
+        unit_id = row.get("unit_id", "")
+        score_pct = float(row.get("score_pct", 0))
+        created_at = float(row.get("created_at", time.time()))
+        results = row.get("results") or []
+        is_mastery = row.get("quiz_type", "") in MASTERY_QUIZ_TYPES
+        used_hint = any(bool(r.get("used_hint", False)) for r in results)
+
+        student = self.students.get(student_id)
+        if student is None:
+            student = self.students[student_id] = _StudentRollup()
+        student.attempt_count += 1
+        student.questions_answered += len(results)
+        student.hint_attempts += int(used_hint)
+        if student.last_activity is None or created_at > student.last_activity:
+            student.last_activity = created_at
+        if is_mastery:
+            student.mastery_total += score_pct
+            student.mastery_count += 1
+
+        if not unit_id:
+            return
+        unit = self.units.get(unit_id)
+        if unit is None:
+            unit = self.units[unit_id] = _UnitRollup()
+        unit.attempt_count += 1
+        unit.hint_attempts += int(used_hint)
+        unit.students.add(student_id)
+        if is_mastery:
+            entry = unit.mastery_by_student.setdefault(student_id, [0.0, 0])
+            entry[0] += score_pct
+            entry[1] += 1
+
+
+_teacher_rollups = TeacherRollups()
+register_attempt_listener(_teacher_rollups.refresh)
+
+
+def compute_teacher_student_summaries(
+    students: Optional[List[StudentState]] = None,
+) -> List[TeacherStudentSummary]:
     """
     Build teacher-facing metrics for every student in the system.
     """
 
-    students = {student.student_id: student for student in get_all_students()}
-    attempts = get_attempts_for_all_students()
-    attempts_by_student: Dict[str, List[Attempt]] = {}
+    students_by_id = {
+        student.student_id: student
+        for student in (students if students is not None else get_all_students())
+    }
+    rollups = _teacher_rollups.refresh()
+    with rollups._lock:
+        return _student_summaries_from_rollups(students_by_id, rollups.students)
+
 
-    for attempt in attempts:
-        attempts_by_student.setdefault(attempt.student_id, []).append(attempt)
-        if attempt.student_id not in students:
-            students[attempt.student_id] = StudentState(
-                student_id=attempt.student_id,
-                name=f"Student {attempt.student_id}",
+def compute_teacher_student_summaries_from_columns(
+    students: Optional[List[StudentState]] = None,
+) -> List[TeacherStudentSummary]:
+    """
+    compute_teacher_student_summaries over the columnar attempt store, for
+    full recomputation without the incremental rollups.
+    """
+
+    students_by_id = {
+        student.student_id: student
+        for student in (students if students is not None else get_all_students())
+    }
+    totals = get_attempt_columns().student_totals(MASTERY_QUIZ_TYPES)
+    return _student_summaries_from_rollups(
+        students_by_id,
+        {
+            student_id: _StudentRollup(
+                mastery_total=entry.mastery_total,
+                mastery_count=entry.mastery_count,
+                questions_answered=entry.questions_answered,
+                attempt_count=entry.attempt_count,
+                hint_attempts=entry.hint_attempts,
+                last_activity=entry.last_activity,
+            )
+            for student_id, entry in totals.items()
+        },
+    )
+
+
+def _student_summaries_from_rollups(
+    students_by_id: Dict[str, StudentState],
+    student_rollups: Dict[str, _StudentRollup],
+) -> List[TeacherStudentSummary]:
+    for student_id in student_rollups:
+        if student_id not in students_by_id:
+            students_by_id[student_id] = StudentState(
+                student_id=student_id,
+                name=f"Student {student_id}",
             )
 
     summaries: List[TeacherStudentSummary] = []
-    for student_id, student in students.items():
-        student_attempts = attempts_by_student.get(student_id, [])
-        mastery_scores = _mastery_scores_for_attempts(student_attempts)
-        questions_answered = sum(len(a.results or []) for a in student_attempts)
-        attempt_count = len(student_attempts)
-        hint_attempts = sum(
-            1 for attempt in student_attempts if any(r.used_hint for r in attempt.results)
+    empty = _StudentRollup()
+    for student_id, student in students_by_id.items():
+        rollup = student_rollups.get(student_id, empty)
+        attempt_count = rollup.attempt_count
+        hint_rate = (rollup.hint_attempts / attempt_count) if attempt_count else None
+        last_activity = (
+            _isoformat_timestamp(rollup.last_activity)
+            if rollup.last_activity is not None
+            else None
         )
-        hint_rate = (hint_attempts / attempt_count) if attempt_count else None
-        last_activity = None
-        if student_attempts:
-            last_attempt = max(student_attempts, key=lambda a: a.created_at)
-            last_activity = (
-                datetime.utcfromtimestamp(last_attempt.created_at).isoformat() + "Z"
-            )
         summaries.append(
             TeacherStudentSummary(
                 student_id=student.student_id,
                 name=student.name,
-                overall_mastery=_average(mastery_scores),
-                questions_answered=questions_answered,
+                overall_mastery=_average_of(rollup.mastery_total, rollup.mastery_count),
+                questions_answered=rollup.questions_answered,
                 attempt_count=attempt_count,
                 last_activity_at=last_activity,
                 hint_usage_rate=hint_rate,
@@ -345,52 +775,66 @@ def compute_teacher_unit_summaries() -> List[TeacherUnitSummary]:
     Aggregate mastery and activity information per unit.
     """
 
-    units = load_units()
-    attempts = get_attempts_for_all_students()
-    attempts_by_unit: Dict[str, List[Attempt]] = {}
-    mastery_by_unit_student: Dict[str, Dict[str, List[float]]] = {}
+    rollups = _teacher_rollups.refresh()
+    with rollups._lock:
+        return _unit_summaries_from_rollups(load_units(), rollups.units)
 
-    for attempt in attempts:
-        if not attempt.unit_id:
-            continue
-        attempts_by_unit.setdefault(attempt.unit_id, []).append(attempt)
-        if attempt.quiz_type in MASTERY_QUIZ_TYPES:
-            mastery_by_unit_student.setdefault(attempt.unit_id, {}).setdefault(
-                attempt.student_id, []
-            ).append(attempt.score_pct)
 
+def compute_teacher_unit_summaries_from_columns() -> List[TeacherUnitSummary]:
+    """
+    compute_teacher_unit_summaries over the columnar attempt store.
+    """
+
+    totals = get_attempt_columns().unit_totals(MASTERY_QUIZ_TYPES)
+    return _unit_summaries_from_rollups(load_units(), totals)
+
+
+def _unit_summaries_from_rollups(
+    units: List[Unit], unit_rollups: Dict[str, Any]
+) -> List[TeacherUnitSummary]:
+    # Values are _UnitRollup or the columnar UnitTotals; both have the same fields.
     summaries: List[TeacherUnitSummary] = []
+    empty = _UnitRollup()
     for unit in units:
-        unit_attempts = attempts_by_unit.get(unit.id, [])
-        students_with_activity = {a.student_id for a in unit_attempts}
-        mastery_entries = mastery_by_unit_student.get(unit.id, {})
+        rollup = unit_rollups.get(unit.id, empty)
         per_student_mastery = [
-            _average(scores) for scores in mastery_entries.values() if scores
+            _average_of(total, count)
+            for total, count in rollup.mastery_by_student.values()
+            if count
         ]
-        hint_attempts = sum(
-            1 for attempt in unit_attempts if any(r.used_hint for r in attempt.results)
+        hint_rate = (
+            (rollup.hint_attempts / rollup.attempt_count) if rollup.attempt_count else None
         )
-        hint_rate = (hint_attempts / len(unit_attempts)) if unit_attempts else None
         summaries.append(
             TeacherUnitSummary(
                 unit_id=unit.id,
                 unit_name=unit.title,
                 average_mastery=_average(per_student_mastery),
-                attempt_count=len(unit_attempts),
-                student_count=len(students_with_activity),
+                attempt_count=rollup.attempt_count,
+                student_count=len(rollup.students),
                 hint_usage_rate=hint_rate,
             )
         )
-
     return summaries
 
 
-def get_next_activity_for_student(student_id: str) -> NextActivity:
-    units = load_units()
+def get_next_activity_for_student(
+    student_id: str,
+    attempts: Optional[List[Attempt]] = None,
+    units: Optional[List[Unit]] = None,
+) -> NextActivity:
+    """
+    Rule-based next activity. Callers that already hold the student's
+    attempts or the units (e.g. batch recommendations) can pass them in.
+    """
+
+    if units is None:
+        units = load_units()
     if not units:
         return NextActivity(unit_id="", section_id=None, activity="diagnostic")
 
-    attempts = load_attempts(student_id)
+    if attempts is None:
+        attempts = load_attempts(student_id)
     diag_taken_units: Set[str] = {
         a.unit_id for a in attempts if a.quiz_type == "diagnostic" and a.unit_id
     }
@@ -502,11 +946,7 @@ def get_user_by_email(email: str) -> Optional[User]:
     normalized = (email or "").strip().lower()
     if not normalized:
         return None
-    raw = _load_json(USERS_PATH, [])
-    for entry in raw:
-        entry_email = (entry.get("email") or "").strip().lower()
-        if entry_email != normalized:
-            continue
+    for entry in _storage.find_user_rows(normalized):
         try:
             return User(
                 id=entry["id"],
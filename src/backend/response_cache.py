@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import gzip
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+@dataclass(frozen=True)
+class RenderedBody:
+    raw: bytes
+    gzipped: bytes
+
+
+class RenderedResponseCache:
+    """
+    Bounded LRU of fully rendered response bodies, each kept both as is and
+    gzip-compressed. Keys should include the catalog version so edits to the
+    catalog never serve stale bytes; old versions simply age out.
+    """
+
+    def __init__(self, max_entries: int = 256, compresslevel: int = 6) -> None:
+        self.max_entries = max_entries
+        self.compresslevel = compresslevel
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, RenderedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(
+        self, key: Hashable, render: Callable[[], Optional[bytes]]
+    ) -> Optional[RenderedBody]:
+        """
+        Return the cached body for ``key``, calling ``render`` on a miss. A
+        ``render`` result of None (e.g. not found) is returned but not cached.
+        """
+
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+            self.misses += 1
+
+        raw = render()
+        if raw is None:
+            return None
+        body = RenderedBody(raw, gzip.compress(raw, compresslevel=self.compresslevel, mtime=0))
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "bytes": sum(len(b.raw) + len(b.gzipped) for b in self._entries.values()),
+            }
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import heapq
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .attempt_log import AttemptLog, AttemptTail
+from .fsutil import atomic_write_bytes, file_lock, lock_path_for
+from .metrics import record_read, record_write
+
+BACKEND_CHOICES = ("json", "sqlite")
+
+
+def _load_json(path: Path, default):
+    if not path.exists():
+        with file_lock(lock_path_for(path)):
+            if not path.exists():
+                _save_json(path, default)
+                return default
+    content = path.read_bytes()
+    record_read(path.name, len(content))
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return default
+
+
+def _save_json(path: Path, data) -> None:
+    # Callers doing read-modify-write must hold file_lock(lock_path_for(path)).
+    content = json.dumps(data, indent=2).encode("utf-8")
+    atomic_write_bytes(path, content)
+    record_write(path.name, len(content))
+
+
+def _page_key(row: Dict[str, Any]) -> Tuple[float, str]:
+    return (float(row.get("created_at", 0) or 0), str(row.get("id", "")))
+
+
+def _normalize_email(email: Optional[str]) -> str:
+    return (email or "").strip().lower()
+
+
+class JsonStorage:
+    """
+    Default backend: students and users in JSON documents, attempts in the
+    append-only attempt log.
+    """
+
+    name = "json"
+
+    def __init__(self, students_path: Path, users_path: Path, attempt_log: AttemptLog) -> None:
+        self.students_path = students_path
+        self.users_path = users_path
+        self.attempt_log = attempt_log
+
+    def load_student_row(self, student_id: str) -> Optional[Dict[str, Any]]:
+        return _load_json(self.students_path, {}).get(student_id)
+
+    def load_student_rows(self) -> Dict[str, Dict[str, Any]]:
+        return _load_json(self.students_path, {})
+
+    def save_student_row(self, student_id: str, row: Dict[str, Any]) -> None:
+        self.save_student_rows({student_id: row})
+
+    def save_student_rows(self, rows: Dict[str, Dict[str, Any]]) -> None:
+        with file_lock(lock_path_for(self.students_path)):
+            raw = _load_json(self.students_path, {})
+            raw.update(rows)
+            _save_json(self.students_path, raw)
+
+    def create_student_row(
+        self, build: Callable[[List[str]], Tuple[str, Dict[str, Any]]]
+    ) -> None:
+        """
+        Allocate and insert a new student atomically; ``build`` receives the
+        existing ids and returns the new (student_id, row).
+        """
+
+        with file_lock(lock_path_for(self.students_path)):
+            raw = _load_json(self.students_path, {})
+            student_id, row = build(list(raw.keys()))
+            raw[student_id] = row
+            _save_json(self.students_path, raw)
+
+    def iter_attempt_rows(self, student_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        if student_id:
+            return iter(self.attempt_log.rows_for_student(student_id))
+        return self.attempt_log.iter_rows()
+
+    def page_attempt_rows(
+        self, student_id: str, before: Optional[Tuple[float, str]], limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Return up to ``limit`` of the student's attempts with (created_at, id)
+        below ``before``, newest first.
+        """
+
+        rows: Iterable[Dict[str, Any]] = self.attempt_log.rows_for_student(student_id)
+        if before is not None:
+            rows = (row for row in rows if _page_key(row) < before)
+        return heapq.nlargest(limit, rows, key=_page_key)
+
+    def append_attempt_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self.attempt_log.append_many(rows)
+
+    def append_new_attempt_rows(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.attempt_log.append_absent(rows)
+
+    def read_attempts_since(self, cursor: Optional[Dict[str, Any]]) -> AttemptTail:
+        return self.attempt_log.read_since(cursor)
+
+    def find_user_rows(self, email: str) -> List[Dict[str, Any]]:
+        normalized = _normalize_email(email)
+        return [
+            entry
+            for entry in _load_json(self.users_path, [])
+            if _normalize_email(entry.get("email")) == normalized
+        ]
+
+    def load_user_rows(self) -> List[Dict[str, Any]]:
+        return _load_json(self.users_path, [])
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    student_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users (email);
+CREATE TABLE IF NOT EXISTS attempts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    quiz_id TEXT NOT NULL,
+    quiz_type TEXT NOT NULL,
+    unit_id TEXT,
+    section_id TEXT,
+    score_pct REAL NOT NULL,
+    created_at REAL NOT NULL,
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_attempts_student_created ON attempts (student_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_attempts_unit_type ON attempts (unit_id, quiz_type);
+CREATE INDEX IF NOT EXISTS idx_attempts_student_id ON attempts (student_id, id);
+"""
+
+_ATTEMPT_COLUMNS = (
+    "id",
+    "student_id",
+    "quiz_id",
+    "quiz_type",
+    "unit_id",
+    "section_id",
+    "score_pct",
+    "created_at",
+    "results",
+)
+
+
+def _attempt_values(row: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        row.get("id", ""),
+        row.get("student_id", ""),
+        row.get("quiz_id", ""),
+        row.get("quiz_type", ""),
+        row.get("unit_id"),
+        row.get("section_id"),
+        float(row.get("score_pct", 0)),
+        float(row.get("created_at", 0)),
+        json.dumps(row.get("results", [])),
+    )
+
+
+def _attempt_row(values) -> Dict[str, Any]:
+    row = dict(zip(_ATTEMPT_COLUMNS, values))
+    row["results"] = json.loads(row["results"] or "[]")
+    return row
+
+
+class SqliteStorage:
+    """
+    SQLite backend (WAL mode) with indexed lookups for attempts by student and
+    by unit/quiz type, and users by email. Connections are per thread.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SQLITE_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def load_student_row(self, student_id: str) -> Optional[Dict[str, Any]]:
+        row = self.connection().execute(
+            "SELECT data FROM students WHERE student_id = ?", (student_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_student_rows(self) -> Dict[str, Dict[str, Any]]:
+        rows = self.connection().execute("SELECT student_id, data FROM students")
+        return {student_id: json.loads(data) for student_id, data in rows}
+
+    def save_student_row(self, student_id: str, row: Dict[str, Any]) -> None:
+        self.save_student_rows({student_id: row})
+
+    def save_student_rows(self, rows: Dict[str, Dict[str, Any]]) -> None:
+        conn = self.connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO students (student_id, data) VALUES (?, ?) "
+                "ON CONFLICT(student_id) DO UPDATE SET data = excluded.data",
+                [(student_id, json.dumps(row)) for student_id, row in rows.items()],
+            )
+
+    def create_student_row(
+        self, build: Callable[[List[str]], Tuple[str, Dict[str, Any]]]
+    ) -> None:
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            student_ids = [row[0] for row in conn.execute("SELECT student_id FROM students")]
+            student_id, row = build(student_ids)
+            conn.execute(
+                "INSERT INTO students (student_id, data) VALUES (?, ?)",
+                (student_id, json.dumps(row)),
+            )
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def iter_attempt_rows(self, student_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        columns = ", ".join(_ATTEMPT_COLUMNS)
+        if student_id:
+            cursor = self.connection().execute(
+                f"SELECT {columns} FROM attempts WHERE student_id = ? ORDER BY seq",
+                (student_id,),
+            )
+        else:
+            cursor = self.connection().execute(f"SELECT {columns} FROM attempts ORDER BY seq")
+        for values in cursor:
+            yield _attempt_row(values)
+
+    def page_attempt_rows(
+        self, student_id: str, before: Optional[Tuple[float, str]], limit: int
+    ) -> List[Dict[str, Any]]:
+        columns = ", ".join(_ATTEMPT_COLUMNS)
+        if before is None:
+            cursor = self.connection().execute(
+                f"SELECT {columns} FROM attempts WHERE student_id = ? "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (student_id, limit),
+            )
+        else:
+            cursor = self.connection().execute(
+                f"SELECT {columns} FROM attempts WHERE student_id = ? "
+                "AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+                (student_id, before[0], before[1], limit),
+            )
+        return [_attempt_row(values) for values in cursor]
+
+    def read_attempts_since(self, cursor: Optional[Dict[str, Any]]) -> AttemptTail:
+        last_seq = int((cursor or {}).get("seq", 0))
+        (max_seq,) = self.connection().execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM attempts"
+        ).fetchone()
+        reset = cursor is None or "seq" not in cursor or max_seq < last_seq
+        if reset:
+            last_seq = 0
+        tail = AttemptTail(reset, {"seq": last_seq})
+        tail.rows = self._tail_rows(tail, last_seq, max_seq)
+        return tail
+
+    def _tail_rows(self, tail: AttemptTail, after: int, upto: int) -> Iterator[Dict[str, Any]]:
+        cursor = self.connection().execute(
+            f"SELECT {', '.join(_ATTEMPT_COLUMNS)} FROM attempts "
+            "WHERE seq > ? AND seq <= ? ORDER BY seq",
+            (after, upto),
+        )
+        for values in cursor:
+            yield _attempt_row(values)
+        tail.cursor = {"seq": upto}
+
+    def append_attempt_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        values = [_attempt_values(row) for row in rows]
+        if not values:
+            return
+        placeholders = ", ".join("?" for _ in _ATTEMPT_COLUMNS)
+        conn = self.connection()
+        with conn:
+            conn.executemany(
+                f"INSERT INTO attempts ({', '.join(_ATTEMPT_COLUMNS)}) VALUES ({placeholders})",
+                values,
+            )
+
+    def append_new_attempt_rows(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert the rows whose id is not stored for their student yet and
+        return them; the existence check and the insert share one write
+        transaction.
+        """
+
+        rows = list(rows)
+        if not rows:
+            return []
+        placeholders = ", ".join("?" for _ in _ATTEMPT_COLUMNS)
+        statement = (
+            f"INSERT INTO attempts ({', '.join(_ATTEMPT_COLUMNS)}) SELECT {placeholders} "
+            "WHERE NOT EXISTS (SELECT 1 FROM attempts WHERE student_id = ? AND id = ?)"
+        )
+        fresh = []
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for row in rows:
+                values = _attempt_values(row)
+                if conn.execute(statement, (*values, values[1], values[0])).rowcount:
+                    fresh.append(row)
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        return fresh
+
+    def find_user_rows(self, email: str) -> List[Dict[str, Any]]:
+        rows = self.connection().execute(
+            "SELECT data FROM users WHERE email = ?", (_normalize_email(email),)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def load_user_rows(self) -> List[Dict[str, Any]]:
+        return [json.loads(data) for (data,) in self.connection().execute("SELECT data FROM users")]
+
+    def save_user_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        conn = self.connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO users (id, email, data) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET email = excluded.email, data = excluded.data",
+                [
+                    (row["id"], _normalize_email(row.get("email")), json.dumps(row))
+                    for row in rows
+                    if row.get("id")
+                ],
+            )
+
+
+def create_storage(
+    backend: str,
+    students_path: Path,
+    users_path: Path,
+    attempt_log: AttemptLog,
+    sqlite_path: Path,
+):
+    backend = (backend or "json").strip().lower()
+    if backend == "json":
+        return JsonStorage(students_path, users_path, attempt_log)
+    if backend == "sqlite":
+        return SqliteStorage(sqlite_path)
+    raise ValueError(
+        f"Unknown storage backend {backend!r}; expected one of {', '.join(BACKEND_CHOICES)}"
+    )
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from .models import Attempt, Question, Quiz, StudentState, Unit
+from .repository import (
+    append_attempts,
+    append_new_attempts,
+    get_catalog_version,
+    load_attempts,
+    load_questions,
+    load_quizzes,
+    load_student,
+    load_units,
+    save_student,
+)
+
+
+class UnitOfWork:
+    """
+    Request-scoped memo of repository reads: each dataset is loaded at most
+    once per unit of work, however many handlers and ML helpers ask for it.
+    Writes made through it keep the memo consistent (saved students are
+    remembered, appended attempts drop the affected attempt lists and any
+    memoized derived data such as the difficulty table).
+
+    Create one per request; it is not meant to outlive the data it caches.
+    """
+
+    # Memo keys derived from attempts, dropped whenever attempts are appended.
+    ATTEMPT_DERIVED_KEYS = ("difficulty_table",)
+
+    def __init__(self) -> None:
+        self._memo: Dict[Hashable, Any] = {}
+        self.loads = 0
+        self.hits = 0
+
+    def memo(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        if key in self._memo:
+            self.hits += 1
+            return self._memo[key]
+        self.loads += 1
+        value = self._memo[key] = loader()
+        return value
+
+    def forget(self, key: Hashable) -> None:
+        self._memo.pop(key, None)
+
+    def catalog_version(self) -> int:
+        return self.memo("catalog_version", get_catalog_version)
+
+    def units(self) -> List[Unit]:
+        return self.memo("units", load_units)
+
+    def unit(self, unit_id: str) -> Optional[Unit]:
+        return next((u for u in self.units() if u.id == unit_id), None)
+
+    def questions(self) -> Dict[str, Question]:
+        return self.memo("questions", load_questions)
+
+    def quizzes(self) -> Dict[str, Quiz]:
+        return self.memo("quizzes", load_quizzes)
+
+    def quiz(self, quiz_id: str) -> Optional[Quiz]:
+        return self.quizzes().get(quiz_id)
+
+    def student(self, student_id: str) -> Optional[StudentState]:
+        return self.memo(("student", student_id), lambda: load_student(student_id))
+
+    def attempts(self, student_id: str) -> List[Attempt]:
+        return self.memo(("attempts", student_id), lambda: load_attempts(student_id))
+
+    def save_student(self, state: StudentState) -> None:
+        save_student(state)
+        self._memo[("student", state.student_id)] = state
+
+    def append_attempts(self, attempts: List[Attempt]) -> None:
+        append_attempts(attempts)
+        self._forget_attempts(attempts)
+
+    def append_new_attempts(self, attempts: List[Attempt]) -> List[Attempt]:
+        written = append_new_attempts(attempts)
+        self._forget_attempts(written)
+        return written
+
+    def _forget_attempts(self, attempts: List[Attempt]) -> None:
+        for attempt in attempts:
+            self.forget(("attempts", attempt.student_id))
+        for key in self.ATTEMPT_DERIVED_KEYS:
+            self.forget(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {"loads": self.loads, "hits": self.hits}
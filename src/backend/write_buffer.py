@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class StudentWriteBuffer:
+    """
+    Write-behind buffer for student rows.
+
+    ``put`` records the latest row for a student and returns immediately;
+    dirty rows are written to storage in one batch once ``max_pending``
+    students are dirty, once the oldest dirty row is ``max_delay`` seconds
+    old, or at interpreter exit. ``get`` serves pending rows first so reads in
+    this process always see its own writes. Other processes see them after
+    the next flush. A ``max_delay`` of 0 makes every ``put`` write through.
+
+    The buffer is single-writer: a flush replaces whole rows, so a row
+    buffered here would overwrite a newer one saved meanwhile by another
+    process. With several server workers it must write through, which the
+    repository does when ``BITBYBIT_WORKERS`` (or ``WEB_CONCURRENCY``) is
+    above 1.
+    """
+
+    def __init__(self, storage, max_pending: int = 64, max_delay: float = 0.5) -> None:
+        self.storage = storage
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self.flushes = 0
+        self.rows_written = 0
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._oldest: Optional[float] = None
+        atexit.register(self.flush)
+
+    def put(self, student_id: str, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending[student_id] = row
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if self.max_delay <= 0 or len(self._pending) >= self.max_pending:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def get(self, student_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._pending.get(student_id)
+
+    def pending(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> int:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return 0
+            rows = self._pending
+            # Keep the rows visible until they are durable, then swap in a
+            # fresh dict so a failed write leaves them pending.
+            self.storage.save_student_rows(rows)
+            self._pending = {}
+            self._oldest = None
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "flushes": self.flushes,
+                "rows_written": self.rows_written,
+                "oldest_pending_sec": (
+                    round(time.monotonic() - self._oldest, 3) if self._oldest is not None else None
+                ),
+            }
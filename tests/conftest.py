@@ -0,0 +1,90 @@
+"""
+The backend reads its configuration when it is imported, so the data
+directory is pointed at a scratch copy of the catalog before any test module
+imports it. Tests that need their own directory (e.g. the multi-process
+ones) build one with ``make_data_dir``.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+SOURCE_DATA_DIR = ROOT / "src" / "backend" / "data"
+CATALOG_FILES = ("units.json", "questions.json", "quizzes.json", "users.json")
+
+sys.path.insert(0, str(ROOT))
+
+
+def make_data_dir(path: Path) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    for name in CATALOG_FILES:
+        shutil.copy(SOURCE_DATA_DIR / name, path / name)
+    (path / "students.json").write_text("{}")
+    (path / "attempts.json").write_text("[]")
+    return path
+
+
+def new_student_id() -> str:
+    # Tests share one data directory, so every test writes to fresh students.
+    return f"test-{uuid.uuid4().hex[:12]}"
+
+
+def attempt_payload(student_id: str, i: int, **extra: Any) -> Dict[str, Any]:
+    """
+    A one-question attempt for POST /api/attempts, cycling through the
+    catalog's questions; ``extra`` adds or overrides fields.
+    """
+
+    from src.backend.repository import load_questions
+
+    questions = list(load_questions().values())
+    question = questions[i % len(questions)]
+    return {
+        "student_id": student_id,
+        "quiz_id": "test",
+        "quiz_type": "practice",
+        "unit_id": question.unit_id,
+        "section_id": question.section_id,
+        "score_pct": 100.0 if i % 2 else 0.0,
+        "results": [
+            {
+                "question_id": question.id,
+                "correct": bool(i % 2),
+                "chosen_answer": question.correct_answer,
+                "time_sec": 5,
+            }
+        ],
+        **extra,
+    }
+
+
+_session_dir = make_data_dir(Path(tempfile.mkdtemp(prefix="bitbybit-tests-")))
+# Registered before the backend is imported so it runs after the backend's
+# own exit hooks.
+atexit.register(shutil.rmtree, _session_dir, ignore_errors=True)
+os.environ["BITBYBIT_DATA_DIR"] = str(_session_dir)
+os.environ["BITBYBIT_STORAGE_BACKEND"] = "json"
+os.environ["BITBYBIT_STUDENT_FLUSH_INTERVAL"] = "0"
+os.environ.pop("BITBYBIT_SQLITE_PATH", None)
+os.environ.pop("BITBYBIT_WORKERS", None)
+os.environ.pop("WEB_CONCURRENCY", None)
+os.environ.pop("BITBYBIT_ATTEMPT_SNAPSHOT_DIR", None)
+os.environ.pop("BITBYBIT_CATALOG_SNAPSHOT_PATH", None)
+os.environ.pop("BITBYBIT_PROFILE_SAMPLE_RATE", None)
+
+
+@pytest.fixture
+def client():
+    from src.backend.main import create_app
+
+    return create_app().test_client()
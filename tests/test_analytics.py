@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import random
+import uuid
+from datetime import datetime
+from typing import Dict, List
+
+import pytest
+
+from src.backend import attempt_columns, repository
+from src.backend.attempt_snapshot import AttemptSnapshotWriter
+from src.backend.ml.difficulty import (
+    DifficultyTable,
+    estimate_question_difficulty,
+    estimate_question_difficulty_from_columns,
+)
+from src.backend.models import (
+    Attempt,
+    AttemptQuestionResult,
+    StudentState,
+    TeacherStudentSummary,
+    TeacherUnitSummary,
+)
+from src.backend.repository import (
+    MASTERY_QUIZ_TYPES,
+    TeacherRollups,
+    append_attempts,
+    compute_teacher_student_summaries,
+    compute_teacher_student_summaries_from_columns,
+    compute_teacher_unit_summaries,
+    compute_teacher_unit_summaries_from_columns,
+    get_all_students,
+    load_attempt_columns,
+    load_attempts,
+    load_questions,
+    load_units,
+)
+
+QUIZ_TYPES = ["diagnostic", "practice", "mini_quiz", "unit_test"]
+
+
+def _history(count: int, seed: int) -> List[Attempt]:
+    """
+    Attempts from a handful of fresh students across quiz types, with hints,
+    unknown questions and attempts without a unit mixed in.
+    """
+
+    rng = random.Random(seed)
+    question_ids = [*load_questions(), "unknown-question"]
+    unit_ids = [unit.id for unit in load_units()] + [""]
+    students = [f"analytics-{uuid.uuid4().hex[:8]}" for _ in range(4)]
+    attempts = []
+    for i in range(count):
+        results = [
+            AttemptQuestionResult(
+                question_id=rng.choice(question_ids),
+                correct=rng.random() < 0.6,
+                chosen_answer="a",
+                time_sec=rng.choice([0, 5, 30, 120]),
+                used_hint=rng.random() < 0.2,
+            )
+            for _ in range(rng.randrange(4))
+        ]
+        attempts.append(
+            Attempt(
+                id=f"analytics-{seed}-{i}",
+                student_id=rng.choice(students),
+                quiz_id="analytics",
+                quiz_type=rng.choice(QUIZ_TYPES),
+                unit_id=rng.choice(unit_ids),
+                section_id=None,
+                score_pct=float(rng.randrange(101)),
+                created_at=1_700_000_000.0 + rng.randrange(10_000),
+                results=results,
+            )
+        )
+    return attempts
+
+
+def _full_difficulty():
+    return list(estimate_question_difficulty(load_attempts(), load_questions()).items())
+
+
+def test_difficulty_table_matches_full_estimate(tmp_path):
+    snapshot_path = tmp_path / "difficulty_table.json"
+    append_attempts(_history(40, seed=1))
+    table = DifficultyTable(snapshot_path, snapshot_every=10)
+    assert list(table.refresh().lookup().items()) == _full_difficulty()
+
+    for batch in range(3):
+        append_attempts(_history(15, seed=10 + batch))
+        assert list(table.refresh().lookup().items()) == _full_difficulty()
+
+    # A restart resumes from the saved sums plus the log tail...
+    table.save_snapshot()
+    append_attempts(_history(10, seed=20))
+    restarted = DifficultyTable(snapshot_path)
+    assert list(restarted.refresh().lookup().items()) == _full_difficulty()
+    # ...and a fresh replay of the whole log agrees as well.
+    assert list(DifficultyTable().refresh().lookup().items()) == _full_difficulty()
+
+
+def _average(scores: List[float]) -> float:
+    return round(sum(scores) / len(scores)) if scores else 0.0
+
+
+def _full_student_summaries() -> List[TeacherStudentSummary]:
+    # The full scan the teacher dashboard ran before the rollups.
+    students = {student.student_id: student for student in get_all_students()}
+    by_student: Dict[str, List[Attempt]] = {}
+    for attempt in load_attempts():
+        by_student.setdefault(attempt.student_id, []).append(attempt)
+        if attempt.student_id not in students:
+            students[attempt.student_id] = StudentState(
+                student_id=attempt.student_id, name=f"Student {attempt.student_id}"
+            )
+    summaries = []
+    for student_id, student in students.items():
+        attempts = by_student.get(student_id, [])
+        hinted = sum(1 for a in attempts if any(r.used_hint for r in a.results))
+        last = max((a.created_at for a in attempts), default=None)
+        summaries.append(
+            TeacherStudentSummary(
+                student_id=student_id,
+                name=student.name,
+                overall_mastery=_average(
+                    [a.score_pct for a in attempts if a.quiz_type in MASTERY_QUIZ_TYPES]
+                ),
+                questions_answered=sum(len(a.results) for a in attempts),
+                attempt_count=len(attempts),
+                last_activity_at=(
+                    datetime.utcfromtimestamp(last).isoformat() + "Z" if last else None
+                ),
+                hint_usage_rate=hinted / len(attempts) if attempts else None,
+            )
+        )
+    summaries.sort(key=lambda summary: summary.name.lower())
+    return summaries
+
+
+def _full_unit_summaries() -> List[TeacherUnitSummary]:
+    by_unit: Dict[str, List[Attempt]] = {}
+    mastery: Dict[str, Dict[str, List[float]]] = {}
+    for attempt in load_attempts():
+        if not attempt.unit_id:
+            continue
+        by_unit.setdefault(attempt.unit_id, []).append(attempt)
+        if attempt.quiz_type in MASTERY_QUIZ_TYPES:
+            mastery.setdefault(attempt.unit_id, {}).setdefault(attempt.student_id, []).append(
+                attempt.score_pct
+            )
+    summaries = []
+    for unit in load_units():
+        attempts = by_unit.get(unit.id, [])
+        hinted = sum(1 for a in attempts if any(r.used_hint for r in a.results))
+        summaries.append(
+            TeacherUnitSummary(
+                unit_id=unit.id,
+                unit_name=unit.title,
+                average_mastery=_average(
+                    [_average(scores) for scores in mastery.get(unit.id, {}).values()]
+                ),
+                attempt_count=len(attempts),
+                student_count=len({a.student_id for a in attempts}),
+                hint_usage_rate=hinted / len(attempts) if attempts else None,
+            )
+        )
+    return summaries
+
+
+def test_teacher_rollups_match_full_scan():
+    append_attempts(_history(40, seed=30))
+    assert compute_teacher_student_summaries() == _full_student_summaries()
+    assert compute_teacher_unit_summaries() == _full_unit_summaries()
+
+    for batch in range(3):
+        append_attempts(_history(15, seed=40 + batch))
+        assert compute_teacher_student_summaries() == _full_student_summaries()
+        assert compute_teacher_unit_summaries() == _full_unit_summaries()
+
+    # A fresh replay builds the same aggregates the incremental path holds.
+    fresh = TeacherRollups().refresh()
+    shared = repository._teacher_rollups.refresh()
+    assert fresh.students == shared.students
+    assert fresh.units == shared.units
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_columnar_aggregates_match_row_based(tmp_path, monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(attempt_columns, "np", None)
+    elif attempt_columns.np is None:
+        pytest.skip("numpy is not installed")
+    append_attempts(_history(40, seed=60))
+
+    def check(columns):
+        difficulty = estimate_question_difficulty_from_columns(columns, load_questions())
+        assert list(difficulty.items()) == _full_difficulty()
+        assert compute_teacher_student_summaries_from_columns() == _full_student_summaries()
+        assert compute_teacher_unit_summaries_from_columns() == _full_unit_summaries()
+        # Aggregates without saved state seed from the same columns.
+        assert list(DifficultyTable().refresh().lookup().items()) == _full_difficulty()
+        fresh = TeacherRollups().refresh()
+        shared = repository._teacher_rollups.refresh()
+        assert fresh.students == shared.students
+        assert fresh.units == shared.units
+
+    check(load_attempt_columns())
+
+    # From the binary snapshot plus the rows logged after it.
+    snapshot_dir = tmp_path / "attempts.snapshot"
+    monkeypatch.setattr(repository, "ATTEMPT_SNAPSHOT_DIR", snapshot_dir)
+    monkeypatch.setattr(repository, "ATTEMPT_SNAPSHOT_ENABLED", True)
+    AttemptSnapshotWriter(snapshot_dir, repository._storage.name).update(
+        repository._storage.read_attempts_since
+    )
+    append_attempts(_history(15, seed=61))
+    columns = load_attempt_columns()
+    assert len(columns) == len(load_attempts())
+    check(columns)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import pytest
+
+from conftest import attempt_payload, new_student_id
+
+pytest.importorskip("a2wsgi")
+
+
+def _call(
+    app, method: str, path: str, body: bytes = b"", query: bytes = b""
+) -> Tuple[int, Dict[str, str], bytes]:
+    # Feeds the body in two chunks, the way a server hands it over.
+    chunks: List[Dict] = [
+        {"type": "http.request", "body": body[: len(body) // 2], "more_body": True},
+        {"type": "http.request", "body": body[len(body) // 2 :], "more_body": False},
+    ]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query,
+        "headers": [
+            (b"host", b"testserver"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    sent: List[Dict] = []
+
+    async def receive():
+        return chunks.pop(0) if chunks else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    headers = {key.decode().lower(): value.decode() for key, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return start["status"], headers, body
+
+
+@pytest.fixture(scope="module")
+def asgi_app():
+    from src.backend.asgi import create_asgi_app
+
+    return create_asgi_app(max_workers=4)
+
+
+def test_get_and_post_round_trip(asgi_app):
+    status, _, body = _call(asgi_app, "GET", "/api/health")
+    assert status == 200
+    assert json.loads(body)["status"] == "ok"
+
+    student_id = new_student_id()
+    payload = json.dumps(attempt_payload(student_id, 1)).encode()
+    status, _, _ = _call(asgi_app, "POST", "/api/attempts", body=payload)
+    assert status == 201
+    status, _, body = _call(asgi_app, "GET", f"/api/attempts/{student_id}")
+    assert status == 200
+    assert len(json.loads(body)) == 1
+
+
+def test_streamed_response_is_forwarded_whole(asgi_app):
+    student_id = new_student_id()
+    items = [attempt_payload(student_id, i, created_at=float(i)) for i in range(5)]
+    _call(asgi_app, "POST", "/api/attempts/batch", body=json.dumps({"attempts": items}).encode())
+    status, headers, body = _call(
+        asgi_app, "GET", f"/api/attempts/{student_id}", query=b"format=ndjson"
+    )
+    assert status == 200
+    assert headers["content-type"].startswith("application/x-ndjson")
+    assert len(body.splitlines()) == 5
+
+
+def test_server_rejects_conflicting_content_lengths(asgi_app):
+    uvicorn = pytest.importorskip("uvicorn")
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(asgi_app, host="127.0.0.1", port=port, lifespan="off", log_level="error")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 10
+        while not server.started and time.monotonic() < deadline:
+            time.sleep(0.05)
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as conn:
+            conn.sendall(
+                b"POST /api/attempts HTTP/1.1\r\nHost: x\r\n"
+                b"Content-Length: 2\r\nContent-Length: 40\r\n\r\n{}"
+            )
+            reply = conn.recv(4096)
+        assert reply.startswith(b"HTTP/1.1 400")
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
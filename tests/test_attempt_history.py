@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pytest
+
+from conftest import attempt_payload, new_student_id
+
+
+def test_attempt_history_pages_newest_first(client):
+    student_id = new_student_id()
+    # Pairs share a timestamp, so the cursor has to break ties on the id.
+    items = [
+        attempt_payload(student_id, i, id=f"p{i:02d}", created_at=float(i // 2))
+        for i in range(11)
+    ]
+    client.post("/api/attempts/batch", json={"attempts": items})
+
+    ids, cursor = [], None
+    while True:
+        query = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/api/attempts/{student_id}", query_string=query).get_json()
+        ids.extend(attempt["id"] for attempt in page["attempts"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == [f"p{i:02d}" for i in reversed(range(11))]
+
+    full = client.get(f"/api/attempts/{student_id}").get_json()
+    assert len(full) == 11
+
+
+def test_attempt_history_summary_and_stream(client):
+    student_id = new_student_id()
+    items = [attempt_payload(student_id, i, created_at=float(i)) for i in range(5)]
+    client.post("/api/attempts/batch", json={"attempts": items})
+
+    summary = client.get(
+        f"/api/attempts/{student_id}", query_string={"limit": 1, "summary": 1}
+    ).get_json()["attempts"][0]
+    assert "results" not in summary
+    assert summary["n_questions"] == 1
+
+    stream = client.get(
+        f"/api/attempts/{student_id}", query_string={"limit": 2, "format": "ndjson"}
+    )
+    assert stream.mimetype == "application/x-ndjson"
+    assert len(stream.data.splitlines()) == 2
+    assert stream.headers["X-Next-Cursor"]
+    everything = client.get(
+        f"/api/attempts/{student_id}", headers={"Accept": "application/x-ndjson"}
+    )
+    assert len(everything.data.splitlines()) == 5
+
+
+@pytest.mark.parametrize(
+    "query", [{"cursor": "!!!"}, {"limit": 0}, {"limit": 501}, {"limit": "ten"}]
+)
+def test_attempt_history_rejects_bad_paging(client, query):
+    response = client.get(f"/api/attempts/{new_student_id()}", query_string=query)
+    assert response.status_code == 400
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+
+from src.backend.attempt_log import AttemptLog
+
+
+def _row(i: int, student_id: str = "") -> dict:
+    return {
+        "id": f"a{i}",
+        "student_id": student_id or f"s{i % 3}",
+        "created_at": float(i),
+        "results": [],
+    }
+
+
+def _small_log(directory, **kwargs) -> AttemptLog:
+    # Tiny segments; compaction only runs when a test asks for it.
+    options = {"segment_max_bytes": 300, "compact_after": 10_000}
+    options.update(kwargs)
+    return AttemptLog(directory, **options)
+
+
+def test_migrates_legacy_list(tmp_path):
+    legacy = tmp_path / "attempts.json"
+    legacy.write_text(json.dumps([_row(1), _row(2)]))
+    log = AttemptLog(tmp_path / "log", legacy_path=legacy)
+    assert [row["id"] for row in log.iter_rows()] == ["a1", "a2"]
+    assert legacy.exists()
+
+
+def test_migrates_legacy_dict_keyed_by_student(tmp_path):
+    legacy = tmp_path / "attempts.json"
+    legacy.write_text(json.dumps({"s1": [{"id": "a1"}, {"id": "a2", "student_id": "s2"}]}))
+    log = AttemptLog(tmp_path / "log", legacy_path=legacy)
+    assert [(row["id"], row["student_id"]) for row in log.iter_rows()] == [
+        ("a1", "s1"),
+        ("a2", "s2"),
+    ]
+    assert [row["id"] for row in log.rows_for_student("s1")] == ["a1"]
+
+
+def test_rolls_segments_and_reads_across_them(tmp_path):
+    log = _small_log(tmp_path)
+    rows = [_row(i) for i in range(30)]
+    for row in rows:
+        log.append(row)
+    assert len(list(tmp_path.glob("segment-*.jsonl"))) > 2
+    assert list(log.iter_rows()) == rows
+    assert log.rows_for_student("s1") == [row for row in rows if row["student_id"] == "s1"]
+
+
+def test_compaction_keeps_rows_cursors_and_index(tmp_path):
+    log = _small_log(tmp_path)
+    rows = [_row(i) for i in range(40)]
+    for row in rows[:20]:
+        log.append(row)
+    tail = log.read_since(None)
+    assert list(tail) == rows[:20]
+    log.rows_for_student("s0")
+
+    assert log.compact() > 0
+    for row in rows[20:]:
+        log.append(row)
+
+    tail = log.read_since(tail.cursor)
+    assert not tail.reset
+    assert list(tail) == rows[20:]
+    assert list(log.iter_rows()) == rows
+    for student_id in ("s0", "s1", "s2"):
+        expected = [row for row in rows if row["student_id"] == student_id]
+        assert log.rows_for_student(student_id) == expected
+        assert AttemptLog(tmp_path).rows_for_student(student_id) == expected
+
+    # A second compaction leaves the first one's segment alone.
+    tail = log.read_since(tail.cursor)
+    assert list(tail) == []
+    log.compact()
+    tail = log.read_since(tail.cursor)
+    assert not tail.reset
+    assert list(tail) == []
+
+
+def test_compaction_drops_duplicate_ids(tmp_path):
+    log = _small_log(tmp_path)
+    rows = [_row(i) for i in range(12)]
+    for row in rows + rows[:3]:
+        log.append(row)
+    log.append(_row(99))
+    log.compact()
+    ids = [row["id"] for row in log.iter_rows()]
+    assert sorted(ids) == sorted(row["id"] for row in rows + [_row(99)])
+
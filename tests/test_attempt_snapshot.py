@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from src.backend import repository
+from src.backend.attempt_log import AttemptLog
+from src.backend.attempt_snapshot import AttemptSnapshot, read_manifest
+from src.backend.storage import JsonStorage
+
+
+def _rows(start: int, count: int, prefix: str = "a") -> list:
+    # The shape Attempt.to_dict stores, with strings shared across rows and
+    # fresh ones (ids, some answers) on every row.
+    rng = random.Random(start)
+    return [
+        {
+            "id": f"{prefix}{i}",
+            "student_id": f"s{i % 5}",
+            "quiz_id": f"quiz{i % 3}",
+            "quiz_type": rng.choice(["practice", "mini_quiz"]),
+            "unit_id": rng.choice(["u1", "u2", ""]),
+            "section_id": rng.choice([None, "sec1"]),
+            "score_pct": float(rng.randrange(101)),
+            "created_at": 1_700_000_000.0 + i,
+            "results": [
+                {
+                    "question_id": f"q{rng.randrange(8)}",
+                    "correct": rng.random() < 0.5,
+                    "chosen_answer": rng.choice(["a", "b", f"free text {i}"]),
+                    "time_sec": float(rng.randrange(60)),
+                    "used_hint": rng.random() < 0.2,
+                }
+                for _ in range(rng.randrange(3))
+            ],
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def _storage(directory) -> JsonStorage:
+    directory.mkdir(parents=True, exist_ok=True)
+    log = AttemptLog(directory / "attempts", segment_max_bytes=2_000, compact_after=10_000)
+    return JsonStorage(directory / "students.json", directory / "users.json", log)
+
+
+@pytest.fixture
+def snapshot_storage(tmp_path, monkeypatch):
+    storage = _storage(tmp_path / "data")
+    monkeypatch.setattr(repository, "_storage", storage)
+    monkeypatch.setattr(repository, "ATTEMPT_SNAPSHOT_DIR", tmp_path / "attempts.snapshot")
+    monkeypatch.setattr(repository, "ATTEMPT_SNAPSHOT_ENABLED", True)
+    return storage
+
+
+def _assert_replay_matches(storage) -> None:
+    assert list(repository.read_attempt_rows_since(None)) == list(
+        storage.read_attempts_since(None)
+    )
+
+
+def test_snapshot_plus_tail_equals_log_replay(snapshot_storage):
+    storage = snapshot_storage
+    storage.append_attempt_rows(_rows(0, 40))
+    assert repository.refresh_attempt_snapshot() == 40
+    storage.append_attempt_rows(_rows(40, 15))
+    _assert_replay_matches(storage)
+
+    # Cursors survive compaction, so the snapshot stays usable.
+    assert storage.attempt_log.compact() > 0
+    storage.append_attempt_rows(_rows(55, 10))
+    _assert_replay_matches(storage)
+    assert repository.refresh_attempt_snapshot() == 25
+    assert read_manifest(repository.ATTEMPT_SNAPSHOT_DIR)["generation"] == 1
+    _assert_replay_matches(storage)
+
+
+def test_rewritten_log_regenerates_the_snapshot(snapshot_storage, tmp_path, monkeypatch):
+    snapshot_storage.append_attempt_rows(_rows(0, 30))
+    repository.refresh_attempt_snapshot()
+
+    # The log is rebuilt elsewhere, so the snapshot's cursor no longer fits.
+    rebuilt = _storage(tmp_path / "rebuilt")
+    rebuilt.append_attempt_rows(_rows(0, 12, prefix="b"))
+    monkeypatch.setattr(repository, "_storage", rebuilt)
+    _assert_replay_matches(rebuilt)
+    assert repository.refresh_attempt_snapshot() == 12
+    assert read_manifest(repository.ATTEMPT_SNAPSHOT_DIR)["generation"] == 2
+    rebuilt.append_attempt_rows(_rows(12, 5, prefix="b"))
+    _assert_replay_matches(rebuilt)
+
+
+def test_writer_reuses_its_string_lookup(snapshot_storage, monkeypatch):
+    storage = snapshot_storage
+    storage.append_attempt_rows(_rows(0, 20))
+    repository.refresh_attempt_snapshot()
+
+    decoded = []
+    strings_from = AttemptSnapshot.strings_from
+
+    def counting(self, first):
+        values = strings_from(self, first)
+        decoded.append(len(values))
+        return values
+
+    monkeypatch.setattr(AttemptSnapshot, "strings_from", counting)
+    # Nothing new: the string table is not read at all.
+    assert repository.refresh_attempt_snapshot() == 0
+    assert decoded == []
+    # New rows: only the last known string is decoded again.
+    storage.append_attempt_rows(_rows(20, 10))
+    assert repository.refresh_attempt_snapshot() == 10
+    assert decoded == [1]
+
+    # Another writer adds strings; this one catches up on those alone.
+    other = repository.AttemptSnapshotWriter(repository.ATTEMPT_SNAPSHOT_DIR, storage.name)
+    storage.append_attempt_rows(_rows(30, 10))
+    other.update(storage.read_attempts_since)
+    before = read_manifest(repository.ATTEMPT_SNAPSHOT_DIR)["strings"]
+    storage.append_attempt_rows(_rows(40, 10))
+    decoded.clear()
+    assert repository.refresh_attempt_snapshot() == 10
+    assert len(decoded) == 1 and decoded[0] < before
+    _assert_replay_matches(storage)
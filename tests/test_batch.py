@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from conftest import attempt_payload, new_student_id
+from src.backend.attempt_log import AttemptLog
+from src.backend.storage import SqliteStorage
+
+
+def _row(i: int, student_id: str) -> dict:
+    return {
+        "id": f"a{i}",
+        "student_id": student_id,
+        "quiz_id": "q",
+        "quiz_type": "practice",
+        "unit_id": "unit1",
+        "section_id": None,
+        "score_pct": 0.0,
+        "created_at": float(i),
+        "results": [],
+    }
+
+
+def test_log_and_sqlite_append_only_ids_new_to_the_student(tmp_path):
+    log = AttemptLog(tmp_path / "attempts")
+    sqlite_storage = SqliteStorage(tmp_path / "bitbybit.sqlite3")
+    stored = [_row(1, "s1"), _row(2, "s1")]
+    retry = [_row(2, "s1"), _row(2, "s2"), _row(3, "s1"), _row(3, "s1")]
+    for append, append_new, read in (
+        (log.append_many, log.append_absent, log.iter_rows),
+        (
+            sqlite_storage.append_attempt_rows,
+            sqlite_storage.append_new_attempt_rows,
+            sqlite_storage.iter_attempt_rows,
+        ),
+    ):
+        append(stored)
+        fresh = append_new(retry)
+        assert [(row["id"], row["student_id"]) for row in fresh] == [("a2", "s2"), ("a3", "s1")]
+        assert len(list(read())) == 4
+
+
+def test_batch_attempts_report_created_duplicate_and_error(client):
+    student_id = new_student_id()
+    items = [
+        attempt_payload(student_id, 0, id="b1", created_at=100.0),
+        attempt_payload(student_id, 1, id="b2", created_at=101.0),
+        attempt_payload(student_id, 1, id="b2", created_at=101.0),
+        {"student_id": student_id},
+        "not an attempt",
+    ]
+    response = client.post("/api/attempts/batch", json={"attempts": items})
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [entry["status"] for entry in body["results"]] == [
+        "created",
+        "created",
+        "duplicate",
+        "error",
+        "error",
+    ]
+    assert body["counts"] == {"created": 2, "duplicate": 1, "error": 2}
+    assert student_id in body["students"]
+
+    retry = client.post("/api/attempts/batch", json={"attempts": items[:3]})
+    assert retry.status_code == 200
+    assert retry.get_json()["counts"] == {"duplicate": 3}
+    stored = client.get(f"/api/attempts/{student_id}").get_json()
+    assert sorted(attempt["id"] for attempt in stored) == ["b1", "b2"]
+
+
+def test_batch_attempts_reject_bad_payloads(client):
+    assert client.post("/api/attempts/batch", json={}).status_code == 400
+    too_many = {"attempts": [{}] * 5001}
+    assert client.post("/api/attempts/batch", json=too_many).status_code == 413
+
+
+def test_batch_next_activity_matches_single_requests(client):
+    student_ids = [new_student_id() for _ in range(3)]
+    for n, student_id in enumerate(student_ids):
+        for i in range(n * 3):
+            client.post("/api/attempts", json=attempt_payload(student_id, i))
+
+    response = client.post("/api/next-activity/batch", json={"student_ids": student_ids})
+    assert response.status_code == 200
+    recommendations = response.get_json()["recommendations"]
+    assert [entry["student_id"] for entry in recommendations] == student_ids
+    for entry in recommendations:
+        single = client.get(f"/api/student/{entry['student_id']}/next-activity").get_json()
+        assert {**single, "student_id": entry["student_id"]} == entry
+
+    roster = client.post("/api/next-activity/batch", json={}).get_json()["recommendations"]
+    by_student = {entry["student_id"]: entry for entry in roster}
+    assert [by_student[student_id] for student_id in student_ids] == recommendations
+
+
+def test_batch_next_activity_rejects_bad_student_ids(client):
+    bad = client.post("/api/next-activity/batch", json={"student_ids": "s1"})
+    assert bad.status_code == 400
+    too_many = client.post("/api/next-activity/batch", json={"student_ids": ["s"] * 1001})
+    assert too_many.status_code == 400
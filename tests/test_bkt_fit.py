@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import random
+from typing import Dict, List
+
+import pytest
+
+from src.backend.ml.bkt_fit import fit_all_skills, fit_skill
+
+TRUE_PARAMS = {"prior": 0.3, "learn": 0.15, "forget": 0.02, "slip": 0.08, "guess": 0.2}
+
+
+def _simulate(rng: random.Random, students: int, length: int) -> List[List[int]]:
+    p = TRUE_PARAMS
+    sequences = []
+    for _ in range(students):
+        known = rng.random() < p["prior"]
+        sequence = []
+        for _ in range(length):
+            correct = rng.random() < ((1.0 - p["slip"]) if known else p["guess"])
+            sequence.append(int(correct))
+            known = rng.random() >= p["forget"] if known else rng.random() < p["learn"]
+        sequences.append(sequence)
+    return sequences
+
+
+def _assert_close(fitted: Dict[str, float], tolerance: float) -> None:
+    for name, value in TRUE_PARAMS.items():
+        assert fitted[name] == pytest.approx(value, abs=tolerance), name
+
+
+def test_em_recovers_generating_parameters():
+    pytest.importorskip("numpy")
+    sequences = _simulate(random.Random(0), 3000, 25)
+    fitted = fit_skill(sequences, use_numpy=True)
+    _assert_close(fitted, 0.03)
+    assert fitted["n_observations"] == 75_000
+
+
+def test_python_and_numpy_paths_agree():
+    pytest.importorskip("numpy")
+    sequences = _simulate(random.Random(1), 300, 15)
+    sequences += [[], [1], [0, 0, 1]]
+    numpy_fit = fit_skill(sequences, use_numpy=True)
+    python_fit = fit_skill(sequences, use_numpy=False)
+    for name in TRUE_PARAMS:
+        assert numpy_fit[name] == pytest.approx(python_fit[name], abs=1e-3), name
+    assert numpy_fit["iterations"] == python_fit["iterations"]
+
+
+def test_fit_all_skills_skips_sparse_skills():
+    rng = random.Random(2)
+    fitted = fit_all_skills(
+        {"dense": _simulate(rng, 50, 10), "sparse": [[1, 0]]},
+        processes=1,
+        min_observations=10,
+    )
+    assert list(fitted) == ["dense"]
+    assert fitted["dense"]["n_observations"] == 500
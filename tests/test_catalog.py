@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import os
+
+from src.backend.catalog import CatalogCache
+
+
+def _cache(path) -> CatalogCache:
+    cache = CatalogCache()
+    cache.register("units", path, [], lambda raw: [dict(item) for item in raw])
+    return cache
+
+
+def _write(path, value, mtime_ns=None) -> None:
+    path.write_text(json.dumps(value))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_unchanged_file_is_served_from_memory(tmp_path):
+    path = tmp_path / "units.json"
+    _write(path, [{"id": "u1"}])
+    cache = _cache(path)
+    first = cache.get("units")
+    assert cache.get("units") is first
+    assert (cache.version, cache.hits, cache.misses, cache.reloads) == (1, 1, 1, 1)
+
+
+def test_changed_content_bumps_the_version(tmp_path):
+    path = tmp_path / "units.json"
+    _write(path, [{"id": "u1"}], mtime_ns=1_000_000_000)
+    cache = _cache(path)
+    cache.get("units")
+    _write(path, [{"id": "u2"}], mtime_ns=2_000_000_000)
+    assert cache.get("units") == [{"id": "u2"}]
+    assert cache.version == 2
+
+
+def test_touched_but_identical_file_keeps_objects_and_version(tmp_path):
+    path = tmp_path / "units.json"
+    _write(path, [{"id": "u1"}], mtime_ns=1_000_000_000)
+    cache = _cache(path)
+    first = cache.get("units")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert cache.get("units") is first
+    assert cache.version == 1
+    assert cache.misses == 2
+
+
+def test_missing_file_is_created_with_its_default(tmp_path):
+    path = tmp_path / "units.json"
+    cache = _cache(path)
+    assert cache.get("units") == []
+    assert json.loads(path.read_text()) == []
+    assert cache.get("units") == []
+    assert cache.hits == 1
+
+
+def test_invalid_json_falls_back_to_the_default(tmp_path):
+    path = tmp_path / "units.json"
+    path.write_text("{not json")
+    assert _cache(path).get("units") == []
+
+
+def test_seeded_objects_are_rehashed_not_reparsed(tmp_path):
+    path = tmp_path / "units.json"
+    _write(path, [{"id": "u1"}], mtime_ns=1_000_000_000)
+    source = _cache(path)
+    source.get("units")
+    _, content_hash = source.stats()["files"].popitem()
+
+    cache = _cache(path)
+    seeded = [{"id": "u1", "seeded": True}]
+    cache.seed("units", seeded, content_hash, (1, 1))  # stat differs from the file
+    assert cache.get("units") is seeded
+    assert cache.reloads == 0
+
+    cache.seed("units", seeded, "other-hash", (1, 1))
+    assert cache.get("units") == [{"id": "u1"}]
+    assert cache.reloads == 1
+
+
+def test_validators_fingerprint_is_stable_across_caches(tmp_path):
+    path = tmp_path / "units.json"
+    _write(path, [{"id": "u1"}], mtime_ns=1_500_000_000)
+    fingerprint, last_modified = _cache(path).validators()
+    assert _cache(path).validators() == (fingerprint, last_modified)
+    assert last_modified == 1.5
+    _write(path, [{"id": "u2"}], mtime_ns=2_500_000_000)
+    assert _cache(path).validators()[0] != fingerprint
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import gzip
+
+import pytest
+
+from src.backend.repository import load_quizzes
+
+
+@pytest.mark.parametrize("path", ["/api/units", "/api/quizzes/{quiz_id}"])
+def test_catalog_views_revalidate_with_etag(client, path):
+    path = path.format(quiz_id=next(iter(load_quizzes())))
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert first.headers["Last-Modified"]
+
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+    assert cached.headers["ETag"] == etag
+
+    since = client.get(path, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert since.status_code == 304
+    assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_gzip_body_has_its_own_etag(client):
+    path = f"/api/quizzes/{next(iter(load_quizzes()))}"
+    plain = client.get(path)
+    gzipped = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gzipped.data) == plain.data
+    assert gzipped.headers["ETag"] != plain.headers["ETag"]
+    revalidated = client.get(
+        path, headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_quiz_body_is_rendered_once_per_catalog_version(client):
+    path = f"/api/quizzes/{next(iter(load_quizzes()))}"
+    first = client.get(path)
+    assert first.get_json()["questions"]
+    assert client.get(path).data == first.data
+    assert client.get("/api/quizzes/no-such-quiz").status_code == 404
+
+
+@pytest.mark.parametrize("path", ["/api/quizzes/no-such-quiz", "/api/units/no-such-unit"])
+def test_unknown_resource_is_404_even_with_fresh_validators(client, path):
+    first = client.get("/api/units")
+    for headers in (
+        {"If-None-Match": first.headers["ETag"]},
+        {"If-Modified-Since": first.headers["Last-Modified"]},
+    ):
+        assert client.get(path, headers=headers).status_code == 404
+
+
+def test_etag_is_scoped_to_the_resource(client):
+    quiz_ids = list(load_quizzes())[:2]
+    etags = {client.get(f"/api/quizzes/{quiz_id}").headers["ETag"] for quiz_id in quiz_ids}
+    assert len(etags) == len(quiz_ids)
+    other = client.get("/api/units", headers={"If-None-Match": etags.pop()})
+    assert other.status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/api/units", "/api/quizzes/{quiz_id}"])
+def test_catalog_views_vary_on_accept_encoding(client, path):
+    path = path.format(quiz_id=next(iter(load_quizzes())))
+    first = client.get(path)
+    assert "Accept-Encoding" in first.headers["Vary"]
+    cached = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304
+    assert "Accept-Encoding" in cached.headers["Vary"]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT, make_data_dir
+from src.backend import catalog_snapshot
+from src.backend.catalog_snapshot import (
+    CatalogValidationError,
+    compile_catalog,
+    load_snapshot,
+    write_snapshot,
+)
+
+
+def _paths(data_dir):
+    return {name: data_dir / f"{name}.json" for name in catalog_snapshot.CATALOG_FILES}
+
+
+@pytest.fixture
+def built(tmp_path):
+    data_dir = make_data_dir(tmp_path / "data")
+    path = tmp_path / "catalog.snapshot"
+    catalog = compile_catalog(_paths(data_dir))
+    write_snapshot(catalog, path)
+    return data_dir, path, catalog
+
+
+def test_snapshot_round_trips(built):
+    _, path, catalog = built
+    loaded = load_snapshot(path)
+    assert loaded.units == catalog.units
+    assert loaded.questions == catalog.questions
+    assert loaded.quizzes == catalog.quizzes
+    assert loaded.sources == catalog.sources
+    quiz_id = next(iter(loaded.quizzes))
+    assert loaded.lookups.quiz_questions[quiz_id] == catalog.lookups.quiz_questions[quiz_id]
+    # The lookup tables share the unpickled objects.
+    assert loaded.lookups.units_by_id[loaded.units[0].id] is loaded.units[0]
+
+
+@pytest.mark.parametrize("damage", ["flip", "truncate", "magic"])
+def test_corrupt_snapshot_is_not_loaded(built, damage):
+    _, path, _ = built
+    data = bytearray(path.read_bytes())
+    if damage == "flip":
+        data[-10] ^= 0xFF
+    elif damage == "truncate":
+        del data[-100:]
+    else:
+        data[:4] = b"XXXX"
+    path.write_bytes(bytes(data))
+    assert load_snapshot(path) is None
+
+
+def test_missing_snapshot_is_not_loaded(tmp_path):
+    assert load_snapshot(tmp_path / "absent.snapshot") is None
+
+
+def test_snapshot_from_another_schema_is_not_loaded(built, monkeypatch):
+    _, path, _ = built
+    monkeypatch.setattr(catalog_snapshot, "schema_fingerprint", lambda: "another-schema")
+    assert load_snapshot(path) is None
+
+
+def test_dangling_references_fail_validation(tmp_path):
+    data_dir = make_data_dir(tmp_path / "data")
+    quizzes = json.loads((data_dir / "quizzes.json").read_text())
+    quizzes[0]["question_ids"].append("no-such-question")
+    (data_dir / "quizzes.json").write_text(json.dumps(quizzes))
+    units = json.loads((data_dir / "units.json").read_text())
+    units[0]["diagnostic_quiz_id"] = "no-such-quiz"
+    (data_dir / "units.json").write_text(json.dumps(units))
+
+    with pytest.raises(CatalogValidationError) as excinfo:
+        compile_catalog(_paths(data_dir))
+    problems = excinfo.value.problems
+    assert any("no-such-question" in problem for problem in problems)
+    assert any("'no-such-quiz' is not a quiz" in problem for problem in problems)
+
+
+def test_edited_source_is_reparsed_instead_of_the_snapshot(built):
+    data_dir, path, catalog = built
+    unit_id = catalog.units[0].id
+    script = (
+        "import json, os, sys\n"
+        "from pathlib import Path\n"
+        "from src.backend import repository\n"
+        "unit_id = sys.argv[1]\n"
+        "report = [repository.get_catalog_stats()['source'], repository.load_unit(unit_id).title]\n"
+        "units_path = Path(os.environ['BITBYBIT_DATA_DIR']) / 'units.json'\n"
+        "units = json.loads(units_path.read_text())\n"
+        "units[0]['title'] = 'Edited title'\n"
+        "units_path.write_text(json.dumps(units))\n"
+        "stat = units_path.stat()\n"
+        "os.utime(units_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))\n"
+        "report += [repository.load_unit(unit_id).title, repository.load_units()[0].title]\n"
+        "print(json.dumps(report))\n"
+    )
+    env = {
+        **os.environ,
+        "BITBYBIT_DATA_DIR": str(data_dir),
+        "BITBYBIT_CATALOG_SNAPSHOT_PATH": str(path),
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", script, unit_id],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+    assert json.loads(output.stdout) == [
+        "snapshot",
+        catalog.units[0].title,
+        "Edited title",
+        "Edited title",
+    ]
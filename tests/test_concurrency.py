@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import multiprocessing
+from collections import Counter
+
+import pytest
+
+from benchmarks.stress_attempts import _worker
+from conftest import make_data_dir
+from src.backend.attempt_log import AttemptLog
+from src.backend.storage import JsonStorage, SqliteStorage
+
+PROCESSES = 4
+ATTEMPTS = 40
+STUDENTS = 3
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_parallel_writers_lose_nothing(tmp_path, monkeypatch, backend):
+    data_dir = make_data_dir(tmp_path / "data")
+    sqlite_path = data_dir / "stress.sqlite3"
+    monkeypatch.setenv("BITBYBIT_DATA_DIR", str(data_dir))
+    monkeypatch.setenv("BITBYBIT_STORAGE_BACKEND", backend)
+    monkeypatch.setenv("BITBYBIT_SQLITE_PATH", str(sqlite_path))
+    monkeypatch.setenv("BITBYBIT_WORKERS", str(PROCESSES))
+    if backend == "sqlite":
+        storage = SqliteStorage(sqlite_path)
+        storage.connection()
+    else:
+        log = AttemptLog(data_dir / "attempts", legacy_path=data_dir / "attempts.json")
+        storage = JsonStorage(data_dir / "students.json", data_dir / "users.json", log)
+
+    ctx = multiprocessing.get_context("spawn")
+    jobs = [(worker_id, ATTEMPTS, STUDENTS) for worker_id in range(PROCESSES)]
+    with ctx.Pool(PROCESSES) as pool:
+        results = pool.map(_worker, jobs)
+
+    expected_attempts = [attempt_id for ids, _ in results for attempt_id in ids]
+    created_students = [student_id for _, ids in results for student_id in ids]
+    stored = Counter(row["id"] for row in storage.iter_attempt_rows())
+    assert sorted(stored) == sorted(expected_attempts)
+    assert max(stored.values()) == 1
+
+    for worker_id in range(PROCESSES):
+        for k in range(STUDENTS):
+            rows = list(storage.iter_attempt_rows(f"stress-{worker_id}-{k}"))
+            assert len(rows) == len(range(k, ATTEMPTS, STUDENTS))
+
+    students = storage.load_student_rows()
+    assert len(set(created_students)) == len(created_students)
+    expected_students = {
+        f"stress-{worker_id}-{k}" for worker_id in range(PROCESSES) for k in range(STUDENTS)
+    }
+    assert expected_students | set(created_students) <= set(students)
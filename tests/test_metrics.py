@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from conftest import attempt_payload, new_student_id
+
+ATTEMPTS_ROUTE = 'method="POST",route="/api/attempts"'
+HISTORY_ROUTE = 'method="GET",route="/api/attempts/<student_id>"'
+
+
+def _samples(client) -> Dict[str, float]:
+    response = client.get("/api/metrics")
+    assert response.mimetype == "text/plain"
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def _delta(before: Dict[str, float], after: Dict[str, float], name: str) -> float:
+    return after.get(name, 0.0) - before.get(name, 0.0)
+
+
+def _route_delta(before, after, metric: str, route: str) -> float:
+    return _delta(before, after, f"bitbybit_{metric}{{{route}}}")
+
+
+def test_route_io_counters_are_exported(client):
+    student_id = new_student_id()
+    before = _samples(client)
+    assert client.post("/api/attempts", json=attempt_payload(student_id, 1)).status_code == 201
+    assert client.get(f"/api/attempts/{student_id}").status_code == 200
+    after = _samples(client)
+
+    status = f'{ATTEMPTS_ROUTE},status="201"'
+    assert _route_delta(before, after, "requests_total", status) == 1
+    assert _route_delta(before, after, "request_duration_seconds_count", ATTEMPTS_ROUTE) == 1
+    # The attempt is appended to the log and the student state is saved.
+    assert _route_delta(before, after, "request_file_writes_total", ATTEMPTS_ROUTE) >= 1
+    assert _route_delta(before, after, "request_bytes_written_total", ATTEMPTS_ROUTE) > 0
+    # Reading the history back parses the log but writes nothing.
+    assert _route_delta(before, after, "request_file_reads_total", HISTORY_ROUTE) >= 1
+    assert _route_delta(before, after, "request_bytes_parsed_total", HISTORY_ROUTE) > 0
+    assert _route_delta(before, after, "request_objects_hydrated_total", HISTORY_ROUTE) == 1
+    assert _route_delta(before, after, "request_file_writes_total", HISTORY_ROUTE) == 0
+    assert _delta(before, after, 'bitbybit_file_writes_total{source="attempts"}') >= 1
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import threading
+
+from flask import Response
+
+from src.backend import main
+from src.backend.profiling import PROFILE_HEADER, RequestProfiler
+
+REPORT_HEADER = f"{PROFILE_HEADER}-Report"
+
+
+def _client(monkeypatch, tmp_path, sample_rate: float, allow_header: bool = False):
+    monkeypatch.setattr(main, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "PROFILE_SAMPLE_RATE", sample_rate)
+    monkeypatch.setattr(main, "PROFILE_ALLOW_HEADER", allow_header)
+    return main.create_app().test_client()
+
+
+def test_sampled_request_writes_a_report(monkeypatch, tmp_path):
+    client = _client(monkeypatch, tmp_path, sample_rate=1.0)
+    response = client.get("/api/units")
+    assert response.status_code == 200
+    assert response.get_json()
+    report = tmp_path / response.headers[REPORT_HEADER]
+    text = report.read_text()
+    assert text.startswith("request: GET /api/units")
+    assert "top 25 functions by cumulative time" in text
+    assert list(tmp_path.iterdir()) == [report]
+
+
+def test_unsampled_request_is_left_untouched(monkeypatch, tmp_path):
+    client = _client(monkeypatch, tmp_path, sample_rate=0.0, allow_header=True)
+    plain = client.get("/api/units")
+    assert REPORT_HEADER not in plain.headers
+    assert not any(tmp_path.iterdir())
+
+    asked = client.get("/api/units", headers={PROFILE_HEADER: "1"})
+    assert asked.data == plain.data
+    assert (tmp_path / asked.headers[REPORT_HEADER]).is_file()
+
+
+def test_report_notes_overlapping_requests_and_streamed_bodies(tmp_path):
+    profiler = RequestProfiler(tmp_path, sample_rate=1.0)
+
+    def view():
+        # Another request arrives while this one is being profiled.
+        other = threading.Thread(target=profiler.run, args=("other", lambda: None))
+        other.start()
+        other.join()
+        return Response(iter([b"a", b"b"]))
+
+    result, path = profiler.run("GET /stream", view)
+    assert result.is_streamed
+    text = path.read_text()
+    assert "note: 1 other request(s) ran meanwhile" in text
+    assert "note: the body is streamed" in text
+
+    _, quiet = profiler.run("GET /quiet", lambda: Response(b"ok"))
+    assert "note:" not in quiet.read_text()
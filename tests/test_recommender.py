@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import random
+from typing import List, Optional
+
+import pytest
+
+from conftest import new_student_id
+from src.backend import recommender
+from src.backend.models import Question, SkillMastery, StudentState
+
+SKILLS = [f"skill{i}" for i in range(6)]
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+def _bank(rng: random.Random, size: int) -> List[Question]:
+    bank = []
+    for i in range(size):
+        unit = rng.randrange(3)
+        bank.append(
+            Question(
+                id=f"q{i}",
+                unit_id=f"unit{unit}",
+                section_id=f"unit{unit}-sec{rng.randrange(2)}",
+                text="",
+                type="mcq",
+                options=["a", "b"],
+                correct_answer="a",
+                skill_ids=rng.sample(SKILLS, rng.randrange(3)),
+                difficulty=rng.choice(DIFFICULTIES),
+            )
+        )
+    return bank
+
+
+def _reference_top(
+    bank: List[Question],
+    student: StudentState,
+    unit_id: Optional[str],
+    section_id: Optional[str],
+    skill_id: Optional[str],
+) -> List[Question]:
+    # The full filter-and-sort pick_next_question did before the index.
+    questions = [
+        q
+        for q in bank
+        if (not unit_id or q.unit_id == unit_id)
+        and (not section_id or q.section_id == section_id)
+        and (not skill_id or skill_id in q.skill_ids)
+    ]
+
+    def score(q: Question) -> float:
+        if q.skill_ids:
+            vals = [
+                student.mastery_by_skill[s].pct if s in student.mastery_by_skill else 0.0
+                for s in q.skill_ids
+            ]
+            base = sum(vals) / len(vals)
+        else:
+            base = 50.0
+        return base - 10.0 if q.difficulty == student.preferred_difficulty else base
+
+    return sorted(questions, key=score)[: recommender.TOP_K]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_top_questions_match_full_sort(monkeypatch, seed):
+    rng = random.Random(seed)
+    bank = _bank(rng, 400)
+    monkeypatch.setattr(recommender, "load_questions", lambda: {q.id: q for q in bank})
+    monkeypatch.setattr(recommender, "get_catalog_version", lambda: ("test", seed))
+
+    for _ in range(30):
+        student = StudentState(
+            student_id="s",
+            name="S",
+            preferred_difficulty=rng.choice(DIFFICULTIES),
+            mastery_by_skill={
+                skill: SkillMastery(skill, correct=rng.randrange(4), total=3)
+                for skill in rng.sample(SKILLS, rng.randrange(len(SKILLS)))
+            },
+        )
+        unit_id = rng.choice([None, "unit0", "unit2", "missing"])
+        section_id = rng.choice([None, f"{unit_id}-sec1"])
+        skill_id = rng.choice([None, None, "skill3"])
+        expected = _reference_top(bank, student, unit_id, section_id, skill_id)
+        got = recommender.top_questions(student, unit_id, section_id, skill_id)
+        assert [q.id for q in got] == [q.id for q in expected]
+
+
+@pytest.mark.parametrize("seed", [[1], {"a": 1}, True, 1.5])
+def test_next_question_rejects_bad_seed(client, seed):
+    payload = {"student_id": new_student_id(), "seed": seed}
+    response = client.post("/api/next-question", json=payload)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "invalid_seed"}
+
+
+def test_next_question_seed_is_reproducible(client):
+    student_id = new_student_id()
+    picks = [
+        client.post(
+            "/api/next-question", json={"student_id": student_id, "seed": "fixed"}
+        ).get_json()["id"]
+        for _ in range(3)
+    ]
+    assert len(set(picks)) == 1
+
+
+@pytest.mark.parametrize("field", ["unit_id", "section_id", "skill_id"])
+@pytest.mark.parametrize("value", [["unit"], {"a": 1}, 3])
+def test_next_question_rejects_non_string_filters(client, field, value):
+    payload = {"student_id": new_student_id(), field: value}
+    response = client.post("/api/next-question", json=payload)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "invalid_filter"}
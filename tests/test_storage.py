@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.backend.attempt_log import AttemptLog
+from src.backend.storage import JsonStorage, SqliteStorage, create_storage
+
+USERS = [
+    {"id": "u1", "email": "Teacher@Example.com", "role": "teacher"},
+    {"id": "u2", "email": "student@example.com", "role": "student"},
+]
+
+
+def _row(i: int) -> dict:
+    return {
+        "id": f"a{i}",
+        "student_id": f"s{i % 3}",
+        "quiz_id": f"q{i % 4}",
+        "quiz_type": "practice",
+        "unit_id": "unit1",
+        "section_id": None if i % 5 == 0 else "sec1",
+        "score_pct": float(i % 2) * 100,
+        # Repeated timestamps exercise the id tie-break when paging.
+        "created_at": float(i // 2),
+        "results": [{"question_id": f"q{i}", "correct": bool(i % 2)}],
+    }
+
+
+@pytest.fixture
+def backends(tmp_path):
+    users_path = tmp_path / "users.json"
+    users_path.write_text(json.dumps(USERS))
+    json_storage = JsonStorage(
+        tmp_path / "students.json",
+        users_path,
+        AttemptLog(tmp_path / "attempts", segment_max_bytes=1024),
+    )
+    sqlite_storage = SqliteStorage(tmp_path / "bitbybit.sqlite3")
+    sqlite_storage.save_user_rows(USERS)
+    return json_storage, sqlite_storage
+
+
+def test_backends_store_and_read_attempts_alike(backends):
+    rows = [_row(i) for i in range(40)]
+    for storage in backends:
+        storage.append_attempt_rows(rows[:25])
+        storage.append_attempt_rows(rows[25:])
+
+    json_storage, sqlite_storage = backends
+    assert list(json_storage.iter_attempt_rows()) == rows
+    assert list(sqlite_storage.iter_attempt_rows()) == rows
+    for student_id in ("s0", "s1", "s2", "missing"):
+        assert list(json_storage.iter_attempt_rows(student_id)) == list(
+            sqlite_storage.iter_attempt_rows(student_id)
+        )
+
+
+def test_backends_page_alike(backends):
+    rows = [_row(i) for i in range(40)]
+    pages = []
+    for storage in backends:
+        storage.append_attempt_rows(rows)
+        ids, before = [], None
+        while True:
+            page = storage.page_attempt_rows("s1", before, 4)
+            if not page:
+                break
+            ids.extend(row["id"] for row in page)
+            before = (page[-1]["created_at"], page[-1]["id"])
+        pages.append(ids)
+    expected = sorted(
+        (row for row in rows if row["student_id"] == "s1"),
+        key=lambda row: (row["created_at"], row["id"]),
+        reverse=True,
+    )
+    assert pages[0] == pages[1] == [row["id"] for row in expected]
+
+
+def test_backends_tail_alike(backends):
+    rows = [_row(i) for i in range(30)]
+    for storage in backends:
+        storage.append_attempt_rows(rows[:10])
+        tail = storage.read_attempts_since(None)
+        assert tail.reset
+        assert list(tail) == rows[:10]
+        storage.append_attempt_rows(rows[10:])
+        tail = storage.read_attempts_since(tail.cursor)
+        assert not tail.reset
+        assert list(tail) == rows[10:]
+        assert list(storage.read_attempts_since(tail.cursor)) == []
+
+
+def test_backends_create_students_and_find_users_alike(backends):
+    def build(existing):
+        student_id = f"student-{len(existing) + 1}"
+        return student_id, {"student_id": student_id, "name": "New"}
+
+    for storage in backends:
+        storage.save_student_rows({"s1": {"student_id": "s1", "name": "One"}})
+        storage.create_student_row(build)
+        storage.create_student_row(build)
+        assert storage.load_student_row("s1") == {"student_id": "s1", "name": "One"}
+        assert sorted(storage.load_student_rows()) == ["s1", "student-2", "student-3"]
+        assert [row["id"] for row in storage.find_user_rows(" teacher@example.COM")] == ["u1"]
+        assert storage.find_user_rows("nobody@example.com") == []
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        create_storage(
+            "postgres",
+            students_path=tmp_path / "students.json",
+            users_path=tmp_path / "users.json",
+            attempt_log=AttemptLog(tmp_path / "attempts"),
+            sqlite_path=tmp_path / "db.sqlite3",
+        )
+
+
+def test_import_keeps_equal_client_ids_of_different_students(tmp_path, monkeypatch):
+    from src.backend import import_json, repository
+
+    legacy = [_row(0), {**_row(0), "student_id": "other"}, _row(1)]
+    (tmp_path / "attempts.json").write_text(json.dumps(legacy))
+    (tmp_path / "students.json").write_text(json.dumps({"s0": {"student_id": "s0"}}))
+    (tmp_path / "users.json").write_text(json.dumps(USERS))
+    monkeypatch.setattr(repository, "STUDENTS_PATH", tmp_path / "students.json")
+    monkeypatch.setattr(repository, "USERS_PATH", tmp_path / "users.json")
+    monkeypatch.setattr(repository, "ATTEMPTS_PATH", tmp_path / "attempts.json")
+    monkeypatch.setattr(repository, "ATTEMPTS_LOG_DIR", tmp_path / "attempts")
+
+    db_path = tmp_path / "bitbybit.sqlite3"
+    counts = import_json.import_json_to_sqlite(db_path)
+    assert counts == {"students": 1, "users": 2, "attempts": 3}
+    # Re-running adds nothing.
+    assert import_json.import_json_to_sqlite(db_path)["attempts"] == 0
+    assert list(SqliteStorage(db_path).iter_attempt_rows()) == legacy
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from collections import Counter
+
+from flask import g
+
+from conftest import attempt_payload, new_student_id
+from src.backend import unit_of_work
+from src.backend.ml.difficulty import get_difficulty_table
+from src.backend.models import Attempt, AttemptQuestionResult
+from src.backend.unit_of_work import UnitOfWork
+
+LOADERS = ("load_units", "load_questions", "load_quizzes", "load_student", "load_attempts")
+
+
+def _count_loads(monkeypatch) -> Counter:
+    calls: Counter = Counter()
+    for name in LOADERS:
+        loader = getattr(unit_of_work, name)
+
+        def counted(*args, _name=name, _loader=loader):
+            calls[_name] += 1
+            return _loader(*args)
+
+        monkeypatch.setattr(unit_of_work, name, counted)
+    return calls
+
+
+def test_repeated_loads_in_a_request_hit_the_memo(client, monkeypatch):
+    student_id = new_student_id()
+    for i in range(4):
+        payload = attempt_payload(student_id, i, quiz_type="diagnostic", unit_id="algebra-1")
+        client.post("/api/attempts", json=payload)
+
+    calls = _count_loads(monkeypatch)
+    with client:
+        response = client.get(f"/api/student/{student_id}/diagnostic-results/algebra-1")
+        assert response.status_code == 200
+        stats = g.uow.stats()
+    # The view and the feedback helper both read units and attempts.
+    assert stats["hits"] >= 2
+    assert calls and max(calls.values()) == 1
+
+
+def test_append_attempts_invalidates_derived_keys(monkeypatch):
+    student_id = new_student_id()
+    question_id = next(iter(unit_of_work.load_questions()))
+    calls = _count_loads(monkeypatch)
+    uow = UnitOfWork()
+    attempt = Attempt(
+        id=f"{student_id}-1",
+        student_id=student_id,
+        quiz_id="test",
+        quiz_type="practice",
+        unit_id="algebra-1",
+        section_id=None,
+        score_pct=100.0,
+        created_at=1_700_000_000.0,
+        results=[AttemptQuestionResult(question_id, True, "a", 5)],
+    )
+
+    before = uow.attempts(student_id)
+    version = get_difficulty_table(uow).version
+    uow.questions()
+    assert uow.attempts(student_id) is before
+    get_difficulty_table(uow)
+    assert uow.stats() == {"loads": 3, "hits": 2}
+
+    uow.append_attempts([attempt])
+    assert [a.id for a in uow.attempts(student_id)] == [a.id for a in before] + [attempt.id]
+    assert calls["load_attempts"] == 2
+    # The difficulty table is caught up again rather than served from the memo.
+    assert get_difficulty_table(uow).version > version
+    assert uow.stats() == {"loads": 5, "hits": 2}
+    # Catalog reads are not derived from attempts and stay memoized.
+    uow.questions()
+    assert calls["load_questions"] == 1
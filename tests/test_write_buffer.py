@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+
+from conftest import ROOT, new_student_id
+from src.backend import repository
+from src.backend.attempt_log import AttemptLog
+from src.backend.models import StudentState
+from src.backend.storage import JsonStorage
+from src.backend.write_buffer import StudentWriteBuffer
+
+
+def _storage(tmp_path) -> JsonStorage:
+    return JsonStorage(
+        tmp_path / "students.json", tmp_path / "users.json", AttemptLog(tmp_path / "attempts")
+    )
+
+
+def test_buffered_rows_are_read_back_before_they_are_written(tmp_path):
+    storage = _storage(tmp_path)
+    buffer = StudentWriteBuffer(storage, max_pending=10, max_delay=60)
+    buffer.put("s1", {"name": "One"})
+    assert buffer.get("s1") == {"name": "One"}
+    assert storage.load_student_row("s1") is None
+    assert buffer.flush() == 1
+    assert storage.load_student_row("s1") == {"name": "One"}
+    assert buffer.get("s1") is None
+    assert buffer.stats()["flushes"] == 1
+
+
+def test_flushes_once_max_pending_students_are_dirty(tmp_path):
+    storage = _storage(tmp_path)
+    buffer = StudentWriteBuffer(storage, max_pending=3, max_delay=60)
+    for i in range(2):
+        buffer.put(f"s{i}", {"n": i})
+        buffer.put(f"s{i}", {"n": i + 10})
+    assert storage.load_student_rows() == {}
+    buffer.put("s2", {"n": 2})
+    assert storage.load_student_rows() == {"s0": {"n": 10}, "s1": {"n": 11}, "s2": {"n": 2}}
+    assert buffer.stats() == {
+        "pending": 0,
+        "flushes": 1,
+        "rows_written": 3,
+        "oldest_pending_sec": None,
+    }
+
+
+def test_timer_flushes_the_oldest_row_after_max_delay(tmp_path):
+    storage = _storage(tmp_path)
+    buffer = StudentWriteBuffer(storage, max_pending=10, max_delay=0.05)
+    buffer.put("s1", {"name": "One"})
+    deadline = time.monotonic() + 5
+    while storage.load_student_row("s1") is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert storage.load_student_row("s1") == {"name": "One"}
+
+
+def test_zero_delay_writes_through(tmp_path):
+    storage = _storage(tmp_path)
+    buffer = StudentWriteBuffer(storage, max_delay=0)
+    buffer.put("s1", {"name": "One"})
+    assert storage.load_student_row("s1") == {"name": "One"}
+
+
+def test_pending_rows_are_flushed_at_exit(tmp_path):
+    script = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from src.backend.attempt_log import AttemptLog\n"
+        "from src.backend.storage import JsonStorage\n"
+        "from src.backend.write_buffer import StudentWriteBuffer\n"
+        "d = Path(sys.argv[1])\n"
+        "storage = JsonStorage(d / 'students.json', d / 'users.json', AttemptLog(d / 'a'))\n"
+        "StudentWriteBuffer(storage, max_delay=60).put('s1', {'name': 'One'})\n"
+    )
+    subprocess.run([sys.executable, "-c", script, str(tmp_path)], cwd=ROOT, check=True)
+    assert _storage(tmp_path).load_student_row("s1") == {"name": "One"}
+
+
+def test_load_student_reads_its_own_buffered_save(monkeypatch):
+    monkeypatch.setattr(repository._student_writes, "max_delay", 60)
+    student_id = new_student_id()
+    repository.save_student(StudentState(student_id=student_id, name="Buffered"))
+    try:
+        assert repository._storage.load_student_row(student_id) is None
+        assert repository.load_student(student_id).name == "Buffered"
+        assert student_id in {s.student_id for s in repository.get_all_students()}
+    finally:
+        repository.flush_student_writes()
+    assert repository._storage.load_student_row(student_id)["name"] == "Buffered"
+
+
+def test_buffer_writes_through_with_several_workers(tmp_path):
+    env = {**os.environ, "BITBYBIT_DATA_DIR": str(tmp_path), "BITBYBIT_WORKERS": "2"}
+    env["BITBYBIT_STUDENT_FLUSH_INTERVAL"] = "0.5"
+    script = "from src.backend import repository; print(repository._student_writes.max_delay)"
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, env=env, check=True, capture_output=True
+    )
+    assert output.stdout.strip() == b"0.0"